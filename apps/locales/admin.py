@@ -3,6 +3,11 @@ from .models import Local   # 👈 el modelo de tus locales
 
 @admin.register(Local)
 class LocalAdmin(admin.ModelAdmin):
-    # Lo dejo simple para no depender de nombres de campos.
-    # Si luego quieres, se puede mejorar con list_display, search_fields, etc.
-    pass
+    # Los conteos salen de los contadores del local, sin COUNT por fila
+    list_display = ("codigo", "nombre", "provincia", "municipio", "contador_abiertos", "tickets_mes_actual", "activo")
+    list_filter = ("activo", "provincia")
+    search_fields = ("codigo", "nombre")
+
+    @admin.display(description="Tickets del mes")
+    def tickets_mes_actual(self, obj):
+        return obj.tickets_mes_actual()
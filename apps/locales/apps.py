@@ -5,3 +5,8 @@ class LocalesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.locales'
     verbose_name = 'Locales'
+
+    def ready(self):
+        # Descarta el índice de autocompletado cuando cambia un local
+        from . import autocompletado
+        autocompletado.conectar_senales()
@@ -0,0 +1,163 @@
+"""
+Índice en memoria para autocompletar locales (código / nombre).
+
+Se arma una vez por proceso con los locales activos y responde:
+- por prefijo: búsqueda binaria sobre una lista ordenada de claves
+  normalizadas (código, nombre completo y cada palabra del nombre);
+- con errores de tipeo: similitud de trigramas (como pg_trgm) cuando el
+  prefijo no alcanza para llenar los resultados.
+
+Al guardar o borrar un `Local` el índice se descarta y se rearma en la
+siguiente consulta. Los otros procesos se enteran por una versión en la
+caché de Django (si es compartida) y, en todo caso, por el vencimiento
+de LOCALES_INDICE_SEGUNDOS.
+"""
+import bisect
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+
+from .models import Local, normalizar_texto
+
+
+CLAVE_VERSION = 'locales:indice:version'
+
+# Puntaje por tipo de coincidencia (mayor = primero)
+EXACTO, PREFIJO_CODIGO, PREFIJO_NOMBRE, PREFIJO_PALABRA = 4, 3, 2, 1
+
+
+def trigramas(texto):
+    """Trigramas de cada palabra con relleno, igual que pg_trgm."""
+    resultado = set()
+    for palabra in texto.split():
+        relleno = f'  {palabra} '
+        resultado.update(relleno[i:i + 3] for i in range(len(relleno) - 2))
+    return resultado
+
+
+class IndiceLocales:
+
+    def __init__(self, filas):
+        """`filas`: iterable de (id, codigo, nombre)."""
+        self.locales = {}
+        claves = []
+        # Trigramas por clave (código, nombre y cada palabra del nombre):
+        # comparar contra palabras sueltas evita que un nombre largo
+        # diluya la similitud de una palabra mal escrita.
+        self._trigramas = {}
+        self._dueno = []
+        self._tamano = []
+
+        for pk, codigo, nombre in filas:
+            self.locales[pk] = (codigo, nombre)
+            cod, nom = normalizar_texto(codigo), normalizar_texto(nombre)
+            claves.append((cod, PREFIJO_CODIGO, pk))
+            claves.append((nom, PREFIJO_NOMBRE, pk))
+            palabras = nom.split()
+            for palabra in palabras[1:]:
+                claves.append((palabra, PREFIJO_PALABRA, pk))
+
+            for clave in {cod, nom, *palabras}:
+                tris = trigramas(clave)
+                for tri in tris:
+                    self._trigramas.setdefault(tri, []).append(len(self._dueno))
+                self._dueno.append(pk)
+                self._tamano.append(len(tris))
+
+        claves.sort()
+        self._claves = claves
+        self._textos = [c[0] for c in claves]
+
+    def _por_prefijo(self, consulta):
+        puntajes = {}
+        i = bisect.bisect_left(self._textos, consulta)
+        while i < len(self._textos) and self._textos[i].startswith(consulta):
+            texto, tipo, pk = self._claves[i]
+            if texto == consulta and tipo != PREFIJO_PALABRA:
+                tipo = EXACTO
+            puntajes[pk] = max(puntajes.get(pk, 0), tipo)
+            i += 1
+        return puntajes
+
+    def _por_similitud(self, consulta, minimo):
+        tris = trigramas(consulta)
+        if not tris:
+            return {}
+        comunes = Counter()
+        for tri in tris:
+            comunes.update(self._trigramas.get(tri, ()))
+        similitudes = {}
+        for clave, n in comunes.items():
+            # Coeficiente de Dice entre la consulta y la clave; cada local
+            # se queda con su mejor clave
+            valor = 2 * n / (len(tris) + self._tamano[clave])
+            pk = self._dueno[clave]
+            if valor >= minimo and valor > similitudes.get(pk, 0):
+                similitudes[pk] = valor
+        return similitudes
+
+    def buscar(self, texto, limite=10, minimo=0.3):
+        """
+        Devuelve hasta `limite` tuplas (id, codigo, nombre), primero las
+        coincidencias por prefijo y luego las aproximadas.
+        """
+        consulta = normalizar_texto(texto)
+        if not consulta:
+            return []
+
+        prefijo = self._por_prefijo(consulta)
+        orden = sorted(prefijo, key=lambda pk: (-prefijo[pk], self.locales[pk][0]))
+
+        if len(orden) < limite and len(consulta) >= 3:
+            similitud = self._por_similitud(consulta, minimo)
+            extra = sorted(
+                (pk for pk in similitud if pk not in prefijo),
+                key=lambda pk: (-similitud[pk], self.locales[pk][0]),
+            )
+            orden.extend(extra)
+
+        return [(pk, *self.locales[pk]) for pk in orden[:limite]]
+
+
+_indice = None
+_indice_version = None
+_indice_creado = 0.0
+_lock = threading.Lock()
+
+
+def obtener_indice():
+    """Índice del proceso, rearmado si cambió algún local o si venció."""
+    global _indice, _indice_version, _indice_creado
+    vigencia = getattr(settings, 'LOCALES_INDICE_SEGUNDOS', 300)
+    version = cache.get(CLAVE_VERSION, 0)
+
+    with _lock:
+        if (
+            _indice is None
+            or _indice_version != version
+            or time.monotonic() - _indice_creado > vigencia
+        ):
+            filas = Local.objects.filter(activo=True).values_list('id', 'codigo', 'nombre')
+            _indice = IndiceLocales(filas.iterator())
+            _indice_version = version
+            _indice_creado = time.monotonic()
+        return _indice
+
+
+def invalidar_indice(**kwargs):
+    global _indice
+    with _lock:
+        _indice = None
+    try:
+        cache.incr(CLAVE_VERSION)
+    except ValueError:
+        cache.set(CLAVE_VERSION, 1, None)
+
+
+def conectar_senales():
+    post_save.connect(invalidar_indice, sender=Local, dispatch_uid='locales_indice_guardado')
+    post_delete.connect(invalidar_indice, sender=Local, dispatch_uid='locales_indice_borrado')
@@ -0,0 +1,55 @@
+import unicodedata
+
+from django.db import migrations, models
+
+
+def _normalizar(texto):
+    # Copia de `normalizar_texto` al momento de esta migración
+    texto = unicodedata.normalize('NFKD', texto or '')
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    return ' '.join(texto.casefold().split())
+
+
+def llenar_claves(apps, schema_editor):
+    Local = apps.get_model('locales', 'Local')
+    vistas = set()
+    for local in Local.objects.order_by('id').only('id', 'codigo', 'nombre').iterator():
+        clave = _normalizar(local.codigo)
+        # Códigos que solo difieren en mayúsculas/tildes: el más antiguo se
+        # queda con la clave; los demás quedan sin ella (el admin avisará
+        # del choque al editarlos y Local.save() no se la vuelve a poner).
+        local.clave_codigo = None if clave in vistas else clave
+        local.clave_nombre = _normalizar(local.nombre)
+        vistas.add(clave)
+        local.save(update_fields=['clave_codigo', 'clave_nombre'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('locales', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='local',
+            name='clave_codigo',
+            field=models.CharField(editable=False, max_length=200, null=True, verbose_name='Clave del código'),
+        ),
+        migrations.AddField(
+            model_name='local',
+            name='clave_nombre',
+            field=models.CharField(default='', editable=False, max_length=200, verbose_name='Clave del nombre'),
+        ),
+        migrations.RunPython(llenar_claves, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='local',
+            name='clave_codigo',
+            field=models.CharField(editable=False, max_length=200, null=True, unique=True, verbose_name='Clave del código'),
+        ),
+        migrations.AlterField(
+            model_name='local',
+            name='clave_nombre',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=200, verbose_name='Clave del nombre'),
+        ),
+    ]
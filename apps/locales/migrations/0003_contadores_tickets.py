@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-16 21:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('locales', '0002_claves_normalizadas'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='local',
+            name='contador_abiertos',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Tickets abiertos'),
+        ),
+        migrations.AddField(
+            model_name='local',
+            name='contador_mes',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Tickets del mes'),
+        ),
+        migrations.AddField(
+            model_name='local',
+            name='contador_mes_inicio',
+            field=models.DateField(blank=True, editable=False, null=True, verbose_name='Mes del contador'),
+        ),
+    ]
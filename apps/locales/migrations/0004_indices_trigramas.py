@@ -0,0 +1,84 @@
+# Generated by Django 4.2.7 on 2026-10-16 21:30
+
+import logging
+
+from django.db import migrations, transaction
+from django.db.utils import ProgrammingError
+
+
+# Índices de trigramas (pg_trgm) para buscar locales por parte del código o
+# del nombre (`icontains` del admin y de la búsqueda de tickets sin FTS).
+# Django traduce icontains a `UPPER(col::text) LIKE UPPER(...)`: el índice
+# tiene que ser sobre esa misma expresión. Solo en PostgreSQL.
+#
+# Si el servidor no trae pg_trgm o el usuario no la puede crear, la migración
+# sigue sin estos índices (avisando). Para crearlos después, con la extensión
+# ya instalada: `migrate locales 0003` y `migrate locales`.
+INDICES_TRIGRAMAS_PG = [
+    (
+        'local_codigo_trgm_idx',
+        'CREATE INDEX IF NOT EXISTS local_codigo_trgm_idx ON locales_local '
+        'USING gin (UPPER(codigo::text) gin_trgm_ops)',
+    ),
+    (
+        'local_nombre_trgm_idx',
+        'CREATE INDEX IF NOT EXISTS local_nombre_trgm_idx ON locales_local '
+        'USING gin (UPPER(nombre::text) gin_trgm_ops)',
+    ),
+]
+
+
+logger = logging.getLogger(__name__)
+
+
+def _instalar_pg_trgm(schema_editor):
+    """True si pg_trgm queda instalada en la base."""
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT installed_version FROM pg_available_extensions WHERE name = 'pg_trgm'"
+        )
+        fila = cursor.fetchone()
+    if fila is None:
+        logger.warning('El servidor no tiene pg_trgm: se omiten los índices de trigramas.')
+        return False
+    if fila[0] is not None:
+        return True
+    try:
+        # En un savepoint, para que el error no aborte la migración
+        with transaction.atomic(using=schema_editor.connection.alias):
+            schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    except ProgrammingError as error:
+        # Sin permiso para crear extensiones en esta base
+        logger.warning(
+            'No se pudo crear pg_trgm (%s): se omiten los índices de trigramas.',
+            str(error).splitlines()[0],
+        )
+        return False
+    return True
+
+
+def crear_indices_trigramas(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    if not _instalar_pg_trgm(schema_editor):
+        return
+    for _nombre, sql in INDICES_TRIGRAMAS_PG:
+        schema_editor.execute(sql)
+
+
+def borrar_indices_trigramas(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for nombre, _sql in INDICES_TRIGRAMAS_PG:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {nombre}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('locales', '0003_contadores_tickets'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_indices_trigramas, borrar_indices_trigramas),
+    ]
@@ -1,13 +1,29 @@
 """
 Modelos para la gestión de locales
 """
+import unicodedata
+
+from django.core.exceptions import ValidationError
 from django.db import models
 
 
+def normalizar_texto(texto):
+    """
+    Minúsculas, sin tildes y con espacios simples: "  Banca  Peña " => "banca pena".
+    Se usa para comparar códigos / nombres de locales.
+    """
+    texto = unicodedata.normalize('NFKD', texto or '')
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    return ' '.join(texto.casefold().split())
+
+
 class Local(models.Model):
     """
     Modelo para representar cada banca/local del consorcio
     """
+    # Los escribe solo apps.tickets.contadores (con UPDATE ... + 1)
+    CONTADORES = ('contador_abiertos', 'contador_mes', 'contador_mes_inicio')
+
     codigo = models.CharField(
         max_length=20,
         unique=True,
@@ -76,6 +92,45 @@ class Local(models.Model):
         verbose_name='Fecha de actualización'
     )
 
+    # Claves normalizadas (ver `normalizar_texto`) para buscar por lo que
+    # escribe el digitador con un índice, sin iexact. Se llenan en save().
+    clave_codigo = models.CharField(
+        max_length=200,
+        unique=True,
+        null=True,
+        editable=False,
+        verbose_name='Clave del código'
+    )
+
+    clave_nombre = models.CharField(
+        max_length=200,
+        db_index=True,
+        default='',
+        editable=False,
+        verbose_name='Clave del nombre'
+    )
+
+    # Contadores denormalizados, mantenidos al guardar tickets
+    # (apps.tickets.contadores; `manage.py reconciliar_contadores`).
+    contador_abiertos = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Tickets abiertos'
+    )
+
+    contador_mes = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Tickets del mes'
+    )
+
+    contador_mes_inicio = models.DateField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name='Mes del contador'
+    )
+
     class Meta:
         verbose_name = 'Local'
         verbose_name_plural = 'Locales'
@@ -84,12 +139,48 @@ class Local(models.Model):
     def __str__(self):
         return f"{self.codigo} - {self.nombre}"
 
+    def clean(self):
+        super().clean()
+        clave = normalizar_texto(self.codigo)
+        if Local.objects.filter(clave_codigo=clave).exclude(pk=self.pk).exists():
+            raise ValidationError({
+                'codigo': 'Ya existe un local con ese código (sin importar mayúsculas ni tildes).'
+            })
+
+    def save(self, *args, **kwargs):
+        clave = normalizar_texto(self.codigo)
+        if (
+            not self._state.adding
+            and clave != self.clave_codigo
+            and Local.objects.filter(clave_codigo=clave).exclude(pk=self.pk).exists()
+        ):
+            # Local viejo cuyo código choca con otro al normalizarlo (la
+            # migración 0002 lo dejó sin clave): sigue sin ella en vez de
+            # romper el índice único. Al crear no: ahí el choque es el que
+            # resuelve `get_or_create` en TicketForm.clean_local.
+            clave = None
+        self.clave_codigo = clave
+        self.clave_nombre = normalizar_texto(self.nombre)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, 'clave_codigo', 'clave_nombre'}
+        elif not self._state.adding and not kwargs.get('force_insert'):
+            # Editar un local no debe pisar los contadores con lo que
+            # tenía en memoria al cargarse
+            kwargs['update_fields'] = [
+                f.name for f in self._meta.concrete_fields
+                if not f.primary_key and f.name not in self.CONTADORES
+            ]
+        super().save(*args, **kwargs)
+
     def tickets_abiertos(self):
         """Retorna el número de tickets abiertos para este local"""
-        return self.tickets.filter(estado__in=['PENDIENTE', 'EN_PROCESO']).count()
+        return self.contador_abiertos
 
     def tickets_mes_actual(self):
         """Retorna el número de tickets del mes actual"""
         from django.utils import timezone
-        inicio_mes = timezone.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        return self.tickets.filter(fecha_creacion__gte=inicio_mes).count()
+        if self.contador_mes_inicio != timezone.localdate().replace(day=1):
+            # El contador es de un mes anterior: este mes todavía no hay
+            return 0
+        return self.contador_mes
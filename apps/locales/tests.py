@@ -0,0 +1,141 @@
+from unittest import mock, skipUnless
+
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from apps.tickets.forms import TicketForm
+from apps.usuarios.models import Usuario
+from .autocompletado import IndiceLocales, invalidar_indice
+from .models import Local
+
+
+class ClavesNormalizadasTests(TestCase):
+
+    def local_del_form(self, texto):
+        form = TicketForm()
+        form.cleaned_data = {'local': texto}
+        return form.clean_local()
+
+    def test_mismo_local_sin_importar_mayusculas_ni_tildes(self):
+        local = self.local_del_form('Peña 01')
+        for texto in ['PEÑA 01', 'pena 01', '  Pena   01 ']:
+            self.assertEqual(self.local_del_form(texto), local, texto)
+        self.assertEqual(Local.objects.count(), 1)
+        self.assertEqual(local.clave_codigo, 'pena 01')
+
+    def test_get_or_create_si_otro_lo_creo_antes(self):
+        # Carrera: la búsqueda inicial no lo vio, pero ya está en la BD
+        local = self.local_del_form('Peña 01')
+        vacio = Local.objects.none()
+        with mock.patch.object(Local.objects, 'filter', return_value=vacio):
+            self.assertEqual(self.local_del_form('PENA 01'), local)
+        self.assertEqual(Local.objects.count(), 1)
+
+    def test_duplicado_viejo_sin_clave_se_puede_guardar(self):
+        # Como lo deja la migración 0002 cuando dos códigos chocan
+        original = Local.objects.create(codigo='GD01', nombre='Banca')
+        viejo = Local.objects.create(codigo='otro', nombre='Banca vieja')
+        Local.objects.filter(pk=viejo.pk).update(codigo='gd01', clave_codigo=None)
+        viejo.refresh_from_db()
+
+        viejo.nombre = 'Banca vieja 2'
+        viejo.save()
+        viejo.refresh_from_db()
+        self.assertIsNone(viejo.clave_codigo)
+        self.assertEqual(viejo.clave_nombre, 'banca vieja 2')
+        self.assertEqual(Local.objects.get(clave_codigo='gd01'), original)
+        with self.assertRaises(ValidationError):
+            viejo.full_clean()
+
+        # Si le cambian el código a uno libre, recupera la clave
+        viejo.codigo = 'GD02'
+        viejo.save()
+        self.assertEqual(viejo.clave_codigo, 'gd02')
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Índices solo de PostgreSQL')
+class IndicesTrigramasTests(TestCase):
+
+    def test_con_pg_trgm_se_crean(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+            instalada = cursor.fetchone() is not None
+            existentes = connection.introspection.get_constraints(cursor, 'locales_local')
+        for nombre in ['local_codigo_trgm_idx', 'local_nombre_trgm_idx']:
+            self.assertEqual(nombre in existentes, instalada, nombre)
+
+
+class IndiceLocalesTests(SimpleTestCase):
+
+    def setUp(self):
+        self.indice = IndiceLocales([
+            (1, 'GD01', 'Banca Gurabo'),
+            (2, 'GD010', 'Gd01 Norte'),
+            (3, 'SD05', 'La Peña'),
+            (4, 'ST02', 'Banca Santiago Centro'),
+            (5, 'AB01', 'Gd01 Sur'),
+        ])
+
+    def ids(self, texto, **kwargs):
+        return [pk for pk, _codigo, _nombre in self.indice.buscar(texto, **kwargs)]
+
+    def test_orden_por_tipo_de_coincidencia(self):
+        # Código exacto, nombre exacto... luego prefijo de código y de nombre
+        self.assertEqual(self.ids('gd01'), [1, 2, 5])
+        self.assertEqual(self.ids('gd01 sur')[0], 5)
+        self.assertEqual(self.ids('GD0'), [1, 2, 5])
+        # Mismo tipo: desempata el código
+        self.assertEqual(self.ids('banca'), [1, 4])
+
+    def test_palabras_del_nombre_sin_tildes(self):
+        self.assertEqual(self.ids('pena'), [3])
+        self.assertEqual(self.ids('SANTIAGO'), [4])
+
+    def test_errores_de_tipeo(self):
+        self.assertEqual(self.ids('santaigo'), [4])
+        self.assertEqual(self.ids('gurab0'), [1])
+        # Con menos de 3 letras no hay búsqueda aproximada
+        self.assertEqual(self.ids('xq'), [])
+
+    def test_aproximados_despues_de_los_prefijos(self):
+        resultado = self.ids('banca santigo')
+        self.assertEqual(resultado[0], 4)
+        self.assertEqual(self.ids('gd01', limite=2), [1, 2])
+        self.assertEqual(self.ids('   '), [])
+
+
+@override_settings(LOCALES_AUTOCOMPLETAR_MAX=2)
+class AutocompletarTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = Usuario.objects.create_user('digitador', password='x', rol='DIGITADOR')
+        for codigo in ['GD01', 'GD02', 'GD03']:
+            Local.objects.create(codigo=codigo, nombre=f'Banca {codigo}')
+        Local.objects.create(codigo='GD04', nombre='Cerrada', activo=False)
+
+    def setUp(self):
+        invalidar_indice()
+        self.client.force_login(self.usuario)
+
+    def buscar(self, **params):
+        respuesta = self.client.get(reverse('locales:autocompletar'), params)
+        self.assertEqual(respuesta.status_code, 200)
+        return [r['codigo'] for r in respuesta.json()['resultados']]
+
+    def test_limite_con_tope(self):
+        self.assertEqual(self.buscar(q='gd', limite=50), ['GD01', 'GD02'])
+        self.assertEqual(self.buscar(q='gd', limite='x'), ['GD01', 'GD02'])
+        self.assertEqual(self.buscar(q='gd', limite=1), ['GD01'])
+
+    def test_sin_inactivos_y_al_dia(self):
+        self.assertEqual(self.buscar(q='cerrada'), [])
+        Local.objects.create(codigo='GD00', nombre='Nueva')
+        self.assertEqual(self.buscar(q='gd0'), ['GD00', 'GD01'])
+
+    def test_requiere_sesion(self):
+        self.client.logout()
+        respuesta = self.client.get(reverse('locales:autocompletar'), {'q': 'gd'})
+        self.assertEqual(respuesta.status_code, 302)
@@ -1,7 +1,8 @@
 from django.urls import path
+from . import views
 
 app_name = 'locales'
 
 urlpatterns = [
-    # Aquí irán las URLs de locales
+    path('autocompletar/', views.locales_autocompletar, name='autocompletar'),
 ]
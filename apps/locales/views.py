@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse
+
+from .autocompletado import obtener_indice
+
+
+@login_required
+def locales_autocompletar(request):
+    """
+    Sugerencias de locales para el campo "Local" del ticket.
+    GET ?q=texto[&limite=N]  =>  {"resultados": [{"id", "codigo", "nombre"}, ...]}
+    """
+    maximo = getattr(settings, 'LOCALES_AUTOCOMPLETAR_MAX', 20)
+    try:
+        limite = min(max(int(request.GET.get('limite', 10)), 1), maximo)
+    except ValueError:
+        limite = min(10, maximo)
+
+    resultados = obtener_indice().buscar(request.GET.get('q', ''), limite=limite)
+    return JsonResponse({
+        'resultados': [
+            {'id': pk, 'codigo': codigo, 'nombre': nombre}
+            for pk, codigo, nombre in resultados
+        ],
+    })
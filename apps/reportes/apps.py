@@ -0,0 +1,12 @@
+from django.apps import AppConfig
+
+
+class ReportesConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.reportes'
+    verbose_name = 'Reportes'
+
+    def ready(self):
+        # Mantiene ResumenDiario al día cuando cambian los tickets
+        from . import resumenes
+        resumenes.conectar_senales()
@@ -0,0 +1,153 @@
+"""
+Exportación de tickets a CSV / XLSX con memoria constante.
+
+Los tickets se leen con `.values_list(...).iterator(chunk_size=...)`, así
+nunca se cargan todos en memoria: el CSV se va escribiendo en un
+`StreamingHttpResponse` y el XLSX usa el modo write-only de openpyxl
+(que escribe las filas a disco a medida que llegan).
+
+El XLSX no es streaming: un .xlsx es un zip que solo se puede cerrar al
+final, así que el libro entero se arma en un archivo temporal y recién
+entonces se envía. La memoria sigue constante, pero el disco y la espera
+crecen con el rango; por eso la vista lo limita a REPORTES_XLSX_MAX_DIAS.
+"""
+import csv
+import tempfile
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+
+from apps.tickets.archivo import unir_por_fecha
+from apps.tickets.models import Ticket, TicketArchivado
+
+
+ENCABEZADOS = [
+    'Número', 'Creado', 'Código local', 'Local', 'Provincia', 'Categoría',
+    'Prioridad', 'Estado', 'Técnico', 'Límite SLA', 'Resuelto', 'Cerrado',
+    'Resultado SLA',
+]
+
+CAMPOS = [
+    'numero_ticket', 'fecha_creacion', 'local__codigo', 'local__nombre',
+    'local__provincia', 'categoria__nombre', 'prioridad', 'estado',
+    'asignado_a__username', 'fecha_limite_sla', 'fecha_resolucion', 'fecha_cierre',
+]
+
+PRIORIDADES = dict(Ticket.PRIORIDADES)
+ESTADOS = dict(Ticket.ESTADOS)
+
+
+def rango_fechas(desde, hasta):
+    """
+    Convierte dos `date` (incluidas) en datetimes con zona para filtrar
+    `fecha_creacion`. Cualquiera de los dos puede ser None.
+    """
+    filtro = {}
+    if desde:
+        filtro['fecha_creacion__gte'] = timezone.make_aware(datetime.combine(desde, time.min))
+    if hasta:
+        filtro['fecha_creacion__lt'] = timezone.make_aware(
+            datetime.combine(hasta + timedelta(days=1), time.min)
+        )
+    return filtro
+
+
+def resultado_sla(estado, limite, resolucion, cierre, ahora):
+    """Mismas reglas que reportes: primero la resolución, si no el cierre."""
+    fin = resolucion or cierre
+    if estado in ('RESUELTO', 'CERRADO') and fin:
+        return 'Cumplido' if fin <= limite else 'Incumplido'
+    if estado == 'CANCELADO':
+        return 'Cancelado'
+    return 'Vencido' if ahora > limite else 'En plazo'
+
+
+def _local(valor):
+    # Hora local sin zona: la entienden tanto Excel como una hoja de cálculo
+    return timezone.localtime(valor).replace(tzinfo=None) if valor else None
+
+
+def _ordenadas(modelo, filtro, chunk_size):
+    qs = (
+        modelo.objects
+        .filter(**filtro)
+        .order_by('fecha_creacion', 'id')
+        .values_list('fecha_creacion', 'id', *CAMPOS)
+    )
+    for fila in qs.iterator(chunk_size=chunk_size):
+        yield fila[:2], fila[2:]
+
+
+def filas_tickets(desde=None, hasta=None, chunk_size=2000):
+    """
+    Genera una tupla por ticket, en orden de creación. Incluye los
+    archivados (`TicketArchivado`), intercalados por fecha.
+    """
+    ahora = timezone.now()
+    filtro = rango_fechas(desde, hasta)
+    filas = unir_por_fecha(
+        _ordenadas(Ticket, filtro, chunk_size),
+        _ordenadas(TicketArchivado, filtro, chunk_size),
+    )
+    for (numero, creado, codigo, local, provincia, categoria, prioridad, estado,
+         tecnico, limite, resolucion, cierre) in filas:
+        yield (
+            numero,
+            _local(creado),
+            codigo,
+            local,
+            provincia,
+            categoria,
+            PRIORIDADES.get(prioridad, prioridad),
+            ESTADOS.get(estado, estado),
+            tecnico or '',
+            _local(limite),
+            _local(resolucion),
+            _local(cierre),
+            resultado_sla(estado, limite, resolucion, cierre, ahora),
+        )
+
+
+class _Eco:
+    """Pseudo-archivo: `write` devuelve lo escrito (patrón de la doc de Django)."""
+
+    def write(self, valor):
+        return valor
+
+
+def _texto(valor):
+    if isinstance(valor, datetime):
+        return valor.strftime('%Y-%m-%d %H:%M')
+    return '' if valor is None else valor
+
+
+def lineas_csv(filas):
+    """Convierte las filas en líneas CSV, una a una."""
+    escritor = csv.writer(_Eco())
+    # BOM para que Excel abra bien las tildes
+    yield '\ufeff' + escritor.writerow(ENCABEZADOS)
+    for fila in filas:
+        yield escritor.writerow([_texto(v) for v in fila])
+
+
+def escribir_xlsx(filas, destino):
+    """
+    Escribe las filas en `destino` (ruta o archivo) con un Workbook
+    write-only de openpyxl.
+    """
+    from openpyxl import Workbook
+
+    libro = Workbook(write_only=True)
+    hoja = libro.create_sheet('Tickets')
+    hoja.append(ENCABEZADOS)
+    for fila in filas:
+        hoja.append(fila)
+    libro.save(destino)
+
+
+def xlsx_temporal(filas):
+    """Genera el XLSX en un archivo temporal y lo devuelve abierto al inicio."""
+    archivo = tempfile.TemporaryFile(suffix='.xlsx')
+    escribir_xlsx(filas, archivo)
+    archivo.seek(0)
+    return archivo
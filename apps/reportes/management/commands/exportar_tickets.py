@@ -0,0 +1,58 @@
+"""
+Exporta tickets a CSV o XLSX sin cargarlos todos en memoria.
+
+Uso:
+    python manage.py exportar_tickets --desde 2025-01-01 --hasta 2025-06-30 --salida tickets.xlsx
+    python manage.py exportar_tickets --formato csv > tickets.csv
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from apps.reportes.exportar import escribir_xlsx, filas_tickets, lineas_csv
+
+
+class Command(BaseCommand):
+    help = "Exporta tickets (con local, categoría, técnico y resultado SLA) a CSV o XLSX."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--desde', help='Fecha inicial AAAA-MM-DD (incluida).')
+        parser.add_argument('--hasta', help='Fecha final AAAA-MM-DD (incluida).')
+        parser.add_argument('--formato', choices=['csv', 'xlsx'], default=None,
+                            help='csv o xlsx (por defecto se deduce de --salida, si no csv).')
+        parser.add_argument('--salida', help='Archivo de salida (por defecto stdout, solo CSV).')
+        parser.add_argument('--lote', type=int, default=2000,
+                            help='Tickets leídos por lote (default 2000).')
+
+    def handle(self, *args, **options):
+        desde = self._fecha(options['desde'], '--desde')
+        hasta = self._fecha(options['hasta'], '--hasta')
+        salida = options['salida']
+        formato = options['formato'] or ('xlsx' if salida and salida.endswith('.xlsx') else 'csv')
+
+        filas = filas_tickets(desde, hasta, chunk_size=options['lote'])
+
+        if formato == 'xlsx':
+            if not salida:
+                raise CommandError('Para XLSX indica --salida archivo.xlsx')
+            escribir_xlsx(filas, salida)
+        elif salida:
+            with open(salida, 'w', encoding='utf-8', newline='') as archivo:
+                for linea in lineas_csv(filas):
+                    archivo.write(linea)
+        else:
+            for linea in lineas_csv(filas):
+                self.stdout.write(linea, ending='')
+
+        if salida:
+            self.stderr.write(self.style.SUCCESS(f'Exportación escrita en {salida}'))
+
+    def _fecha(self, valor, opcion):
+        if not valor:
+            return None
+        try:
+            fecha = parse_date(valor)
+        except ValueError:
+            fecha = None
+        if not fecha:
+            raise CommandError(f'{opcion}: fecha inválida, usa AAAA-MM-DD.')
+        return fecha
@@ -0,0 +1,32 @@
+"""
+Reconstruye ResumenDiario desde la tabla de tickets (backfill).
+
+Uso:
+    python manage.py reconstruir_resumenes            # todo el historial
+    python manage.py reconstruir_resumenes --dias 90  # solo los últimos 90 días
+"""
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.reportes.resumenes import reconstruir
+
+
+class Command(BaseCommand):
+    help = "Recalcula los resúmenes diarios de reportes a partir de los tickets."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dias', type=int, default=None,
+                            help='Solo reconstruir los últimos N días (default: todo).')
+        parser.add_argument('--lote', type=int, default=2000,
+                            help='Tamaño de lote para leer e insertar (default 2000).')
+
+    def handle(self, *args, **options):
+        desde = None
+        if options['dias'] is not None:
+            desde = timezone.localdate() - timedelta(days=options['dias'])
+
+        filas = reconstruir(desde=desde, tamano_lote=options['lote'])
+        alcance = f"desde {desde}" if desde else "todo el historial"
+        self.stdout.write(self.style.SUCCESS(f'{filas} fila(s) de resumen reconstruidas ({alcance}).'))
@@ -0,0 +1,50 @@
+# Generated by Django 4.2.7 on 2026-10-16 20:45
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('locales', '0001_initial'),
+        ('tickets', '0005_notificacion_saliente'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumenDiario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dia', models.DateField(verbose_name='Día de creación')),
+                ('creados', models.IntegerField(default=0, verbose_name='Tickets creados')),
+                ('resueltos', models.IntegerField(default=0, help_text='Tickets RESUELTO o CERRADO con fecha de resolución o cierre', verbose_name='Resueltos/cerrados')),
+                ('en_tiempo', models.IntegerField(default=0, verbose_name='Resueltos dentro del SLA')),
+                ('segundos_solucion', models.BigIntegerField(default=0, verbose_name='Suma de segundos hasta solución')),
+                ('con_respuesta', models.IntegerField(default=0, verbose_name='Resueltos con fecha de asignación')),
+                ('segundos_respuesta', models.BigIntegerField(default=0, verbose_name='Suma de segundos hasta asignación')),
+                ('cerrados', models.IntegerField(default=0, verbose_name='Tickets en estado CERRADO')),
+                ('categoria', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resumenes_diarios', to='tickets.categoriaaveria', verbose_name='Categoría')),
+                ('local', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resumenes_diarios', to='locales.local', verbose_name='Local')),
+                ('tecnico', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='resumenes_diarios', to=settings.AUTH_USER_MODEL, verbose_name='Técnico')),
+            ],
+            options={
+                'verbose_name': 'Resumen diario',
+                'verbose_name_plural': 'Resúmenes diarios',
+                'ordering': ['-dia'],
+                'indexes': [models.Index(fields=['dia', 'local'], name='resumen_dia_local_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='resumendiario',
+            constraint=models.UniqueConstraint(fields=('dia', 'local', 'categoria', 'tecnico'), name='resumen_diario_clave_unica'),
+        ),
+        migrations.AddConstraint(
+            model_name='resumendiario',
+            constraint=models.UniqueConstraint(condition=models.Q(('tecnico__isnull', True)), fields=('dia', 'local', 'categoria'), name='resumen_diario_sin_tecnico_unica'),
+        ),
+    ]
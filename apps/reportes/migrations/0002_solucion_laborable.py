@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-16 21:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reportes', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='resumendiario',
+            name='segundos_solucion_laborables',
+            field=models.BigIntegerField(default=0, help_text='Solo horario laboral sin feriados (ver apps.tickets.calendario)', verbose_name='Suma de segundos laborables hasta solución'),
+        ),
+    ]
@@ -0,0 +1,110 @@
+"""
+Modelos de apoyo para reportes
+"""
+from django.db import models
+
+from apps.usuarios.models import Usuario
+from apps.locales.models import Local
+from apps.tickets.models import CategoriaAveria
+
+
+class ResumenDiario(models.Model):
+    """
+    Acumulados por día de creación del ticket y (local, categoría, técnico).
+
+    Se mantiene incrementalmente al guardar/borrar tickets
+    (ver `apps.reportes.resumenes`) y se puede reconstruir con
+    `manage.py reconstruir_resumenes`. El dashboard de reportes lee de
+    aquí en vez de recorrer la tabla de tickets.
+    """
+    dia = models.DateField(
+        verbose_name='Día de creación'
+    )
+
+    local = models.ForeignKey(
+        Local,
+        on_delete=models.CASCADE,
+        related_name='resumenes_diarios',
+        verbose_name='Local'
+    )
+
+    categoria = models.ForeignKey(
+        CategoriaAveria,
+        on_delete=models.CASCADE,
+        related_name='resumenes_diarios',
+        verbose_name='Categoría'
+    )
+
+    tecnico = models.ForeignKey(
+        Usuario,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='resumenes_diarios',
+        verbose_name='Técnico'
+    )
+
+    creados = models.IntegerField(
+        default=0,
+        verbose_name='Tickets creados'
+    )
+
+    resueltos = models.IntegerField(
+        default=0,
+        verbose_name='Resueltos/cerrados',
+        help_text='Tickets RESUELTO o CERRADO con fecha de resolución o cierre'
+    )
+
+    en_tiempo = models.IntegerField(
+        default=0,
+        verbose_name='Resueltos dentro del SLA'
+    )
+
+    segundos_solucion = models.BigIntegerField(
+        default=0,
+        verbose_name='Suma de segundos hasta solución'
+    )
+
+    segundos_solucion_laborables = models.BigIntegerField(
+        default=0,
+        verbose_name='Suma de segundos laborables hasta solución',
+        help_text='Solo horario laboral sin feriados (ver apps.tickets.calendario)'
+    )
+
+    con_respuesta = models.IntegerField(
+        default=0,
+        verbose_name='Resueltos con fecha de asignación'
+    )
+
+    segundos_respuesta = models.BigIntegerField(
+        default=0,
+        verbose_name='Suma de segundos hasta asignación'
+    )
+
+    cerrados = models.IntegerField(
+        default=0,
+        verbose_name='Tickets en estado CERRADO'
+    )
+
+    class Meta:
+        verbose_name = 'Resumen diario'
+        verbose_name_plural = 'Resúmenes diarios'
+        ordering = ['-dia']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['dia', 'local', 'categoria', 'tecnico'],
+                name='resumen_diario_clave_unica',
+            ),
+            # NULL no choca en un UNIQUE: la fila "sin técnico" va aparte
+            models.UniqueConstraint(
+                fields=['dia', 'local', 'categoria'],
+                condition=models.Q(tecnico__isnull=True),
+                name='resumen_diario_sin_tecnico_unica',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['dia', 'local'], name='resumen_dia_local_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.dia} - {self.local_id}/{self.categoria_id}/{self.tecnico_id}"
@@ -0,0 +1,176 @@
+"""
+Mantenimiento incremental de `ResumenDiario`.
+
+Cada ticket "aporta" a una sola fila de resumen: la de su día de creación
+y su (local, categoría, técnico). Al guardar un ticket se resta el aporte
+que tiene en la BD al guardar y se suma el nuevo; al borrarlo se resta (señales
+compartidas con los contadores, ver `apps.tickets.aportes`).
+
+Las actualizaciones masivas con `QuerySet.update()` no disparan señales:
+si tocan estos campos hay que llamar a `aplicar_cambio` a mano o correr
+`manage.py reconstruir_resumenes`.
+"""
+from types import SimpleNamespace
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from apps.tickets import aportes
+from apps.tickets.calendario import provincia_de_local, segundos_laborables
+from apps.tickets.models import Ticket, TicketArchivado
+from .models import ResumenDiario
+
+
+# Campos del ticket de los que depende su aporte
+CAMPOS_APORTE = [
+    'fecha_creacion', 'local_id', 'categoria_id', 'asignado_a_id', 'estado',
+    'fecha_asignacion', 'fecha_resolucion', 'fecha_cierre', 'fecha_limite_sla',
+]
+
+METRICAS = [
+    'creados', 'resueltos', 'en_tiempo', 'segundos_solucion',
+    'segundos_solucion_laborables', 'con_respuesta', 'segundos_respuesta', 'cerrados',
+]
+
+
+def aporte(ticket):
+    """
+    Devuelve (clave, metricas) con lo que este ticket suma a los resúmenes,
+    o None si todavía no tiene fecha de creación.
+    Mismas reglas que usaba reportes_dashboard sobre la tabla de tickets.
+    """
+    if not ticket.fecha_creacion:
+        return None
+
+    clave = (
+        timezone.localdate(ticket.fecha_creacion),
+        ticket.local_id,
+        ticket.categoria_id,
+        ticket.asignado_a_id,
+    )
+    metricas = dict.fromkeys(METRICAS, 0)
+    metricas['creados'] = 1
+
+    fin = ticket.fecha_resolucion or ticket.fecha_cierre
+    if ticket.estado in ('RESUELTO', 'CERRADO') and fin:
+        metricas['resueltos'] = 1
+        metricas['en_tiempo'] = int(fin <= ticket.fecha_limite_sla)
+        metricas['segundos_solucion'] = int((fin - ticket.fecha_creacion).total_seconds())
+        metricas['segundos_solucion_laborables'] = int(segundos_laborables(
+            ticket.fecha_creacion, fin, provincia_de_local(ticket.local_id),
+        ))
+        if ticket.fecha_asignacion:
+            metricas['con_respuesta'] = 1
+            metricas['segundos_respuesta'] = int(
+                (ticket.fecha_asignacion - ticket.fecha_creacion).total_seconds()
+            )
+
+    if ticket.estado == 'CERRADO':
+        metricas['cerrados'] = 1
+
+    return clave, metricas
+
+
+def _sumar(clave, metricas, signo):
+    dia, local_id, categoria_id, tecnico_id = clave
+    filtro = {
+        'dia': dia,
+        'local_id': local_id,
+        'categoria_id': categoria_id,
+        'tecnico_id': tecnico_id,
+    }
+    cambios = {
+        campo: F(campo) + signo * valor
+        for campo, valor in metricas.items() if valor
+    }
+    if not cambios:
+        return
+
+    for _intento in range(2):
+        if ResumenDiario.objects.filter(**filtro).update(**cambios):
+            return
+        try:
+            with transaction.atomic():
+                ResumenDiario.objects.create(**filtro, **{
+                    campo: signo * valor for campo, valor in metricas.items()
+                })
+            return
+        except IntegrityError:
+            # Otro proceso creó la fila primero: volvemos a intentar el UPDATE
+            continue
+
+
+def aplicar_cambio(antes, despues):
+    """
+    Mueve el aporte de un ticket de `antes` a `despues`
+    (tuplas devueltas por `aporte`, o None).
+    """
+    if antes == despues:
+        return
+    if antes and despues and antes[0] == despues[0]:
+        # Misma fila: un solo UPDATE con la diferencia
+        delta = {c: despues[1][c] - antes[1][c] for c in METRICAS}
+        _sumar(antes[0], delta, 1)
+        return
+    if antes:
+        _sumar(*antes, -1)
+    if despues:
+        _sumar(*despues, 1)
+
+
+# ----------------------------------------------------------------------
+# Señales
+# ----------------------------------------------------------------------
+def conectar_senales():
+    # Las señales de Ticket (pre/post save y delete) son las compartidas
+    # de apps.tickets.aportes
+    aportes.registrar('resumenes', CAMPOS_APORTE, aporte, aplicar_cambio)
+
+
+# ----------------------------------------------------------------------
+# Reconstrucción (backfill)
+# ----------------------------------------------------------------------
+def reconstruir(desde=None, tamano_lote=2000):
+    """
+    Recalcula los resúmenes a partir de la tabla de tickets.
+    Con `desde` (date) solo reconstruye los días >= desde.
+    Devuelve la cantidad de filas de resumen creadas.
+    """
+    # Los archivados (apps.tickets.archivo) también cuentan
+    tablas = [Ticket.objects.all(), TicketArchivado.objects.all()]
+    resumenes = ResumenDiario.objects.all()
+    if desde:
+        tablas = [qs.annotate(dia=TruncDate('fecha_creacion')).filter(dia__gte=desde) for qs in tablas]
+        resumenes = resumenes.filter(dia__gte=desde)
+
+    filas = (
+        fila
+        for qs in tablas
+        for fila in qs.values(*CAMPOS_APORTE).iterator(chunk_size=tamano_lote)
+    )
+    acumulado = {}
+    for fila in filas:
+        resultado = aporte(SimpleNamespace(**fila))
+        if not resultado:
+            continue
+        clave, metricas = resultado
+        destino = acumulado.setdefault(clave, dict.fromkeys(METRICAS, 0))
+        for campo, valor in metricas.items():
+            destino[campo] += valor
+
+    filas = [
+        ResumenDiario(
+            dia=dia, local_id=local_id, categoria_id=categoria_id, tecnico_id=tecnico_id,
+            **metricas,
+        )
+        for (dia, local_id, categoria_id, tecnico_id), metricas in acumulado.items()
+    ]
+
+    with transaction.atomic():
+        resumenes.delete()
+        ResumenDiario.objects.bulk_create(filas, batch_size=tamano_lote)
+
+    return len(filas)
+
@@ -0,0 +1,154 @@
+import csv
+import io
+from datetime import datetime, timedelta
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from openpyxl import load_workbook
+
+from apps.locales.models import Local
+from apps.tickets.archivo import archivar_lote
+from apps.tickets.models import CategoriaAveria, Ticket, TicketArchivado
+from apps.usuarios.models import Usuario
+
+
+class ReportesDashboardTests(TestCase):
+
+    # Usuario de la sesión + abiertos, SLA, reincidencias, técnicos,
+    # nombres de categorías y tiempo por estado (TransicionTicket)
+    CONSULTAS_DASHBOARD = 7
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = Usuario.objects.create_user('admin', password='x', rol='ADMIN')
+        tecnico = Usuario.objects.create_user('tecnico', password='x', rol='TECNICO')
+        categorias = [
+            CategoriaAveria.objects.create(nombre='PC'),
+            CategoriaAveria.objects.create(nombre='Internet'),
+        ]
+        locales = [
+            Local.objects.create(
+                codigo=f'L{i}', nombre=f'Banca {i}', direccion='-',
+                provincia='Santo Domingo', municipio='Santo Domingo Este',
+            )
+            for i in range(3)
+        ]
+        for i in range(6):
+            ticket = Ticket.objects.create(
+                local=locales[i % 3],
+                categoria=categorias[i % 2],
+                titulo=f'Ticket {i}',
+                descripcion='No enciende',
+                creado_por=cls.admin,
+                asignado_a=tecnico if i % 2 else None,
+            )
+            if i % 3 == 0:
+                ticket.estado = 'CERRADO'
+                ticket.save(actor=tecnico)
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def test_consultas_fijas(self):
+        with self.assertNumQueries(self.CONSULTAS_DASHBOARD):
+            respuesta = self.client.get(reverse('reportes_dashboard'))
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.context['abiertos_total'], 4)
+        self.assertEqual(respuesta.context['total_cerrados'], 2)
+
+    def test_consultas_no_crecen_con_los_tickets(self):
+        ticket = Ticket.objects.first()
+        for i in range(10):
+            Ticket.objects.create(
+                local_id=ticket.local_id,
+                categoria_id=ticket.categoria_id,
+                titulo=f'Extra {i}',
+                descripcion='Sin internet',
+                creado_por=self.admin,
+            )
+        with self.assertNumQueries(self.CONSULTAS_DASHBOARD):
+            self.client.get(reverse('reportes_dashboard'))
+
+    def test_solo_admin(self):
+        digitador = Usuario.objects.create_user('digitador', password='x', rol='DIGITADOR')
+        self.client.force_login(digitador)
+        respuesta = self.client.get(reverse('reportes_dashboard'))
+        self.assertEqual(respuesta.status_code, 403)
+
+
+class ExportarTicketsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = Usuario.objects.create_user('admin', password='x', rol='ADMIN')
+        local = Local.objects.create(
+            codigo='L1', nombre='Banca 1', direccion='-',
+            provincia='Santo Domingo', municipio='Santo Domingo Este',
+        )
+        categoria = CategoriaAveria.objects.create(nombre='PC')
+        cls.tickets = []
+        # Uno por día, del 1 al 4 de marzo; el 1 y el 3 van al archivo
+        for dia in range(1, 5):
+            ticket = Ticket.objects.create(
+                local=local, categoria=categoria, titulo=f'Ticket {dia}',
+                descripcion='-', creado_por=cls.admin,
+                estado='CERRADO' if dia % 2 else 'PENDIENTE',
+            )
+            Ticket.objects.filter(pk=ticket.pk).update(
+                fecha_creacion=timezone.make_aware(datetime(2025, 3, dia, 10)),
+                fecha_actualizacion=timezone.now() - timedelta(days=365),
+            )
+            cls.tickets.append(ticket.numero_ticket)
+        archivar_lote(Ticket.objects.values_list('id', flat=True), dias=30)
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def exportar(self, **params):
+        return self.client.get(reverse('reportes_exportar'), params)
+
+    def test_csv_une_vivos_y_archivados(self):
+        self.assertEqual(TicketArchivado.objects.count(), 2)
+        respuesta = self.exportar(formato='csv', desde='2025-03-01', hasta='2025-03-03')
+        self.assertEqual(respuesta.status_code, 200)
+        texto = b''.join(respuesta.streaming_content).decode('utf-8-sig')
+        filas = list(csv.reader(io.StringIO(texto)))
+        self.assertEqual(filas[0][0], 'Número')
+        self.assertEqual([fila[0] for fila in filas[1:]], self.tickets[:3])
+        self.assertEqual(filas[1][1], '2025-03-01 10:00')
+
+    def test_xlsx_une_vivos_y_archivados(self):
+        respuesta = self.exportar(formato='xlsx', desde='2025-03-02', hasta='2025-03-04')
+        self.assertEqual(respuesta.status_code, 200)
+        libro = load_workbook(io.BytesIO(b''.join(respuesta.streaming_content)), read_only=True)
+        filas = list(libro['Tickets'].values)
+        self.assertEqual(filas[0][0], 'Número')
+        self.assertEqual([fila[0] for fila in filas[1:]], self.tickets[1:])
+        self.assertEqual(filas[1][1], datetime(2025, 3, 2, 10))
+
+    def test_fecha_mal_escrita(self):
+        for params in [{'desde': '2025-13-01'}, {'hasta': 'ayer'}, {'desde': '01/03/2025'}]:
+            for formato in ['csv', 'xlsx']:
+                respuesta = self.exportar(formato=formato, **params)
+                self.assertEqual(respuesta.status_code, 400, (formato, params))
+
+    def test_fechas_vacias_exportan_todo_en_csv(self):
+        respuesta = self.exportar(formato='csv', desde='', hasta='')
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(len(list(respuesta.streaming_content)), 1 + 4)
+
+    @override_settings(REPORTES_XLSX_MAX_DIAS=3)
+    def test_xlsx_con_rango_acotado(self):
+        self.assertEqual(self.exportar(formato='xlsx', hasta='2025-03-04').status_code, 400)
+        self.assertEqual(
+            self.exportar(formato='xlsx', desde='2025-03-01', hasta='2025-03-04').status_code, 400,
+        )
+        self.assertEqual(
+            self.exportar(formato='xlsx', desde='2025-03-02', hasta='2025-03-04').status_code, 200,
+        )
+
+    def test_solo_admin(self):
+        digitador = Usuario.objects.create_user('digitador', password='x', rol='DIGITADOR')
+        self.client.force_login(digitador)
+        self.assertEqual(self.exportar(formato='csv').status_code, 403)
@@ -4,4 +4,5 @@ from . import views
 
 urlpatterns = [
     path('', views.reportes_dashboard, name='reportes_dashboard'),
+    path('exportar/', views.exportar_tickets, name='reportes_exportar'),
 ]
@@ -3,17 +3,18 @@ from __future__ import annotations
 
 from datetime import timedelta
 
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import render
-from django.http import HttpResponseForbidden
+from django.http import FileResponse, HttpResponseBadRequest, HttpResponseForbidden, StreamingHttpResponse
+from django.utils.dateparse import parse_date
 from django.utils import timezone
-from django.db.models import (
-    Avg, Count, Sum, Q, F,
-    DurationField, IntegerField, ExpressionWrapper, Case, When,
-)
-from django.db.models.functions import Coalesce
+from django.db.models import Count, Sum, Q, F
 
-from apps.tickets.models import Ticket
+from apps.tickets.models import CategoriaAveria, Ticket, ESTADOS_ABIERTOS
+from apps.tickets.transiciones import tiempo_por_categoria
+from .models import ResumenDiario
+from .exportar import filas_tickets, lineas_csv, xlsx_temporal
 
 
 def _human_timedelta(td):
@@ -39,6 +40,13 @@ def _human_timedelta(td):
     return " ".join(parts)
 
 
+def _promedio(segundos, cantidad):
+    """Promedio en timedelta a partir de una suma de segundos."""
+    if not cantidad:
+        return None
+    return timedelta(seconds=(segundos or 0) / cantidad)
+
+
 @login_required
 def reportes_dashboard(request):
     """
@@ -53,64 +61,20 @@ def reportes_dashboard(request):
     # “Últimos 3 meses” -> usamos 90 días (simple y estable)
     desde = ahora - timedelta(days=90)
 
-    estados_abiertos = ["PENDIENTE", "EN_PROCESO", "RESUELTO"]
-    estados_cerrados = ["RESUELTO", "CERRADO"]
+    # Cada conjunto base se agrega UNA sola vez, agrupado por local, y los
+    # totales generales se derivan sumando esas filas en Python.
+    # Total del dashboard: 5 consultas (abiertos, SLA, reincidencias,
+    # técnicos, tiempo por estado) + la lista de categorías (ver tests.py).
 
     # =========================
     # 1) Tickets abiertos (hoy)
     # =========================
-    abiertos_qs = (
-        Ticket.objects
-        .filter(estado__in=estados_abiertos)
-        .select_related("local", "categoria", "asignado_a", "creado_por")
-    )
-
-    abiertos_total = abiertos_qs.count()
-    abiertos_vencidos = abiertos_qs.filter(fecha_limite_sla__lt=ahora).count()
-
-    # =========================
-    # 2) SLA por banca (3 meses)
-    # =========================
-    cerrados_qs = (
-        Ticket.objects
-        .filter(fecha_creacion__gte=desde, estado__in=estados_cerrados)
-        .exclude(fecha_resolucion__isnull=True, fecha_cierre__isnull=True)
-        .select_related("local", "categoria")
-    )
-
-    duracion_solucion = ExpressionWrapper(
-        (Coalesce("fecha_resolucion", "fecha_cierre") - F("fecha_creacion")),
-        output_field=DurationField(),
-    )
-    duracion_respuesta = ExpressionWrapper(
-        (F("fecha_asignacion") - F("fecha_creacion")),
-        output_field=DurationField(),
-    )
-
-    cumple_sla = Case(
-        When(fecha_resolucion__isnull=False, fecha_resolucion__lte=F("fecha_limite_sla"), then=1),
-        When(fecha_resolucion__isnull=True, fecha_cierre__isnull=False, fecha_cierre__lte=F("fecha_limite_sla"), then=1),
-        default=0,
-        output_field=IntegerField(),
-    )
-
-    sla_por_local_raw = (
-        cerrados_qs
-        .values("local_id", "local__codigo", "local__nombre")
-        .annotate(
-            total=Count("id"),
-            on_time=Sum(cumple_sla),
-            avg_solucion=Avg(duracion_solucion),
-            avg_respuesta=Avg(duracion_respuesta),
-        )
-        .order_by("-total", "local__codigo")
-    )
-
-    # Abiertos agrupados por local para “estado actual”
     abiertos_por_local = {
         row["local_id"]: row
         for row in (
-            abiertos_qs
+            Ticket.objects
+            .filter(estado__in=ESTADOS_ABIERTOS)
+            .order_by()
             .values("local_id")
             .annotate(
                 abiertos=Count("id"),
@@ -118,12 +82,37 @@ def reportes_dashboard(request):
             )
         )
     }
+    abiertos_total = sum(row["abiertos"] for row in abiertos_por_local.values())
+    abiertos_vencidos = sum(row["vencidos"] for row in abiertos_por_local.values())
+
+    # =========================
+    # 2) SLA por banca (3 meses)
+    # =========================
+    # Se lee de ResumenDiario (acumulados por día de creación) en vez de
+    # recorrer los tickets: el costo ya no depende del volumen de tickets.
+    resumenes = ResumenDiario.objects.filter(dia__gte=timezone.localdate(desde))
+
+    sla_por_local_raw = list(
+        resumenes
+        .values("local_id", "local__codigo", "local__nombre")
+        .annotate(
+            total=Sum("resueltos"),
+            on_time=Sum("en_tiempo"),
+            seg_solucion=Sum("segundos_solucion"),
+            seg_solucion_lab=Sum("segundos_solucion_laborables"),
+            con_respuesta=Sum("con_respuesta"),
+            seg_respuesta=Sum("segundos_respuesta"),
+        )
+        .order_by("-total", "local__codigo")
+    )
 
     sla_por_local = []
     for row in sla_por_local_raw:
         total = row["total"] or 0
+        if not total:
+            continue
         on_time = row["on_time"] or 0
-        pct = round((on_time / total) * 100, 1) if total else 0.0
+        pct = round((on_time / total) * 100, 1)
 
         ab = abiertos_por_local.get(row["local_id"], {})
         sla_por_local.append({
@@ -132,27 +121,31 @@ def reportes_dashboard(request):
             "total": total,
             "on_time": on_time,
             "pct_on_time": pct,
-            "avg_solucion": _human_timedelta(row["avg_solucion"]),
-            "avg_respuesta": _human_timedelta(row["avg_respuesta"]),
+            "avg_solucion": _human_timedelta(_promedio(row["seg_solucion"], total)),
+            "avg_solucion_laboral": _human_timedelta(_promedio(row["seg_solucion_lab"], total)),
+            "avg_respuesta": _human_timedelta(_promedio(row["seg_respuesta"], row["con_respuesta"])),
             "abiertos": ab.get("abiertos", 0),
             "abiertos_vencidos": ab.get("vencidos", 0),
         })
 
-    # Totales generales del período
-    total_cerrados = cerrados_qs.count()
-    total_on_time = cerrados_qs.aggregate(s=Sum(cumple_sla)).get("s") or 0
+    # Totales generales del período (derivados de las filas por local)
+    def _suma(campo):
+        return sum(row[campo] or 0 for row in sla_por_local_raw)
+
+    total_cerrados = _suma("total")
+    total_on_time = _suma("on_time")
     pct_on_time = round((total_on_time / total_cerrados) * 100, 1) if total_cerrados else 0.0
-    avg_solucion_global = cerrados_qs.aggregate(a=Avg(duracion_solucion)).get("a")
-    avg_respuesta_global = cerrados_qs.aggregate(a=Avg(duracion_respuesta)).get("a")
+    avg_solucion_global = _promedio(_suma("seg_solucion"), total_cerrados)
+    avg_solucion_laboral_global = _promedio(_suma("seg_solucion_lab"), total_cerrados)
+    avg_respuesta_global = _promedio(_suma("seg_respuesta"), _suma("con_respuesta"))
 
     # =========================
     # 3) Reincidencias (3 meses)
     # =========================
     reincidencias = (
-        Ticket.objects
-        .filter(fecha_creacion__gte=desde)
+        resumenes
         .values("local__codigo", "local__nombre", "categoria__nombre")
-        .annotate(total=Count("id"))
+        .annotate(total=Sum("creados"))
         .filter(total__gte=2)
         .order_by("-total", "local__codigo", "categoria__nombre")[:50]
     )
@@ -161,13 +154,42 @@ def reportes_dashboard(request):
     # 4) Top técnicos cerrando
     # =========================
     tecnicos_top = (
-        Ticket.objects
-        .filter(estado__in=["CERRADO"], asignado_a__rol="TECNICO")
-        .values("asignado_a__id", "asignado_a__first_name", "asignado_a__last_name", "asignado_a__username")
-        .annotate(total_cerrados=Count("id"))
+        ResumenDiario.objects
+        .filter(tecnico__rol="TECNICO")
+        .values(
+            asignado_a__id=F("tecnico__id"),
+            asignado_a__first_name=F("tecnico__first_name"),
+            asignado_a__last_name=F("tecnico__last_name"),
+            asignado_a__username=F("tecnico__username"),
+        )
+        .annotate(total_cerrados=Sum("cerrados"))
+        .filter(total_cerrados__gt=0)
         .order_by("-total_cerrados")[:10]
     )
 
+    # =========================
+    # 5) Tiempo en cada estado por categoría (3 meses)
+    # =========================
+    # Sale del historial de transiciones (filas chicas), no de los tickets
+    nombres = dict(CategoriaAveria.objects.values_list("id", "nombre"))
+    tiempos = {}
+    for fila in tiempo_por_categoria(desde=desde, ahora=ahora):
+        tiempos.setdefault(fila["categoria_id"], {})[fila["estado"]] = _human_timedelta(
+            _promedio(fila["segundos"], fila["tickets"])
+        )
+    tiempo_por_estado = sorted(
+        (
+            {
+                "categoria": nombres.get(categoria_id, "-"),
+                "pendiente": estados.get("PENDIENTE", "-"),
+                "en_proceso": estados.get("EN_PROCESO", "-"),
+                "resuelto": estados.get("RESUELTO", "-"),
+            }
+            for categoria_id, estados in tiempos.items()
+        ),
+        key=lambda fila: fila["categoria"],
+    )
+
     contexto = {
         "desde": desde,
         "hoy": ahora,
@@ -178,10 +200,68 @@ def reportes_dashboard(request):
         "total_cerrados": total_cerrados,
         "pct_on_time": pct_on_time,
         "avg_solucion_global": _human_timedelta(avg_solucion_global),
+        "avg_solucion_laboral_global": _human_timedelta(avg_solucion_laboral_global),
         "avg_respuesta_global": _human_timedelta(avg_respuesta_global),
 
         "sla_por_local": sla_por_local,
         "reincidencias": reincidencias,
         "tecnicos_top": tecnicos_top,
+        "tiempo_por_estado": tiempo_por_estado,
     }
     return render(request, "reportes/dashboard.html", contexto)
+
+
+def _fecha_param(request, nombre):
+    """Fecha AAAA-MM-DD del GET; None si no vino, ValueError si no se entiende."""
+    valor = request.GET.get(nombre) or ""
+    if not valor:
+        return None
+    fecha = parse_date(valor)
+    if fecha is None:
+        raise ValueError(valor)
+    return fecha
+
+
+@login_required
+def exportar_tickets(request):
+    """
+    Exporta tickets (solo ADMIN) a CSV o XLSX para un rango de fechas.
+
+    GET ?formato=csv|xlsx&desde=AAAA-MM-DD&hasta=AAAA-MM-DD
+    Las filas se leen por lotes. El CSV se envía a medida que se genera;
+    el XLSX se arma entero antes de enviarse, así que exige `desde` y un
+    rango de hasta REPORTES_XLSX_MAX_DIAS días (sin `hasta`, hasta hoy).
+    """
+    if getattr(request.user, "rol", None) != "ADMIN":
+        return HttpResponseForbidden("No tienes permiso para exportar tickets.")
+
+    formato = request.GET.get("formato", "csv")
+    try:
+        desde = _fecha_param(request, "desde")
+        hasta = _fecha_param(request, "hasta")
+    except ValueError:
+        return HttpResponseBadRequest("Fecha inválida (usa AAAA-MM-DD).")
+
+    filas = filas_tickets(desde, hasta)
+    nombre = f"tickets_{desde or 'inicio'}_{hasta or timezone.localdate()}"
+
+    if formato == "xlsx":
+        max_dias = getattr(settings, "REPORTES_XLSX_MAX_DIAS", 366)
+        dias = ((hasta or timezone.localdate()) - desde).days + 1 if desde else None
+        if dias is None or dias > max_dias:
+            return HttpResponseBadRequest(
+                f"Para Excel indica un rango de hasta {max_dias} días (para más, usa CSV)."
+            )
+        return FileResponse(
+            xlsx_temporal(filas),
+            as_attachment=True,
+            filename=f"{nombre}.xlsx",
+            content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        )
+
+    if formato != "csv":
+        return HttpResponseBadRequest("Formato no soportado (usa csv o xlsx).")
+
+    respuesta = StreamingHttpResponse(lineas_csv(filas), content_type="text/csv; charset=utf-8")
+    respuesta["Content-Disposition"] = f'attachment; filename="{nombre}.csv"'
+    return respuesta
@@ -20,3 +20,28 @@ if hasattr(models, "ComentarioTicket"):
 
 if hasattr(models, "CategoriaAveria"):
     admin.site.register(models.CategoriaAveria)
+
+if hasattr(models, "NotificacionSaliente"):
+    admin.site.register(models.NotificacionSaliente)
+
+if hasattr(models, "Feriado"):
+    admin.site.register(models.Feriado)
+
+if hasattr(models, "RecalculoSLA"):
+    admin.site.register(models.RecalculoSLA)
+
+if hasattr(models, "TicketArchivado"):
+    admin.site.register(models.TicketArchivado)
+
+if hasattr(models, "TransicionTicket"):
+    @admin.register(models.TransicionTicket)
+    class TransicionTicketAdmin(admin.ModelAdmin):
+        # Historial de solo alta: se puede consultar pero no editar
+        def has_add_permission(self, request):
+            return False
+
+        def has_change_permission(self, request, obj=None):
+            return False
+
+        def has_delete_permission(self, request, obj=None):
+            return False
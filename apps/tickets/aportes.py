@@ -0,0 +1,125 @@
+"""
+Datos derivados que se mantienen por "aportes" de cada ticket
+(`apps.reportes.resumenes`, `apps.tickets.contadores`).
+
+Cada uno se registra con `registrar`: qué campos del ticket lee, su
+`aporte(ticket)` y su `aplicar_cambio(antes, despues)`. Un solo juego de
+señales sirve a todos:
+
+- pre_save / pre_delete: el ticket "de antes" es la fila como está en la
+  BD al guardar, leída con `select_for_update()` dentro de la transacción
+  de `Ticket.save()` / `delete()` (un SELECT para todos los registrados).
+  No sale de `Ticket._valores_cargados`: dos ediciones a la vez de la misma
+  fila restarían dos veces el mismo aporte. Si el guardado no toca ninguno
+  de esos campos (`Ticket.campos_modificados`) no se lee nada.
+- post_save / post_delete: se aplica la diferencia con el aporte nuevo,
+  que es lo leído más las columnas que escribió este guardado.
+
+Cargar un ticket no cuesta nada: los aportes se calculan al guardar.
+
+Las actualizaciones masivas con `QuerySet.update()` no disparan señales:
+quien las haga tiene que llamar a `aplicar` (ver `tomar_ticket`) o correr
+los comandos de reconstrucción de cada uno.
+"""
+from collections import namedtuple
+from types import SimpleNamespace
+
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+
+from .models import Ticket
+
+
+Registro = namedtuple('Registro', 'campos aporte aplicar_cambio vacio')
+
+_registrados = {}
+
+
+def registrar(nombre, campos, aporte, aplicar_cambio, vacio=None):
+    """
+    Agrega (o reemplaza) un dato derivado. `vacio` es lo que aporta un
+    ticket que no existe (None, {}...), para altas y borrados.
+    """
+    _registrados[nombre] = Registro(tuple(campos), aporte, aplicar_cambio, vacio)
+
+
+def campos():
+    """Campos (attname) que leen todos los registrados."""
+    return {campo for registro in _registrados.values() for campo in registro.campos}
+
+
+def aplicar(antes, despues):
+    """
+    Mueve los aportes de `antes` a `despues`: tickets u objetos con los
+    `campos()` (p. ej. un SimpleNamespace de `.values()`); None = no existe.
+    """
+    for registro in _registrados.values():
+        registro.aplicar_cambio(
+            registro.aporte(antes) if antes is not None else registro.vacio,
+            registro.aporte(despues) if despues is not None else registro.vacio,
+        )
+
+
+def _valores_en_bd(ticket):
+    # La fila bloqueada hasta el fin de la transacción: otro guardado del
+    # mismo ticket espera y lee lo que deje este (en SQLite no hace falta:
+    # la transacción ya tiene el lock de escritura de toda la base)
+    filas = Ticket.objects.select_for_update().filter(pk=ticket.pk).values(*campos())[:1]
+    fila = next(iter(filas), None)
+    if fila is not None:
+        # Los diferidos (.only()) quedan cargados con lo leído, para el
+        # resto del save() (historial, índice de carga)
+        diferidos = {c: fila[c] for c in fila if c not in ticket.__dict__}
+        ticket.__dict__.update(diferidos)
+        ticket._guardar_valores_cargados(diferidos)
+    return fila
+
+
+def _attnames(nombres):
+    return {Ticket._meta.get_field(nombre).attname for nombre in nombres}
+
+
+# ----------------------------------------------------------------------
+# Señales
+# ----------------------------------------------------------------------
+def _antes_de_guardar(sender, instance, raw=False, update_fields=None, **kwargs):
+    instance._aportes_antes = None
+    if raw or instance._state.adding or not instance.pk or not _registrados:
+        return
+    if update_fields is not None and not _attnames(update_fields) & campos():
+        return
+    instance._aportes_antes = _valores_en_bd(instance)
+
+
+def _ticket_guardado(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    antes = getattr(instance, '_aportes_antes', None)
+    instance._aportes_antes = None
+    if created:
+        aplicar(None, instance)
+    elif antes is not None:
+        # Solo lo que escribió este guardado: el resto de la instancia puede
+        # ser viejo y en la BD queda lo que se leyó
+        escritos = _attnames(update_fields) if update_fields is not None else set(antes)
+        despues = {
+            **antes,
+            **{c: instance.__dict__[c] for c in antes if c in escritos and c in instance.__dict__},
+        }
+        aplicar(SimpleNamespace(**antes), SimpleNamespace(**despues))
+
+
+def _antes_de_borrar(sender, instance, **kwargs):
+    instance._aportes_antes = _valores_en_bd(instance) if _registrados else None
+
+
+def _ticket_borrado(sender, instance, **kwargs):
+    antes = getattr(instance, '_aportes_antes', None)
+    if antes is not None:
+        aplicar(SimpleNamespace(**antes), None)
+
+
+def conectar_senales():
+    pre_save.connect(_antes_de_guardar, sender=Ticket, dispatch_uid='aportes_pre_save')
+    post_save.connect(_ticket_guardado, sender=Ticket, dispatch_uid='aportes_post_save')
+    pre_delete.connect(_antes_de_borrar, sender=Ticket, dispatch_uid='aportes_pre_delete')
+    post_delete.connect(_ticket_borrado, sender=Ticket, dispatch_uid='aportes_post_delete')
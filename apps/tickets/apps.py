@@ -5,3 +5,33 @@ class TicketsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.tickets'
     verbose_name = 'Tickets'
+
+    def ready(self):
+        # Mantiene al día la tabla de búsqueda de texto completo
+        from . import busqueda
+        busqueda.conectar_senales()
+
+        # Invalida las especialidades cacheadas al cambiar el M2M
+        from . import visibilidad
+        visibilidad.conectar_senales()
+
+        # Descarta los calendarios laborales al cambiar feriados / locales
+        from . import calendario
+        calendario.conectar_senales()
+
+        # Recalcula los límites abiertos al cambiar el SLA de una categoría
+        from . import recalculo_sla
+        recalculo_sla.conectar_senales()
+
+        # Índice de carga por técnico para la asignación automática
+        from . import asignacion
+        asignacion.conectar_senales()
+
+        # Un solo juego de señales para los datos que dependen de cada
+        # ticket (contadores aquí, ResumenDiario en apps.reportes)
+        from . import aportes
+        aportes.conectar_senales()
+
+        # Contadores de tickets abiertos / del mes en Local y Usuario
+        from . import contadores
+        contadores.conectar_senales()
@@ -0,0 +1,137 @@
+"""
+Archivo de tickets viejos (partición "fría").
+
+Casi todo lo que se consulta a diario son tickets abiertos, pero la tabla
+de tickets crece para siempre. `archivar` mueve los CERRADO / CANCELADO
+sin cambios desde hace TICKETS_ARCHIVAR_DIAS, con sus comentarios, a
+`TicketArchivado` / `ComentarioArchivado` (mismos ids), por lotes y en
+una transacción corta por lote.
+
+Lo que no cambia al archivar:
+- `ResumenDiario` y los contadores: el borrado se hace sin señales, así
+  los reportes siguen contando esos tickets.
+- `TransicionTicket`: el historial queda con el mismo `ticket_id`.
+
+Las notificaciones del ticket (ya enviadas o fallidas) se descartan y el
+ticket sale del índice de búsqueda.
+
+Para leer, `obtener_ticket` busca primero en los vivos y después en el
+archivo, y `filas_*` de exportación recorren las dos tablas.
+"""
+import heapq
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.http import Http404
+from django.utils import timezone
+
+from .busqueda import quitar_ticket
+from .models import (
+    ESTADOS_ARCHIVABLES, ComentarioArchivado, ComentarioTicket, NotificacionSaliente, Ticket,
+    TicketArchivado,
+)
+
+CAMPOS_TICKET = [f.attname for f in Ticket._meta.concrete_fields]
+CAMPOS_COMENTARIO = [f.attname for f in ComentarioTicket._meta.concrete_fields]
+
+
+def archivables(dias=None):
+    """Tickets que ya se pueden archivar."""
+    if dias is None:
+        dias = getattr(settings, 'TICKETS_ARCHIVAR_DIAS', 180)
+    return Ticket.objects.filter(
+        estado__in=ESTADOS_ARCHIVABLES,
+        fecha_actualizacion__lt=timezone.now() - timedelta(days=dias),
+    )
+
+
+def _borrar(modelo, campo, ids):
+    # DELETE directo: sin señales (resúmenes, contadores) ni cascadas
+    marcas = ', '.join(['%s'] * len(ids))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {modelo._meta.db_table} WHERE {campo} IN ({marcas})', list(ids),
+        )
+
+
+def archivar_lote(ids, dias=None):
+    """
+    Archiva los tickets de `ids` que sigan siendo archivables (se vuelve a
+    comprobar dentro de la transacción). Devuelve cuántos archivó.
+    """
+    with transaction.atomic():
+        filas = list(archivables(dias).filter(pk__in=ids).values(*CAMPOS_TICKET))
+        if not filas:
+            return 0
+        ids = [fila['id'] for fila in filas]
+
+        TicketArchivado.objects.bulk_create([TicketArchivado(**fila) for fila in filas])
+        ComentarioArchivado.objects.bulk_create([
+            ComentarioArchivado(**fila)
+            for fila in ComentarioTicket.objects.filter(ticket_id__in=ids).values(*CAMPOS_COMENTARIO)
+        ])
+
+        _borrar(ComentarioTicket, 'ticket_id', ids)
+        _borrar(NotificacionSaliente, 'ticket_id', ids)
+        _borrar(Ticket, 'id', ids)
+        for ticket_id in ids:
+            quitar_ticket(ticket_id)
+    return len(ids)
+
+
+def archivar(dias=None, lote=500, pausa=0, progreso=None):
+    """
+    Archiva todos los tickets archivables por lotes de ids crecientes.
+    `progreso(archivados)` se llama tras cada lote. Devuelve el total.
+    """
+    total = 0
+    ultimo_id = 0
+    while True:
+        ids = list(
+            archivables(dias).filter(id__gt=ultimo_id)
+            .order_by('id').values_list('id', flat=True)[:lote]
+        )
+        if not ids:
+            break
+        ultimo_id = ids[-1]
+        total += archivar_lote(ids, dias)
+        if progreso:
+            progreso(total)
+        if pausa:
+            time.sleep(pausa)
+    return total
+
+
+# ----------------------------------------------------------------------
+# Lectura transparente
+# ----------------------------------------------------------------------
+def obtener_ticket(pk):
+    """
+    El ticket con ese id, vivo o archivado (como `Ticket` sin guardar con
+    `archivado = True`). Http404 si no está en ninguno.
+    """
+    ticket = Ticket.objects.filter(pk=pk).first()
+    if ticket is not None:
+        ticket.archivado = False
+        return ticket
+    archivado = TicketArchivado.objects.filter(pk=pk).first()
+    if archivado is None:
+        raise Http404('No existe el ticket.')
+    return archivado.como_ticket()
+
+
+def comentarios_de(ticket):
+    """Comentarios del ticket (de la tabla que corresponda)."""
+    modelo = ComentarioArchivado if getattr(ticket, 'archivado', False) else ComentarioTicket
+    return modelo.objects.filter(ticket_id=ticket.pk).select_related('usuario', 'ticket').order_by('fecha_creacion')
+
+
+def unir_por_fecha(*iterables):
+    """
+    Mezcla filas ya ordenadas por (fecha_creacion, id) de varias tablas en
+    un solo orden, sin cargarlas en memoria. Cada fila es (clave, datos).
+    """
+    for _clave, datos in heapq.merge(*iterables, key=lambda fila: fila[0]):
+        yield datos
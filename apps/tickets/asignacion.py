@@ -0,0 +1,371 @@
+"""
+Asignación automática de técnicos a tickets nuevos.
+
+Cuando el ticket se crea sin técnico, se elige entre los técnicos activos
+que tienen la categoría como especialidad el de menor puntaje:
+
+    puntaje = carga * PESO_CARGA
+            + tickets suyos que vencen antes que el nuevo * PESO_URGENCIA
+            - afinidad con la zona del local (municipio / provincia)
+
+La carga, los vencimientos y las zonas de cada técnico salen de un índice
+en memoria con sus tickets PENDIENTE / EN_PROCESO, que se mantiene al día
+con las señales de `Ticket` (al confirmar la transacción): elegir cuesta
+O(técnicos de la categoría * log n), sin consultar la tabla de tickets.
+
+El índice es por proceso. Se rearma al cambiar técnicos, especialidades
+o locales y cuando un recálculo de SLA cambia límites (con `bulk_update`,
+en el worker): como en `apps.locales.autocompletado`, eso sube una versión
+en la caché de Django y los otros procesos se enteran (si la caché es
+compartida). En todo caso se rearma cada ASIGNACION_INDICE_SEGUNDOS (así
+se ven también los cambios hechos con `QuerySet.update()`).
+
+El rearmado lee las tablas fuera del lock del índice: mientras tanto se
+sigue eligiendo con el anterior, y los cambios que llegan en ese lapso se
+aplican también al nuevo antes de reemplazarlo.
+
+`tomar_ticket` es el "tomar" de un técnico: un solo UPDATE condicional
+(solo si sigue sin técnico), así dos técnicos no pueden tomar el mismo.
+"""
+import bisect
+import threading
+import time
+from collections import Counter
+from types import SimpleNamespace
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.utils import timezone
+
+from apps.locales.models import Local
+from apps.usuarios.models import Usuario
+from . import aportes
+from .models import ESTADOS_SLA_ACTIVO, Ticket, TransicionTicket
+
+
+CLAVE_VERSION = 'asignacion:indice:version'
+
+PESOS_POR_DEFECTO = {
+    'carga': 10,
+    'urgencia': 5,
+    'provincia': 4,
+    'municipio': 8,
+}
+
+
+class IndiceCarga:
+
+    def __init__(self, especialidades, tickets, locales, pesos=None):
+        """
+        `especialidades`: (tecnico_id, categoria_id) de los técnicos activos;
+        `tickets`: (ticket_id, tecnico_id, fecha_limite_sla, local_id) de los
+        tickets abiertos asignados; `locales`: {local_id: (provincia, municipio)}.
+        """
+        self.pesos = {**PESOS_POR_DEFECTO, **(pesos or {})}
+        self.locales = dict(locales)
+
+        self._por_categoria = {}
+        self._tecnicos = set()
+        for tecnico_id, categoria_id in especialidades:
+            self._por_categoria.setdefault(categoria_id, set()).add(tecnico_id)
+            self._tecnicos.add(tecnico_id)
+
+        self._tickets = {}       # ticket_id -> (tecnico_id, limite, local_id)
+        self._carga = Counter()  # tecnico_id -> tickets abiertos
+        self._limites = {}       # tecnico_id -> límites SLA ordenados
+        self._provincias = {}    # tecnico_id -> Counter(provincia)
+        self._municipios = {}    # tecnico_id -> Counter((provincia, municipio))
+        for ticket_id, tecnico_id, limite, local_id in tickets:
+            self.agregar(ticket_id, tecnico_id, limite, local_id)
+
+    def carga(self, tecnico_id):
+        return self._carga[tecnico_id]
+
+    # ------------------------------------------------------------------
+    # Mantenimiento
+    # ------------------------------------------------------------------
+    def agregar(self, ticket_id, tecnico_id, limite, local_id):
+        self.quitar(ticket_id)
+        self._tickets[ticket_id] = (tecnico_id, limite, local_id)
+        self._carga[tecnico_id] += 1
+        bisect.insort(self._limites.setdefault(tecnico_id, []), limite)
+        provincia, municipio = self.locales.get(local_id, ('', ''))
+        self._provincias.setdefault(tecnico_id, Counter())[provincia] += 1
+        self._municipios.setdefault(tecnico_id, Counter())[provincia, municipio] += 1
+
+    def quitar(self, ticket_id):
+        datos = self._tickets.pop(ticket_id, None)
+        if datos is None:
+            return
+        tecnico_id, limite, local_id = datos
+        self._carga[tecnico_id] -= 1
+        limites = self._limites[tecnico_id]
+        del limites[bisect.bisect_left(limites, limite)]
+        provincia, municipio = self.locales.get(local_id, ('', ''))
+        self._provincias[tecnico_id][provincia] -= 1
+        self._municipios[tecnico_id][provincia, municipio] -= 1
+
+    def actualizar(self, ticket_id, estado, tecnico_id, limite, local_id):
+        """Refleja el estado actual de un ticket (alta, cambio o baja)."""
+        if estado in ESTADOS_SLA_ACTIVO and tecnico_id:
+            self.agregar(ticket_id, tecnico_id, limite, local_id)
+        else:
+            self.quitar(ticket_id)
+
+    # ------------------------------------------------------------------
+    # Elección
+    # ------------------------------------------------------------------
+    def puntaje(self, tecnico_id, limite, local_id):
+        provincia, municipio = self.locales.get(local_id, ('', ''))
+        antes = bisect.bisect_right(self._limites.get(tecnico_id, []), limite)
+        if self._municipios.get(tecnico_id, {}).get((provincia, municipio), 0) > 0:
+            afinidad = self.pesos['municipio']
+        elif self._provincias.get(tecnico_id, {}).get(provincia, 0) > 0:
+            afinidad = self.pesos['provincia']
+        else:
+            afinidad = 0
+        return (
+            self._carga[tecnico_id] * self.pesos['carga']
+            + antes * self.pesos['urgencia']
+            - afinidad
+        )
+
+    def elegir(self, categoria_id, limite, local_id):
+        """Id del técnico con menor puntaje para la categoría, o None."""
+        candidatos = self._por_categoria.get(categoria_id)
+        if not candidatos:
+            return None
+        return min(
+            candidatos,
+            key=lambda tecnico_id: (self.puntaje(tecnico_id, limite, local_id), tecnico_id),
+        )
+
+
+# ----------------------------------------------------------------------
+# Índice del proceso
+# ----------------------------------------------------------------------
+_indice = None
+_indice_creado = 0.0
+_indice_version = None     # (versión en caché, generación local) al armarlo
+_generacion = 0            # sube con cada invalidación en este proceso
+_pendientes = None         # cambios que llegan mientras se arma uno nuevo
+_lock = threading.RLock()  # protege lo de arriba; nunca se consulta la BD con él
+_lock_armado = threading.Lock()
+
+
+def _armar():
+    especialidades = Usuario.especialidades.through.objects.filter(
+        usuario__rol='TECNICO', usuario__activo=True, usuario__is_active=True,
+    ).values_list('usuario_id', 'categoriaaveria_id')
+    tickets = Ticket.objects.filter(
+        estado__in=ESTADOS_SLA_ACTIVO, asignado_a__isnull=False,
+    ).values_list('id', 'asignado_a_id', 'fecha_limite_sla', 'local_id')
+    locales = {pk: (prov, mun) for pk, prov, mun in Local.objects.values_list('id', 'provincia', 'municipio')}
+    return IndiceCarga(
+        especialidades.iterator(), tickets.iterator(), locales,
+        getattr(settings, 'ASIGNACION_PESOS', None),
+    )
+
+
+def _vigente(version):
+    vigencia = getattr(settings, 'ASIGNACION_INDICE_SEGUNDOS', 300)
+    return (
+        _indice is not None
+        and _indice_version == version
+        and time.monotonic() - _indice_creado <= vigencia
+    )
+
+
+def obtener_indice():
+    """
+    Índice del proceso, rearmado si se invalidó (aquí o en otro proceso) o
+    si venció. Si otro hilo ya lo está rearmando, devuelve el anterior.
+    """
+    global _indice, _indice_creado, _indice_version, _pendientes
+    version = (cache.get(CLAVE_VERSION, 0), _generacion)
+    with _lock:
+        if _vigente(version):
+            return _indice
+        anterior = _indice
+
+    # Un solo hilo arma; los demás siguen con el anterior (o esperan si no hay)
+    if not _lock_armado.acquire(blocking=anterior is None):
+        return anterior
+    try:
+        with _lock:
+            if _vigente(version):
+                return _indice
+            _pendientes = []
+        nuevo = _armar()
+        with _lock:
+            for cambio in _pendientes:
+                nuevo.actualizar(*cambio)
+            _pendientes = None
+            _indice, _indice_creado, _indice_version = nuevo, time.monotonic(), version
+            return _indice
+    finally:
+        with _lock:
+            _pendientes = None
+        _lock_armado.release()
+
+
+def invalidar_indice(**kwargs):
+    """
+    Marca el índice para rearmar en la próxima elección, en este proceso y
+    (por la versión en caché) en los demás.
+    """
+    global _generacion
+    with _lock:
+        _generacion += 1
+    try:
+        cache.incr(CLAVE_VERSION)
+    except ValueError:
+        cache.set(CLAVE_VERSION, 1, None)
+
+
+def elegir_tecnico(ticket):
+    """Id del técnico que conviene asignar al ticket (aún sin guardar), o None."""
+    limite = ticket.fecha_limite_sla
+    if not limite:
+        from .calendario import calcular_limite_sla
+        limite = calcular_limite_sla(
+            timezone.now(), ticket.categoria.tiempo_sla_horas, ticket.local.provincia,
+        )
+    indice = obtener_indice()
+    zona = None
+    if ticket.local_id not in indice.locales:
+        # Local recién creado (p. ej. desde TicketForm.clean_local)
+        zona = (ticket.local.provincia, ticket.local.municipio)
+    with _lock:
+        if zona:
+            indice.locales.setdefault(ticket.local_id, zona)
+        return indice.elegir(ticket.categoria_id, limite, ticket.local_id)
+
+
+def asignar_automaticamente(ticket):
+    """
+    Si el ticket no tiene técnico y ASIGNACION_AUTOMATICA está activo,
+    le asigna el mejor candidato. Devuelve el id asignado o None.
+    """
+    if ticket.asignado_a_id or not getattr(settings, 'ASIGNACION_AUTOMATICA', True):
+        return None
+    tecnico_id = elegir_tecnico(ticket)
+    if tecnico_id:
+        ticket.asignado_a_id = tecnico_id
+    return tecnico_id
+
+
+# ----------------------------------------------------------------------
+# Tomar ticket (compare-and-set)
+# ----------------------------------------------------------------------
+def tomar_ticket(ticket, tecnico):
+    """
+    Asigna el ticket al técnico solo si sigue abierto y sin técnico:
+    `UPDATE ... WHERE asignado_a IS NULL`, sin leer antes ni bloquear.
+    Devuelve True si lo tomó y False si otro se adelantó.
+
+    Como `update()` no dispara señales, si lo tomó se hace a mano lo mismo
+    que harían las de `save()` (resúmenes, contadores, índice de carga) y
+    se registra la transición.
+    """
+    ahora = timezone.now()
+    with transaction.atomic():
+        tomado = Ticket.objects.filter(
+            pk=ticket.pk, asignado_a__isnull=True, estado__in=ESTADOS_SLA_ACTIVO,
+        ).update(
+            asignado_a=tecnico,
+            fecha_asignacion=Coalesce(F('fecha_asignacion'), Value(ahora)),
+            fecha_actualizacion=ahora,
+        )
+        if not tomado:
+            return False
+
+        campos = {
+            'id', 'estado', 'asignado_a_id', 'fecha_asignacion', 'fecha_limite_sla',
+            'local_id', 'categoria_id', *aportes.campos(),
+        }
+        despues = Ticket.objects.filter(pk=ticket.pk).values(*campos).get()
+        antes = {
+            **despues,
+            'asignado_a_id': None,
+            # Si la puso este UPDATE, antes no tenía
+            'fecha_asignacion': None if despues['fecha_asignacion'] == ahora else despues['fecha_asignacion'],
+        }
+        antes, despues = SimpleNamespace(**antes), SimpleNamespace(**despues)
+        aportes.aplicar(antes, despues)
+        TransicionTicket.registrar(
+            SimpleNamespace(pk=despues.id, estado=despues.estado, asignado_a_id=despues.asignado_a_id,
+                            categoria_id=despues.categoria_id),
+            despues.estado, None, actor=tecnico, fecha=ahora,
+        )
+        transaction.on_commit(lambda: _aplicar(
+            despues.id, despues.estado, despues.asignado_a_id, despues.fecha_limite_sla, despues.local_id,
+        ))
+
+    ticket.asignado_a = tecnico
+    ticket.fecha_asignacion = despues.fecha_asignacion
+    ticket.fecha_actualizacion = ahora
+    # Ya está en la BD: que un save() posterior no lo cuente otra vez
+    ticket._guardar_valores_cargados(['asignado_a', 'fecha_asignacion', 'fecha_actualizacion'])
+    return True
+
+
+# ----------------------------------------------------------------------
+# Señales
+# ----------------------------------------------------------------------
+def _aplicar(ticket_id, estado, tecnico_id, limite, local_id):
+    with _lock:
+        if _indice is not None:
+            _indice.actualizar(ticket_id, estado, tecnico_id, limite, local_id)
+        if _pendientes is not None:
+            # Se está armando otro: que tampoco se lo pierda
+            _pendientes.append((ticket_id, estado, tecnico_id, limite, local_id))
+
+
+def _ticket_guardado(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    campos = ('estado', 'asignado_a_id', 'fecha_limite_sla', 'local_id')
+    if instance.get_deferred_fields() & set(campos):
+        # Cargado con .only(): lo que falta, de la BD
+        datos = Ticket.objects.filter(pk=instance.pk).values_list(*campos).first()
+        if datos is None:
+            return
+    else:
+        datos = tuple(getattr(instance, c) for c in campos)
+    transaction.on_commit(lambda: _aplicar(instance.pk, *datos))
+
+
+def _ticket_borrado(sender, instance, **kwargs):
+    ticket_id = instance.pk
+    transaction.on_commit(lambda: _aplicar(ticket_id, None, None, None, None))
+
+
+def _usuario_guardado(sender, instance, update_fields=None, **kwargs):
+    # El login solo toca last_login: no cambia quién puede recibir tickets
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    invalidar_indice()
+
+
+def _local_guardado(sender, instance, created, **kwargs):
+    # Cambió la zona de un local con tickets: la afinidad también. Los
+    # locales nuevos se agregan al elegir (`elegir_tecnico`).
+    if not created:
+        invalidar_indice()
+
+
+def conectar_senales():
+    post_save.connect(_ticket_guardado, sender=Ticket, dispatch_uid='asignacion_ticket_guardado')
+    post_delete.connect(_ticket_borrado, sender=Ticket, dispatch_uid='asignacion_ticket_borrado')
+    post_save.connect(_usuario_guardado, sender=Usuario, dispatch_uid='asignacion_usuario_guardado')
+    post_save.connect(_local_guardado, sender=Local, dispatch_uid='asignacion_local_guardado')
+    m2m_changed.connect(
+        invalidar_indice,
+        sender=Usuario.especialidades.through,
+        dispatch_uid='asignacion_especialidades',
+    )
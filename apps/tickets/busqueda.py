@@ -0,0 +1,200 @@
+"""
+Búsqueda de texto completo en tickets y comentarios.
+
+En SQLite se usa una tabla virtual FTS5 (`tickets_busqueda`, migración
+0006) con una fila por ticket: rowid = id del ticket y columnas para el
+número, título, local, descripción, solución y el texto de sus
+comentarios (los internos en una columna aparte, que no se busca para
+quien no puede leerlos: `internos=False`). Las señales de Ticket,
+ComentarioTicket y Local (al cambiar código o nombre) la mantienen al día
+y `manage.py reconstruir_busqueda` la rehace entera.
+
+En otros motores se cae a `icontains` sobre los mismos campos (lento con
+mucha historia, pero correcto).
+"""
+import re
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save
+
+from apps.locales.models import Local
+from .models import ComentarioTicket, Ticket
+
+
+TABLA = 'tickets_busqueda'
+
+# Peso de cada columna en el ranking bm25 (mismo orden que la tabla)
+PESOS = {
+    'numero': 10.0,
+    'titulo': 5.0,
+    'local': 3.0,
+    'descripcion': 1.0,
+    'solucion': 1.0,
+    'comentarios': 0.5,
+    'internos': 0.5,
+}
+
+# Texto del ticket armado en la propia BD (un solo viaje por ticket)
+SQL_INSERTAR = f"""
+    INSERT INTO {TABLA} (rowid, {', '.join(PESOS)})
+    SELECT t.id, t.numero_ticket, t.titulo, l.codigo || ' ' || l.nombre,
+           t.descripcion, COALESCE(t.solucion, ''),
+           COALESCE((SELECT group_concat(c.comentario, ' ')
+                     FROM tickets_comentarioticket c
+                     WHERE c.ticket_id = t.id AND NOT c.es_interno), ''),
+           COALESCE((SELECT group_concat(c.comentario, ' ')
+                     FROM tickets_comentarioticket c
+                     WHERE c.ticket_id = t.id AND c.es_interno), '')
+    FROM tickets_ticket t
+    JOIN locales_local l ON l.id = t.local_id
+"""
+
+_PALABRA = re.compile(r'\w[\w-]*', re.UNICODE)
+
+
+def fts_disponible():
+    return connection.vendor == 'sqlite'
+
+
+def indexar_ticket(ticket_id):
+    """Vuelve a indexar un ticket (si ya no existe, solo lo quita)."""
+    if not fts_disponible():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLA} WHERE rowid = %s', [ticket_id])
+        cursor.execute(SQL_INSERTAR + ' WHERE t.id = %s', [ticket_id])
+
+
+def indexar_local(local_id):
+    """Vuelve a indexar los tickets de un local (cambió su código o nombre)."""
+    if not fts_disponible():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {TABLA} WHERE rowid IN (SELECT id FROM tickets_ticket WHERE local_id = %s)',
+            [local_id],
+        )
+        cursor.execute(SQL_INSERTAR + ' WHERE t.local_id = %s', [local_id])
+
+
+def quitar_ticket(ticket_id):
+    if not fts_disponible():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLA} WHERE rowid = %s', [ticket_id])
+
+
+def reconstruir_indice():
+    """Vacía e indexa todos los tickets. Devuelve cuántos quedaron."""
+    if not fts_disponible():
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLA}')
+        cursor.execute(SQL_INSERTAR)
+        cursor.execute(f"INSERT INTO {TABLA} ({TABLA}) VALUES ('optimize')")
+        cursor.execute(f'SELECT count(*) FROM {TABLA}')
+        return cursor.fetchone()[0]
+
+
+def consulta_fts(texto):
+    """
+    Convierte lo que escribió el usuario en una consulta FTS5 segura:
+    cada palabra entre comillas (sin operadores) y con prefijo, todas
+    obligatorias. "tkt-0001 impre" => "tkt-0001"* "impre"*
+    Devuelve '' si no hay palabras.
+    """
+    return ' '.join(f'"{p}"*' for p in _PALABRA.findall(texto or ''))
+
+
+def filtrar_busqueda(qs, texto, internos=True):
+    """
+    Restringe un queryset de tickets a los que coinciden con `texto`,
+    ordenados por relevancia (y luego por más recientes). Con
+    `internos=False` no se busca en los comentarios internos.
+    """
+    if fts_disponible():
+        consulta = consulta_fts(texto)
+        if not consulta:
+            return qs.none()
+        if not internos:
+            consulta = f'- {{internos}} : ({consulta})'
+        rango = f"bm25({TABLA}, {', '.join(str(p) for p in PESOS.values())})"
+        return qs.extra(
+            select={'rango_busqueda': rango},
+            tables=[TABLA],
+            where=[f'{TABLA}.rowid = tickets_ticket.id', f'{TABLA} MATCH %s'],
+            params=[consulta],
+        ).order_by('rango_busqueda', '-fecha_creacion', '-id')
+
+    comentarios = ComentarioTicket.objects.all()
+    if not internos:
+        comentarios = comentarios.filter(es_interno=False)
+    filtro = Q()
+    for palabra in _PALABRA.findall(texto or ''):
+        filtro &= (
+            Q(numero_ticket__icontains=palabra) |
+            Q(titulo__icontains=palabra) |
+            Q(local__codigo__icontains=palabra) |
+            Q(local__nombre__icontains=palabra) |
+            Q(descripcion__icontains=palabra) |
+            Q(solucion__icontains=palabra) |
+            Q(id__in=comentarios.filter(
+                comentario__icontains=palabra
+            ).values('ticket_id'))
+        )
+    if not filtro:
+        return qs.none()
+    return qs.filter(filtro).order_by('-fecha_creacion', '-id')
+
+
+def paginar_busqueda(qs, texto, pagina=1, por_pagina=50, internos=True):
+    """
+    Devuelve (tickets, hay_siguiente) para la página `pagina` (desde 1).
+    El orden es por relevancia, así que aquí sí se pagina por número;
+    se pide una fila extra para saber si hay más sin hacer COUNT.
+    """
+    inicio = (max(pagina, 1) - 1) * por_pagina
+    tickets = list(filtrar_busqueda(qs, texto, internos)[inicio:inicio + por_pagina + 1])
+    return tickets[:por_pagina], len(tickets) > por_pagina
+
+
+# ----------------------------------------------------------------------
+# Señales
+# ----------------------------------------------------------------------
+# Campos del ticket que van al índice (el local, por su código / nombre)
+CAMPOS_INDEXADOS = {'numero_ticket', 'titulo', 'local', 'descripcion', 'solucion'}
+
+
+def _ticket_guardado(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    if update_fields is not None and not CAMPOS_INDEXADOS & set(update_fields):
+        # Solo cambió el estado, el técnico, fechas...: el texto es el mismo
+        return
+    indexar_ticket(instance.pk)
+
+
+def _ticket_borrado(sender, instance, **kwargs):
+    quitar_ticket(instance.pk)
+
+
+def _comentario_cambiado(sender, instance, raw=False, **kwargs):
+    if not raw:
+        indexar_ticket(instance.ticket_id)
+
+
+def _local_guardado(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if raw or created:
+        return
+    if update_fields is not None and not {'codigo', 'nombre'} & set(update_fields):
+        return
+    indexar_local(instance.pk)
+
+
+def conectar_senales():
+    post_save.connect(_ticket_guardado, sender=Ticket, dispatch_uid='busqueda_ticket_guardado')
+    post_delete.connect(_ticket_borrado, sender=Ticket, dispatch_uid='busqueda_ticket_borrado')
+    post_save.connect(_comentario_cambiado, sender=ComentarioTicket, dispatch_uid='busqueda_comentario_guardado')
+    post_delete.connect(_comentario_cambiado, sender=ComentarioTicket, dispatch_uid='busqueda_comentario_borrado')
+    post_save.connect(_local_guardado, sender=Local, dispatch_uid='busqueda_local_guardado')
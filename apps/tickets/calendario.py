@@ -0,0 +1,200 @@
+"""
+Calendario laboral para el SLA.
+
+El plazo de una categoría (`tiempo_sla_horas`) se cuenta solo en horario
+laboral (SLA_HORARIO_LABORAL) y sin feriados (`Feriado`, nacionales o de
+la provincia del local).
+
+Para no recorrer día por día, cada calendario precalcula el acumulado de
+segundos laborables al inicio de cada día del rango que cubre:
+
+    acumulado[i] = segundos laborables entre `desde` y el día i
+
+Con eso:
+- "tiempo laboral entre A y B" = posicion(B) - posicion(A), O(1);
+- "A + N horas laborables" = búsqueda binaria de posicion(A) + N
+  en `acumulado`, O(log n).
+
+Hay un calendario por provincia, cacheado en el proceso. Se descarta al
+guardar/borrar un `Feriado` y, en todo caso, cada SLA_CALENDARIO_SEGUNDOS.
+"""
+import bisect
+import threading
+import time as reloj
+from datetime import date, datetime, time, timedelta
+
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+
+from apps.locales.models import Local
+from .models import Feriado
+
+
+# Lunes=0 ... Domingo=6 -> (apertura, cierre). Días ausentes = cerrado.
+HORARIO_POR_DEFECTO = {
+    0: ('08:00', '18:00'),
+    1: ('08:00', '18:00'),
+    2: ('08:00', '18:00'),
+    3: ('08:00', '18:00'),
+    4: ('08:00', '18:00'),
+    5: ('08:00', '18:00'),
+}
+
+# Años hacia atrás / adelante que cubre un calendario recién armado
+# (si llega una fecha fuera del rango, se rearma más grande).
+ANOS_ATRAS = 3
+ANOS_ADELANTE = 2
+
+
+def _segundos(hhmm):
+    horas, minutos = hhmm.split(':')
+    return int(horas) * 3600 + int(minutos) * 60
+
+
+class CalendarioLaboral:
+
+    def __init__(self, horario, feriados, desde, hasta):
+        """
+        `horario`: {dia_semana: ('HH:MM', 'HH:MM')}; `feriados`: set de date;
+        cubre los días desde `desde` hasta `hasta` (incluidos).
+        """
+        self.horario = {dia: (_segundos(a), _segundos(c)) for dia, (a, c) in horario.items()}
+        self.feriados = frozenset(feriados)
+        self.desde = desde
+        self.hasta = hasta
+
+        self._ventanas = []
+        self._acumulado = [0]
+        dia = desde
+        while dia <= hasta:
+            apertura, cierre = self.horario.get(dia.weekday(), (0, 0))
+            if dia in self.feriados or cierre <= apertura:
+                apertura = cierre = 0
+            self._ventanas.append((apertura, cierre))
+            self._acumulado.append(self._acumulado[-1] + cierre - apertura)
+            dia += timedelta(days=1)
+
+    def cubre(self, momento):
+        return self.desde <= timezone.localtime(momento).date() <= self.hasta
+
+    def posicion(self, momento):
+        """Segundos laborables desde el inicio del calendario hasta `momento`."""
+        local = timezone.localtime(momento)
+        indice = (local.date() - self.desde).days
+        apertura, cierre = self._ventanas[indice]
+        segundo = local.hour * 3600 + local.minute * 60 + local.second + local.microsecond / 1e6
+        return self._acumulado[indice] + min(max(segundo, apertura), cierre) - apertura
+
+    def momento(self, posicion):
+        """Inverso de `posicion`: el instante en que se alcanza esa posición."""
+        # Primer día cuyo acumulado final llega a la posición
+        indice = max(bisect.bisect_left(self._acumulado, posicion) - 1, 0)
+        if indice >= len(self._ventanas):
+            raise ValueError('Posición fuera del calendario')
+        apertura, _cierre = self._ventanas[indice]
+        segundo = apertura + posicion - self._acumulado[indice]
+        inicio_dia = datetime.combine(self.desde + timedelta(days=indice), time.min)
+        return timezone.make_aware(inicio_dia + timedelta(seconds=segundo))
+
+    def segundos_laborables(self, inicio, fin):
+        """Segundos de horario laboral entre dos instantes (0 si fin <= inicio)."""
+        return max(self.posicion(fin) - self.posicion(inicio), 0)
+
+    def sumar(self, inicio, segundos):
+        """`inicio` + `segundos` de horario laboral."""
+        if segundos <= 0:
+            return inicio
+        objetivo = self.posicion(inicio) + segundos
+        if objetivo > self._acumulado[-1]:
+            raise ValueError('Posición fuera del calendario')
+        return self.momento(objetivo)
+
+
+# ----------------------------------------------------------------------
+# Calendarios por provincia (cacheados en el proceso)
+# ----------------------------------------------------------------------
+_calendarios = {}
+_creados = {}
+_provincias = None
+_lock = threading.Lock()
+
+
+def _armar(provincia, desde, hasta):
+    horario = getattr(settings, 'SLA_HORARIO_LABORAL', HORARIO_POR_DEFECTO)
+    feriados = set(
+        Feriado.objects
+        .filter(fecha__range=(desde, hasta), provincia__in=['', provincia or ''])
+        .values_list('fecha', flat=True)
+    )
+    return CalendarioLaboral(horario, feriados, desde, hasta)
+
+
+def obtener_calendario(provincia, *momentos):
+    """
+    Calendario de la provincia (de `Local.provincia`) que cubra los
+    `momentos` dados; si no los cubre se rearma con un rango mayor.
+    """
+    provincia = provincia or ''
+    vigencia = getattr(settings, 'SLA_CALENDARIO_SEGUNDOS', 3600)
+
+    with _lock:
+        calendario = _calendarios.get(provincia)
+        vencido = reloj.monotonic() - _creados.get(provincia, 0) > vigencia
+        if calendario and not vencido and all(calendario.cubre(m) for m in momentos):
+            return calendario
+
+        hoy = timezone.localdate()
+        fechas = [timezone.localtime(m).date() for m in momentos]
+        desde = min([date(hoy.year - ANOS_ATRAS, 1, 1), *fechas])
+        hasta = max([date(hoy.year + ANOS_ADELANTE, 12, 31), *fechas])
+        if calendario and not vencido:
+            desde, hasta = min(desde, calendario.desde), max(hasta, calendario.hasta)
+
+        calendario = _armar(provincia, desde, hasta)
+        _calendarios[provincia] = calendario
+        _creados[provincia] = reloj.monotonic()
+        return calendario
+
+
+def calcular_limite_sla(inicio, horas, provincia=''):
+    """Fecha límite: `inicio` + `horas` de horario laboral de la provincia."""
+    calendario = obtener_calendario(provincia, inicio)
+    try:
+        return calendario.sumar(inicio, horas * 3600)
+    except ValueError:
+        # Plazo más allá del rango: ampliarlo y volver a intentar
+        calendario = obtener_calendario(provincia, inicio, inicio + timedelta(days=horas * 7))
+        return calendario.sumar(inicio, horas * 3600)
+
+
+def segundos_laborables(inicio, fin, provincia=''):
+    """Segundos de horario laboral de la provincia entre `inicio` y `fin`."""
+    return obtener_calendario(provincia, inicio, fin).segundos_laborables(inicio, fin)
+
+
+def provincia_de_local(local_id):
+    """Provincia de un local sin ir a la BD cada vez (mapa cacheado)."""
+    global _provincias
+    with _lock:
+        if _provincias is None or local_id not in _provincias:
+            _provincias = dict(Local.objects.values_list('id', 'provincia'))
+        return _provincias.get(local_id, '')
+
+
+def invalidar_calendarios(**kwargs):
+    with _lock:
+        _calendarios.clear()
+        _creados.clear()
+
+
+def _invalidar_provincias(**kwargs):
+    global _provincias
+    with _lock:
+        _provincias = None
+
+
+def conectar_senales():
+    post_save.connect(invalidar_calendarios, sender=Feriado, dispatch_uid='calendario_feriado_guardado')
+    post_delete.connect(invalidar_calendarios, sender=Feriado, dispatch_uid='calendario_feriado_borrado')
+    post_save.connect(_invalidar_provincias, sender=Local, dispatch_uid='calendario_local_guardado')
@@ -0,0 +1,144 @@
+"""
+Contadores denormalizados de tickets.
+
+- `Local.contador_abiertos`: tickets PENDIENTE / EN_PROCESO del local.
+- `Local.contador_mes` (+ `contador_mes_inicio`): tickets creados en el mes.
+- `Usuario.contador_abiertos`: tickets PENDIENTE / EN_PROCESO asignados.
+
+Se actualizan con `UPDATE ... SET contador = contador + n` dentro de la
+misma transacción que guarda el ticket, así los listados leen una columna
+en vez de hacer un COUNT por fila. Igual que en `apps.reportes.resumenes`,
+cada ticket "aporta" a unos contadores: al guardarlo se resta lo que
+aporta la fila en la BD y se suma lo nuevo (señales de `apps.tickets.aportes`).
+
+Las actualizaciones masivas con `QuerySet.update()` no disparan señales:
+si cambian estado, local o técnico hay que llamar a `aplicar_cambio` a mano
+o correr `manage.py reconciliar_contadores`.
+"""
+from datetime import datetime, time
+
+from django.db import transaction
+from django.db.models import Case, Count, F, Value, When
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from apps.locales.models import Local
+from apps.usuarios.models import Usuario
+from . import aportes
+from .models import ESTADOS_SLA_ACTIVO, Ticket, TicketArchivado
+
+
+# Campos del ticket de los que dependen los contadores
+CAMPOS_CONTADOR = ['estado', 'local_id', 'asignado_a_id', 'fecha_creacion']
+
+
+def aporte(ticket):
+    """
+    Devuelve un dict {(modelo, id, campo, mes): n} con lo que este ticket
+    suma a los contadores (mes solo para `contador_mes`).
+    """
+    resultado = {}
+    abierto = ticket.estado in ESTADOS_SLA_ACTIVO
+    if abierto and ticket.local_id:
+        resultado[('local', ticket.local_id, 'contador_abiertos', None)] = 1
+    if abierto and ticket.asignado_a_id:
+        resultado[('usuario', ticket.asignado_a_id, 'contador_abiertos', None)] = 1
+    if ticket.fecha_creacion and ticket.local_id:
+        mes = timezone.localdate(ticket.fecha_creacion).replace(day=1)
+        resultado[('local', ticket.local_id, 'contador_mes', mes)] = 1
+    return resultado
+
+
+def _sumar(modelo, pk, campo, mes, delta):
+    modelo = Local if modelo == 'local' else Usuario
+    qs = modelo.objects.filter(pk=pk)
+    if campo != 'contador_mes':
+        qs.update(**{campo: Greatest(F(campo) + delta, Value(0))})
+    elif delta > 0:
+        # Si el contador era de un mes anterior, empieza de nuevo
+        qs.update(
+            contador_mes=Case(
+                When(contador_mes_inicio=mes, then=F('contador_mes') + delta),
+                default=Value(delta),
+            ),
+            contador_mes_inicio=mes,
+        )
+    else:
+        qs.filter(contador_mes_inicio=mes).update(
+            contador_mes=Greatest(F('contador_mes') + delta, Value(0)),
+        )
+
+
+def aplicar_cambio(antes, despues):
+    """Aplica la diferencia entre dos `aporte` (dicts; vacío = nada)."""
+    for clave in {*antes, *despues}:
+        delta = despues.get(clave, 0) - antes.get(clave, 0)
+        if delta:
+            _sumar(*clave, delta)
+
+
+# ----------------------------------------------------------------------
+# Señales
+# ----------------------------------------------------------------------
+def conectar_senales():
+    # Mismas señales que los resúmenes (apps.tickets.aportes)
+    aportes.registrar('contadores', CAMPOS_CONTADOR, aporte, aplicar_cambio, vacio={})
+
+
+# ----------------------------------------------------------------------
+# Reconciliación
+# ----------------------------------------------------------------------
+def reconciliar(corregir=True):
+    """
+    Recalcula todos los contadores con un COUNT agrupado por tabla y los
+    compara con los guardados. Si `corregir`, escribe los valores reales.
+    Devuelve la lista de diferencias: (objeto, campo, guardado, real).
+    """
+    mes = timezone.localdate().replace(day=1)
+    inicio_mes = timezone.make_aware(datetime.combine(mes, time.min))
+    abiertos = Ticket.objects.filter(estado__in=ESTADOS_SLA_ACTIVO)
+
+    with transaction.atomic():
+        por_local = dict(
+            abiertos.values('local_id').annotate(n=Count('id')).values_list('local_id', 'n')
+        )
+        por_tecnico = dict(
+            abiertos.filter(asignado_a__isnull=False)
+            .values('asignado_a_id').annotate(n=Count('id')).values_list('asignado_a_id', 'n')
+        )
+        # Los archivados del mes también cuentan (archivar no toca contadores)
+        del_mes = {}
+        for modelo in (Ticket, TicketArchivado):
+            for local_id, n in (
+                modelo.objects.filter(fecha_creacion__gte=inicio_mes)
+                .values('local_id').annotate(n=Count('id')).values_list('local_id', 'n')
+            ):
+                del_mes[local_id] = del_mes.get(local_id, 0) + n
+
+        diferencias = []
+        locales = []
+        for local in Local.objects.only('codigo', 'nombre', *Local.CONTADORES):
+            guardado_mes = local.tickets_mes_actual()
+            real_abiertos, real_mes = por_local.get(local.pk, 0), del_mes.get(local.pk, 0)
+            if local.contador_abiertos != real_abiertos:
+                diferencias.append((local, 'contador_abiertos', local.contador_abiertos, real_abiertos))
+            if guardado_mes != real_mes:
+                diferencias.append((local, 'contador_mes', guardado_mes, real_mes))
+            if (local.contador_abiertos, guardado_mes) != (real_abiertos, real_mes):
+                local.contador_abiertos, local.contador_mes = real_abiertos, real_mes
+                local.contador_mes_inicio = mes
+                locales.append(local)
+
+        usuarios = []
+        for usuario in Usuario.objects.only('username', 'first_name', 'last_name', 'rol', 'contador_abiertos'):
+            real = por_tecnico.get(usuario.pk, 0)
+            if usuario.contador_abiertos != real:
+                diferencias.append((usuario, 'contador_abiertos', usuario.contador_abiertos, real))
+                usuario.contador_abiertos = real
+                usuarios.append(usuario)
+
+        if corregir:
+            Local.objects.bulk_update(locales, Local.CONTADORES, batch_size=500)
+            Usuario.objects.bulk_update(usuarios, ['contador_abiertos'], batch_size=500)
+
+    return diferencias
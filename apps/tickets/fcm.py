@@ -1,62 +1,78 @@
 # apps/tickets/fcm.py
 
-import requests
 from django.conf import settings
 from django.urls import reverse
+from django.utils import timezone
 
-from apps.usuarios.models import DispositivoNotificacion
+from apps.usuarios.models import DispositivoNotificacion, Usuario
+from apps.usuarios.fcm import obtener_cliente_fcm, token_invalido
 
-from google.oauth2 import service_account
-from google.auth.transport.requests import Request
 
-SCOPES = ["https://www.googleapis.com/auth/firebase.messaging"]
+class ErrorTemporalFCM(Exception):
+    """FCM respondió con un error que vale la pena reintentar (5xx / 429)."""
 
 
-def _get_access_token():
+def enviar_notificacion_nuevo_ticket(ticket, lanzar_errores=False):
     """
-    Obtiene un token de acceso OAuth2 usando el JSON de servicio de Firebase.
-    """
-    print("[FCM] Obteniendo access token...")
+    Envía una notificación push FCM al técnico asignado al ticket.
+    Usa HTTP v1: https://fcm.googleapis.com/v1/projects/PROJECT_ID/messages:send
 
-    credentials = service_account.Credentials.from_service_account_file(
-        str(settings.FIREBASE_CREDENTIALS_FILE),
-        scopes=SCOPES,
+    Con `lanzar_errores=True` (lo usa la bandeja de salida) los errores de
+    red y las respuestas 5xx/429 se propagan para poder reintentar.
+    """
+    if not ticket.asignado_a:
+        print(f"[FCM] Ticket {ticket.id}: sin técnico asignado. No se envía push.")
+        return
+
+    _enviar_push(
+        ticket,
+        [ticket.asignado_a_id],
+        f"Nuevo ticket {ticket.numero_ticket}",
+        f"{ticket.local} - {ticket.categoria.nombre if ticket.categoria else ''}",
+        lanzar_errores=lanzar_errores,
     )
-    credentials.refresh(Request())
-    print("[FCM] Access token obtenido OK.")
-    return credentials.token
 
 
-def enviar_notificacion_nuevo_ticket(ticket):
+def enviar_alerta_sla(ticket, vencido, lanzar_errores=False):
     """
-    Envía una notificación push FCM al técnico asignado al ticket.
-    Usa HTTP v1: https://fcm.googleapis.com/v1/projects/PROJECT_ID/messages:send
+    Push de SLA por vencer / vencido (lo programa `manage.py programador_sla`).
+    Va al técnico asignado; si el ticket no tiene, a los administradores.
     """
-    try:
-        if not ticket.asignado_a:
-            print(f"[FCM] Ticket {ticket.id}: sin técnico asignado. No se envía push.")
-            return
+    if ticket.asignado_a_id:
+        usuarios = [ticket.asignado_a_id]
+    else:
+        usuarios = list(Usuario.objects.filter(rol="ADMIN", activo=True).values_list("id", flat=True))
 
-        # 1) Buscar dispositivos activos del técnico
-        dispositivos = DispositivoNotificacion.objects.filter(
-            usuario=ticket.asignado_a,
-            activo=True,
-        ).exclude(fcm_token__isnull=True).exclude(fcm_token__exact="")
+    if vencido:
+        titulo = f"SLA vencido: {ticket.numero_ticket}"
+    else:
+        titulo = f"SLA por vencer: {ticket.numero_ticket}"
+    limite = timezone.localtime(ticket.fecha_limite_sla)
+    cuerpo = f"{ticket.local} - límite {limite:%d/%m %H:%M}"
+
+    _enviar_push(ticket, usuarios, titulo, cuerpo, lanzar_errores=lanzar_errores)
 
-        if not dispositivos.exists():
-            print(f"[FCM] Ticket {ticket.id}: el técnico {ticket.asignado_a} no tiene dispositivos activos.")
-            return
 
-        print(f"[FCM] Ticket {ticket.id}: encontré {dispositivos.count()} dispositivo(s) para {ticket.asignado_a}.")
+def _enviar_push(ticket, usuarios, titulo, cuerpo, lanzar_errores=False):
+    """Envía un push del ticket a todos los dispositivos activos de `usuarios` (ids)."""
+    try:
+        # 1) Buscar dispositivos activos (una sola consulta)
+        tokens = list(
+            DispositivoNotificacion.objects.filter(
+                usuario_id__in=usuarios,
+                activo=True,
+            ).exclude(fcm_token__isnull=True).exclude(fcm_token__exact="")
+            .values_list("fcm_token", flat=True)
+        )
+
+        if not tokens:
+            print(f"[FCM] Ticket {ticket.id}: los usuarios {usuarios} no tienen dispositivos activos.")
+            return
 
-        # 2) Access token
-        access_token = _get_access_token()
+        print(f"[FCM] Ticket {ticket.id}: encontré {len(tokens)} dispositivo(s) para {usuarios}.")
 
-        url = f"https://fcm.googleapis.com/v1/projects/{settings.FIREBASE_PROJECT_ID}/messages:send"
-        headers = {
-            "Authorization": f"Bearer {access_token}",
-            "Content-Type": "application/json; charset=UTF-8",
-        }
+        # 2) Cliente compartido (token cacheado + conexiones keep-alive)
+        cliente = obtener_cliente_fcm()
 
         # 3) Construir la URL correcta del ticket usando reverse
         #    En urls.py: path('tickets/<int:pk>/', views.ticket_detalle, name='ticket_detalle')
@@ -64,31 +80,48 @@ def enviar_notificacion_nuevo_ticket(ticket):
         ticket_url = settings.BASE_URL.rstrip("/") + relative_url
         print(f"[FCM] URL del ticket: {ticket_url}")
 
-        # 4) Enviar a cada dispositivo
-        for disp in dispositivos:
-            cuerpo = {
-                "message": {
-                    "token": disp.fcm_token,
-                    "notification": {
-                        "title": f"Nuevo ticket {ticket.numero_ticket}",
-                        "body": f"{ticket.local} - {ticket.categoria.nombre if ticket.categoria else ''}",
-                    },
-                    "data": {
-                        "ticket_id": str(ticket.id),
-                        "ticket_url": ticket_url,
-                        "estado": ticket.estado,
-                        # Esto ayuda a que Android dispare onMessageOpenedApp
-                        "click_action": "FLUTTER_NOTIFICATION_CLICK",
-                    },
-                }
-            }
-
-            print(f"[FCM] Enviando a token {disp.fcm_token[:20]}...")
-
-            resp = requests.post(url, headers=headers, json=cuerpo, timeout=10)
-
-            print(f"[FCM] Respuesta FCM: {resp.status_code} - {resp.text}")
+        mensaje = {
+            "notification": {
+                "title": titulo,
+                "body": cuerpo,
+            },
+            "data": {
+                "ticket_id": str(ticket.id),
+                "ticket_url": ticket_url,
+                "estado": ticket.estado,
+                # Esto ayuda a que Android dispare onMessageOpenedApp
+                "click_action": "FLUTTER_NOTIFICATION_CLICK",
+            },
+        }
+
+        # 4) Enviar a todos los dispositivos en paralelo
+        respuestas = cliente.enviar_a_tokens(tokens, mensaje, timeout=10)
+
+        errores_temporales = []
+        tokens_invalidos = []
+        for token, resp in respuestas.items():
+            if isinstance(resp, Exception):
+                print(f"[FCM] Token {token[:20]}...: error de red {resp}")
+                errores_temporales.append(str(resp))
+                continue
+
+            print(f"[FCM] Token {token[:20]}...: {resp.status_code} - {resp.text}")
+
+            if token_invalido(resp):
+                tokens_invalidos.append(token)
+            elif resp.status_code >= 500 or resp.status_code == 429:
+                errores_temporales.append(f"{resp.status_code} - {resp.text[:200]}")
+
+        # 5) Desactivar los tokens que FCM ya no reconoce
+        if tokens_invalidos:
+            DispositivoNotificacion.objects.filter(fcm_token__in=tokens_invalidos).update(activo=False)
+            print(f"[FCM] {len(tokens_invalidos)} token(s) inválido(s) desactivado(s).")
+
+        if errores_temporales:
+            raise ErrorTemporalFCM("; ".join(errores_temporales))
 
     except Exception as e:
         # Cualquier error lo imprimimos para verlo en los logs de PythonAnywhere
         print(f"[FCM] ERROR enviando notificación: {e}")
+        if lanzar_errores:
+            raise
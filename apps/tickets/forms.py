@@ -1,8 +1,11 @@
 from django import forms
+from django.conf import settings
+from django.db.models import Q
 
 from apps.tickets.models import Ticket, ComentarioTicket, CategoriaAveria
-from apps.locales.models import Local
+from apps.locales.models import Local, normalizar_texto
 from apps.usuarios.models import Usuario
+from .visibilidad import categorias_de_tecnico
 
 
 class TicketForm(forms.ModelForm):
@@ -63,40 +66,44 @@ class TicketForm(forms.ModelForm):
         # Para no admins, que el técnico sea opcional
         if not (usuario and usuario.es_admin()):
             self.fields["asignado_a"].required = False
+            if getattr(settings, "ASIGNACION_AUTOMATICA", True):
+                self.fields["asignado_a"].help_text = (
+                    "Si lo dejas vacío se asigna automáticamente."
+                )
 
     def clean_local(self):
         """
         Convierte el texto del campo `local` en un objeto Local.
         Si no existe, lo crea usando ese mismo texto como `codigo` y `nombre`.
+
+        Se compara contra las claves normalizadas (sin mayúsculas ni
+        tildes), que tienen índice.
         """
         texto = (self.cleaned_data.get("local") or "").strip()
-        if not texto:
+        clave = normalizar_texto(texto)
+        if not clave:
             raise forms.ValidationError("Debes escribir el nombre/código del local.")
 
-        # 1) Buscar por nombre o por código, ignorando mayúsculas/minúsculas
-        local = Local.objects.filter(nombre__iexact=texto).first()
-        if not local:
-            local = Local.objects.filter(codigo__iexact=texto).first()
-
-        if local:
-            return local
-
-        # 2) No existe -> creamos uno nuevo
-        #    Usamos lo que escribes como código base (ej: 'gd01')
-        codigo_base = texto
-        codigo = codigo_base
-
-        # Evitar romper la restricción UNIQUE de `codigo`
-        contador = 1
-        while Local.objects.filter(codigo__iexact=codigo).exists():
-            contador += 1
-            codigo = f"{codigo_base}-{contador}"
-
-        local = Local.objects.create(
-            nombre=texto,
-            codigo=codigo,
+        # 1) Buscar por nombre o por código en una sola consulta;
+        #    si hay de los dos, gana el que coincide por nombre.
+        candidatos = list(
+            Local.objects
+            .filter(Q(clave_nombre=clave) | Q(clave_codigo=clave))
+            .order_by("id")[:10]
+        )
+        for local in candidatos:
+            if local.clave_nombre == clave:
+                return local
+        if candidatos:
+            return candidatos[0]
+
+        # 2) No existe -> creamos uno nuevo con lo que escribió como código
+        #    (ej: 'gd01'). El índice único de `clave_codigo` hace que, si dos
+        #    digitadores lo escriben a la vez, el segundo reciba el mismo local.
+        local, _creado = Local.objects.get_or_create(
+            clave_codigo=clave,
+            defaults={"codigo": texto, "nombre": texto},
         )
-
         return local
 
     def clean_asignado_a(self):
@@ -105,7 +112,7 @@ class TicketForm(forms.ModelForm):
 
         if tecnico and categoria:
             # Si el técnico NO tiene esa categoría como especialidad => error
-            if not tecnico.especialidades.filter(pk=categoria.pk).exists():
+            if categoria.pk not in categorias_de_tecnico(tecnico):
                 nombre = tecnico.get_full_name() or tecnico.username
                 from django.core.exceptions import ValidationError
 
@@ -162,7 +169,7 @@ class TicketEstadoForm(forms.ModelForm):
         categoria = getattr(self.instance, "categoria", None)
 
         if tecnico and categoria:
-            if not tecnico.especialidades.filter(pk=categoria.pk).exists():
+            if categoria.pk not in categorias_de_tecnico(tecnico):
                 nombre = tecnico.get_full_name() or tecnico.username
                 from django.core.exceptions import ValidationError
 
@@ -0,0 +1,42 @@
+"""
+Mueve al archivo los tickets CERRADO / CANCELADO viejos (con sus comentarios).
+
+Uso:
+    python manage.py archivar_tickets                 # TICKETS_ARCHIVAR_DIAS
+    python manage.py archivar_tickets --dias 365
+    python manage.py archivar_tickets --lote 200 --pausa 0.2
+    python manage.py archivar_tickets --revisar       # solo cuenta
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.tickets.archivo import archivables, archivar
+
+
+class Command(BaseCommand):
+    help = "Archiva los tickets cerrados/cancelados sin cambios desde hace N días."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dias', type=int, default=None,
+                            help='Antigüedad mínima en días (default: TICKETS_ARCHIVAR_DIAS).')
+        parser.add_argument('--lote', type=int, default=500,
+                            help='Tickets por lote / transacción (default 500).')
+        parser.add_argument('--pausa', type=float, default=0,
+                            help='Segundos de espera entre lotes, para dejar pasar otras escrituras.')
+        parser.add_argument('--revisar', action='store_true',
+                            help='Solo mostrar cuántos se archivarían.')
+
+    def handle(self, *args, **options):
+        dias = options['dias']
+        if dias is None:
+            dias = getattr(settings, 'TICKETS_ARCHIVAR_DIAS', 180)
+
+        if options['revisar']:
+            self.stdout.write(f'{archivables(dias).count()} ticket(s) para archivar (más de {dias} días).')
+            return
+
+        def progreso(total):
+            self.stdout.write(f'  {total} archivados...')
+
+        total = archivar(dias, lote=options['lote'], pausa=options['pausa'], progreso=progreso)
+        self.stdout.write(self.style.SUCCESS(f'Listo: {total} ticket(s) archivados (más de {dias} días).'))
@@ -0,0 +1,191 @@
+"""
+Benchmark de las consultas "calientes" de tickets.
+
+Siembra tickets de prueba dentro de una transacción, imprime el plan de
+ejecución (EXPLAIN / EXPLAIN QUERY PLAN) y el tiempo de cada queryset que
+usan tickets_lista, dashboard y reportes_dashboard, y al final deshace todo
+(salvo que se pase --conservar).
+
+Uso:
+    python manage.py benchmark_consultas --tickets 50000 --repeticiones 20
+"""
+import random
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from apps.locales.models import Local
+from apps.tickets.models import (
+    CategoriaAveria, Ticket, ESTADOS_ABIERTOS, ESTADOS_CERRADOS, ESTADOS_SLA_ACTIVO,
+)
+from apps.usuarios.models import Usuario
+
+
+class Command(BaseCommand):
+    help = "Siembra datos y mide el plan y el tiempo de las consultas de tickets."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tickets', type=int, default=20000,
+                            help='Cantidad de tickets a sembrar (default 20000).')
+        parser.add_argument('--locales', type=int, default=300,
+                            help='Cantidad de locales a sembrar (default 300).')
+        parser.add_argument('--repeticiones', type=int, default=10,
+                            help='Veces que se ejecuta cada consulta (default 10).')
+        parser.add_argument('--conservar', action='store_true',
+                            help='No deshacer los datos sembrados al terminar.')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            datos = self._sembrar(options['tickets'], options['locales'])
+
+            if connection.vendor in ('sqlite', 'postgresql'):
+                with connection.cursor() as cursor:
+                    cursor.execute('ANALYZE')
+
+            for nombre, qs, contar in self._consultas(datos):
+                self._medir(nombre, qs, contar, options['repeticiones'])
+
+            if not options['conservar']:
+                transaction.set_rollback(True)
+                self.stdout.write(self.style.WARNING('Datos sembrados descartados (rollback).'))
+
+    # ------------------------------------------------------------------
+    # Siembra
+    # ------------------------------------------------------------------
+    def _sembrar(self, n_tickets, n_locales):
+        self.stdout.write(f'Sembrando {n_locales} locales y {n_tickets} tickets...')
+        sufijo = timezone.now().strftime('%H%M%S')
+
+        categorias = [
+            CategoriaAveria.objects.get_or_create(
+                nombre=f'bench-{nombre}', defaults={'tiempo_sla_horas': horas}
+            )[0]
+            for nombre, horas in [('PC', 4), ('Internet', 8), ('Electrica', 24), ('Letrero', 48)]
+        ]
+
+        locales = Local.objects.bulk_create([
+            Local(
+                codigo=f'b{sufijo}-{i}',
+                nombre=f'Banca bench {i}',
+                direccion='-',
+                provincia=f'Provincia {i % 10}',
+                municipio=f'Municipio {i % 40}',
+            )
+            for i in range(n_locales)
+        ])
+
+        digitador = Usuario.objects.create(username=f'bench-dig-{sufijo}', rol='DIGITADOR')
+        tecnicos = [
+            Usuario.objects.create(username=f'bench-tec-{sufijo}-{i}', rol='TECNICO')
+            for i in range(10)
+        ]
+        for i, tecnico in enumerate(tecnicos):
+            tecnico.especialidades.set(categorias[i % 2:i % 2 + 2])
+
+        ahora = timezone.now()
+        estados = ['PENDIENTE', 'EN_PROCESO', 'RESUELTO', 'CERRADO', 'CERRADO', 'CERRADO', 'CANCELADO']
+        base = Ticket.objects.count()
+        lote = []
+        for i in range(n_tickets):
+            categoria = random.choice(categorias)
+            creado = ahora - timedelta(minutes=random.randint(0, 60 * 24 * 365))
+            estado = random.choice(estados)
+            lote.append(Ticket(
+                numero_ticket=f'BENCH-{sufijo}-{base + i}',
+                local=random.choice(locales),
+                categoria=categoria,
+                titulo='bench',
+                descripcion='bench',
+                estado=estado,
+                creado_por=digitador,
+                asignado_a=random.choice(tecnicos + [None]),
+                fecha_limite_sla=creado + timedelta(hours=categoria.tiempo_sla_horas),
+                fecha_cierre=creado + timedelta(hours=random.randint(1, 72)) if estado == 'CERRADO' else None,
+            ))
+            if len(lote) >= 2000:
+                Ticket.objects.bulk_create(lote)
+                lote = []
+        if lote:
+            Ticket.objects.bulk_create(lote)
+
+        # auto_now_add pisa fecha_creacion en bulk_create: la recuperamos
+        # a partir del límite SLA para repartir los tickets en el último año.
+        for categoria in categorias:
+            Ticket.objects.filter(
+                numero_ticket__startswith=f'BENCH-{sufijo}-', categoria=categoria,
+            ).update(
+                fecha_creacion=F('fecha_limite_sla') - timedelta(hours=categoria.tiempo_sla_horas),
+            )
+
+        return {
+            'ahora': ahora,
+            'digitador': digitador,
+            'tecnico': tecnicos[0],
+            'categorias': tecnicos[0].especialidades.all(),
+        }
+
+    # ------------------------------------------------------------------
+    # Consultas de las vistas
+    # ------------------------------------------------------------------
+    def _consultas(self, datos):
+        ahora = datos['ahora']
+        tecnico = datos['tecnico']
+        base = Ticket.objects.select_related('local', 'categoria', 'asignado_a')
+        orden = ('-fecha_creacion', '-id')
+
+        # Mismos filtros que tickets_lista (y que los índices parciales)
+        abiertos_lista = base.filter(estado__in=ESTADOS_SLA_ACTIVO)
+        yield 'tickets_lista admin abiertos', abiertos_lista.order_by(*orden)[:51], False
+        yield 'tickets_lista admin cerrados', base.filter(estado__in=ESTADOS_CERRADOS).order_by(*orden)[:51], False
+        yield 'tickets_lista admin todos', base.order_by(*orden)[:51], False
+        yield 'tickets_lista digitador', base.filter(creado_por=datos['digitador']).order_by(*orden)[:51], False
+        yield 'tickets_lista tecnico', abiertos_lista.filter(
+            Q(asignado_a=tecnico) | Q(asignado_a__isnull=True, categoria__in=datos['categorias'])
+        ).order_by(*orden)[:51], False
+
+        abiertos = Ticket.objects.filter(estado__in=ESTADOS_ABIERTOS)
+        yield 'dashboard abiertos (count)', abiertos, True
+        yield 'dashboard vencidos (count)', abiertos.filter(fecha_limite_sla__lt=ahora), True
+        yield 'dashboard top 50 por SLA', abiertos.select_related(
+            'local', 'categoria', 'asignado_a', 'creado_por'
+        ).order_by('fecha_limite_sla', '-fecha_creacion')[:50], False
+
+        desde = ahora - timedelta(days=90)
+        yield 'reportes cerrados 90 dias', Ticket.objects.filter(
+            fecha_creacion__gte=desde, estado__in=['RESUELTO', 'CERRADO']
+        ).values('local_id').annotate(total=Count('id')), False
+        yield 'reportes abiertos por local', abiertos.values('local_id').annotate(
+            abiertos=Count('id'),
+            vencidos=Count('id', filter=Q(fecha_limite_sla__lt=ahora)),
+        ), False
+        yield 'reportes top tecnicos', Ticket.objects.filter(
+            estado='CERRADO', asignado_a__rol='TECNICO'
+        ).values('asignado_a__id').annotate(total=Count('id')).order_by('-total')[:10], False
+
+    def _medir(self, nombre, qs, contar, repeticiones):
+        self.stdout.write(self.style.MIGRATE_HEADING(f'\n== {nombre}'))
+        if contar:
+            # count() no tiene explain(): mostramos el plan del filtro.
+            self.stdout.write(qs.order_by().values('id').explain())
+        else:
+            self.stdout.write(qs.explain())
+
+        tiempos = []
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            if contar:
+                qs.count()
+            else:
+                list(qs.all())
+            tiempos.append(time.perf_counter() - inicio)
+
+        tiempos.sort()
+        mediana = tiempos[len(tiempos) // 2] * 1000
+        self.stdout.write(
+            f'   mediana {mediana:.2f} ms | min {tiempos[0] * 1000:.2f} ms | '
+            f'max {tiempos[-1] * 1000:.2f} ms ({repeticiones} repeticiones)'
+        )
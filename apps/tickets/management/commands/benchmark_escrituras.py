@@ -0,0 +1,246 @@
+"""
+Benchmark de contención de escritura en SQLite.
+
+Lanza N escritores concurrentes (hilos, cada uno con su conexión) contra
+un archivo SQLite descartable y mide transacciones por segundo, latencia
+y errores "database is locked" con cada perfil de conexión:
+
+- `defecto`: lo que hace Django sin configurar (journal DELETE,
+  synchronous FULL, BEGIN DEFERRED, timeout de 5 s de sqlite3).
+- `configurado`: SQLITE_OPCIONES de settings, con los `--pragma` y
+  `--modo` que se pasen encima (para probar valores antes de cambiarlos).
+
+Cada transacción imita el alta de un ticket: lee el local, incrementa la
+secuencia de números, inserta el ticket y su transición y suma a los
+contadores del local y al resumen del día (filas "calientes" que todos
+los escritores tocan). No usa las tablas reales: se puede correr en
+producción sin tocar la base. Con --directorio se elige el disco (el
+sistema de archivos importa: WAL necesita memoria compartida).
+
+Uso:
+    python manage.py benchmark_escrituras
+    python manage.py benchmark_escrituras --escritores 16 --transacciones 300
+    python manage.py benchmark_escrituras --perfiles configurado --pragma synchronous=FULL
+    python manage.py benchmark_escrituras --modo DEFERRED --pragma busy_timeout=2000
+"""
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from config.sqlite.base import MODOS_TRANSACCION, aplicar_pragmas, modo_transaccion
+
+
+PERFIL_DEFECTO = {
+    'transaction_mode': 'DEFERRED',
+    'pragmas': {'journal_mode': 'DELETE', 'synchronous': 'FULL'},
+}
+
+ESQUEMA = """
+CREATE TABLE secuencia (nombre TEXT PRIMARY KEY, valor INTEGER NOT NULL);
+CREATE TABLE local (
+    id INTEGER PRIMARY KEY, codigo TEXT NOT NULL, provincia TEXT NOT NULL,
+    contador_abiertos INTEGER NOT NULL DEFAULT 0, contador_mes INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE ticket (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, numero_ticket TEXT NOT NULL UNIQUE,
+    local_id INTEGER NOT NULL REFERENCES local (id), estado TEXT NOT NULL,
+    descripcion TEXT NOT NULL, fecha_creacion REAL NOT NULL, fecha_limite_sla REAL NOT NULL
+);
+CREATE INDEX ticket_estado_fecha ON ticket (estado, fecha_creacion, id);
+CREATE INDEX ticket_local ON ticket (local_id, estado);
+CREATE TABLE transicion (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, ticket_id INTEGER NOT NULL,
+    estado_nuevo TEXT NOT NULL, fecha REAL NOT NULL
+);
+CREATE INDEX transicion_ticket_fecha ON transicion (ticket_id, fecha, id);
+CREATE TABLE resumen (
+    dia TEXT NOT NULL, local_id INTEGER NOT NULL, creados INTEGER NOT NULL,
+    PRIMARY KEY (dia, local_id)
+);
+"""
+
+
+class Command(BaseCommand):
+    help = "Mide el rendimiento de escrituras concurrentes en SQLite con cada perfil de conexión."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--escritores', type=int, default=8,
+                            help='Escritores concurrentes (default 8).')
+        parser.add_argument('--transacciones', type=int, default=200,
+                            help='Transacciones por escritor (default 200).')
+        parser.add_argument('--locales', type=int, default=20,
+                            help='Locales entre los que se reparten las altas (default 20).')
+        parser.add_argument('--perfiles', default='defecto,configurado',
+                            help='Perfiles a medir, separados por coma (default: defecto,configurado).')
+        parser.add_argument('--pragma', action='append', default=[], metavar='NOMBRE=VALOR',
+                            help='PRAGMA que pisa al de settings en el perfil configurado (repetible).')
+        parser.add_argument('--modo', choices=MODOS_TRANSACCION, default=None,
+                            help='transaction_mode del perfil configurado (default: el de settings).')
+        parser.add_argument('--directorio', default=None,
+                            help='Dónde crear la base descartable (default: directorio temporal).')
+
+    def handle(self, *args, **options):
+        perfiles = {}
+        for nombre in [p.strip() for p in options['perfiles'].split(',') if p.strip()]:
+            if nombre == 'defecto':
+                perfiles[nombre] = PERFIL_DEFECTO
+            elif nombre == 'configurado':
+                perfiles[nombre] = self._configurado(options['pragma'], options['modo'])
+            else:
+                raise CommandError(f"Perfil desconocido: {nombre!r} (usar defecto / configurado).")
+
+        directorio = tempfile.mkdtemp(prefix='bench-sqlite-', dir=options['directorio'])
+        try:
+            resultados = []
+            for nombre, perfil in perfiles.items():
+                self.stdout.write(self.style.MIGRATE_HEADING(f'\n== {nombre}'))
+                self.stdout.write(
+                    f"   BEGIN {modo_transaccion(perfil)} | "
+                    + ', '.join(f'{k}={v}' for k, v in perfil.get('pragmas', {}).items())
+                )
+                ruta = os.path.join(directorio, f'{nombre}.sqlite3')
+                self._preparar(ruta, perfil, options['locales'])
+                resultado = self._medir(ruta, perfil, options['escritores'], options['transacciones'],
+                                        options['locales'])
+                resultados.append((nombre, resultado))
+                self._mostrar(resultado)
+        finally:
+            shutil.rmtree(directorio, ignore_errors=True)
+
+        if len(resultados) > 1 and resultados[0][1]['tps']:
+            base_nombre, base = resultados[0]
+            for nombre, resultado in resultados[1:]:
+                self.stdout.write(self.style.SUCCESS(
+                    f'\n{nombre}: {resultado["tps"] / base["tps"]:.1f}x las transacciones/s de {base_nombre}'
+                ))
+
+    # ------------------------------------------------------------------
+    # Perfiles y base descartable
+    # ------------------------------------------------------------------
+    def _configurado(self, pragmas, modo):
+        opciones = getattr(settings, 'SQLITE_OPCIONES', None) or settings.DATABASES['default'].get('OPTIONS', {})
+        perfil = {
+            'transaction_mode': modo or opciones.get('transaction_mode', 'DEFERRED'),
+            'pragmas': dict(opciones.get('pragmas', {})),
+        }
+        for texto in pragmas:
+            nombre, separador, valor = texto.partition('=')
+            if not separador:
+                raise CommandError(f'--pragma espera NOMBRE=VALOR (se recibió {texto!r}).')
+            perfil['pragmas'][nombre.strip()] = valor.strip()
+        return perfil
+
+    def _conectar(self, ruta, perfil):
+        # timeout=5 es el default de sqlite3 (y de Django); busy_timeout lo pisa
+        conexion = sqlite3.connect(ruta, timeout=5, isolation_level=None, check_same_thread=False)
+        conexion.execute('PRAGMA foreign_keys = ON')
+        aplicar_pragmas(conexion, perfil.get('pragmas'))
+        return conexion
+
+    def _preparar(self, ruta, perfil, n_locales):
+        conexion = self._conectar(ruta, perfil)
+        conexion.executescript(ESQUEMA)
+        conexion.execute("INSERT INTO secuencia VALUES ('numero_ticket', 0)")
+        conexion.executemany(
+            'INSERT INTO local (id, codigo, provincia) VALUES (?, ?, ?)',
+            [(i, f'b{i}', f'Provincia {i % 10}') for i in range(1, n_locales + 1)],
+        )
+        conexion.close()
+
+    # ------------------------------------------------------------------
+    # Medición
+    # ------------------------------------------------------------------
+    def _medir(self, ruta, perfil, n_escritores, n_transacciones, n_locales):
+        modo = modo_transaccion(perfil)
+        barrera = threading.Barrier(n_escritores + 1)
+        latencias, errores = [], []
+        lock = threading.Lock()
+
+        def escritor(numero):
+            conexion = self._conectar(ruta, perfil)
+            propias, fallidas = [], 0
+            barrera.wait()
+            for i in range(n_transacciones):
+                local_id = (numero * n_transacciones + i) % n_locales + 1
+                inicio = time.perf_counter()
+                try:
+                    self._alta(conexion, modo, local_id)
+                except sqlite3.OperationalError:
+                    # Como una petición que responde 500: sin reintento
+                    if conexion.in_transaction:
+                        conexion.execute('ROLLBACK')
+                    fallidas += 1
+                else:
+                    propias.append(time.perf_counter() - inicio)
+            conexion.close()
+            with lock:
+                latencias.extend(propias)
+                errores.append(fallidas)
+
+        hilos = [threading.Thread(target=escritor, args=(n,)) for n in range(n_escritores)]
+        for hilo in hilos:
+            hilo.start()
+        barrera.wait()
+        inicio = time.perf_counter()
+        for hilo in hilos:
+            hilo.join()
+        duracion = time.perf_counter() - inicio
+
+        latencias.sort()
+
+        def percentil(p):
+            return latencias[min(len(latencias) - 1, int(len(latencias) * p))] * 1000 if latencias else 0
+
+        return {
+            'confirmadas': len(latencias),
+            'fallidas': sum(errores),
+            'duracion': duracion,
+            'tps': len(latencias) / duracion if duracion else 0,
+            'p50': percentil(0.50),
+            'p95': percentil(0.95),
+            'p99': percentil(0.99),
+        }
+
+    def _alta(self, conexion, modo, local_id):
+        ahora = time.time()
+        conexion.execute(f'BEGIN {modo}')
+        # Lectura antes de escribir, como hace la vista (local, categoría)
+        provincia, = conexion.execute('SELECT provincia FROM local WHERE id = ?', (local_id,)).fetchone()
+        conexion.execute("UPDATE secuencia SET valor = valor + 1 WHERE nombre = 'numero_ticket'")
+        numero, = conexion.execute("SELECT valor FROM secuencia WHERE nombre = 'numero_ticket'").fetchone()
+        ticket_id = conexion.execute(
+            'INSERT INTO ticket (numero_ticket, local_id, estado, descripcion, fecha_creacion, fecha_limite_sla) '
+            "VALUES (?, ?, 'PENDIENTE', ?, ?, ?)",
+            (f'TKT-{numero:06d}', local_id, f'Avería en {provincia}', ahora, ahora + 4 * 3600),
+        ).lastrowid
+        conexion.execute(
+            "INSERT INTO transicion (ticket_id, estado_nuevo, fecha) VALUES (?, 'PENDIENTE', ?)",
+            (ticket_id, ahora),
+        )
+        conexion.execute(
+            'UPDATE local SET contador_abiertos = contador_abiertos + 1, contador_mes = contador_mes + 1 '
+            'WHERE id = ?', (local_id,),
+        )
+        conexion.execute(
+            'INSERT INTO resumen (dia, local_id, creados) VALUES (date(?, \'unixepoch\'), ?, 1) '
+            'ON CONFLICT (dia, local_id) DO UPDATE SET creados = creados + 1',
+            (ahora, local_id),
+        )
+        conexion.execute('COMMIT')
+
+    def _mostrar(self, r):
+        total = r['confirmadas'] + r['fallidas']
+        estilo = self.style.ERROR if r['fallidas'] else self.style.SUCCESS
+        self.stdout.write(
+            f"   {r['tps']:.0f} transacciones/s | {r['confirmadas']}/{total} confirmadas en {r['duracion']:.2f} s"
+        )
+        self.stdout.write(estilo(f"   {r['fallidas']} con \"database is locked\""))
+        self.stdout.write(
+            f"   latencia p50 {r['p50']:.2f} ms | p95 {r['p95']:.2f} ms | p99 {r['p99']:.2f} ms"
+        )
@@ -0,0 +1,55 @@
+"""
+Worker de la bandeja de salida de notificaciones.
+
+Uso:
+    python manage.py procesar_notificaciones              # una pasada
+    python manage.py procesar_notificaciones --continuo   # bucle (tarea "always-on")
+    python manage.py procesar_notificaciones --reintentar-fallidas
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.utils import timezone
+
+from apps.tickets.models import NotificacionSaliente
+from apps.tickets.notificaciones import procesar_pendientes
+
+
+class Command(BaseCommand):
+    help = "Envía las notificaciones pendientes de la bandeja de salida (WhatsApp / FCM)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=50,
+                            help='Máximo de notificaciones por pasada (default 50).')
+        parser.add_argument('--continuo', action='store_true',
+                            help='No terminar: seguir procesando cada --intervalo segundos.')
+        parser.add_argument('--intervalo', type=float, default=5,
+                            help='Segundos de espera entre pasadas sin trabajo (default 5).')
+        parser.add_argument('--reintentar-fallidas', action='store_true',
+                            help='Devuelve las notificaciones FALLIDAS a PENDIENTE antes de procesar.')
+
+    def handle(self, *args, **options):
+        if options['reintentar_fallidas']:
+            n = NotificacionSaliente.objects.filter(estado='FALLIDA').update(
+                estado='PENDIENTE', intentos=0, proximo_intento=timezone.now(),
+            )
+            self.stdout.write(f'{n} notificación(es) fallida(s) devueltas a la cola.')
+
+        while True:
+            close_old_connections()
+            resultado = procesar_pendientes(lote=options['lote'])
+            procesadas = sum(resultado.values())
+
+            if procesadas:
+                self.stdout.write(
+                    f"[{timezone.now():%Y-%m-%d %H:%M:%S}] enviadas={resultado['enviadas']} "
+                    f"reintentos={resultado['reintentos']} fallidas={resultado['fallidas']}"
+                )
+
+            if not options['continuo']:
+                break
+
+            # Si el lote salió lleno probablemente queda más trabajo: no dormir.
+            if procesadas < options['lote']:
+                time.sleep(options['intervalo'])
@@ -0,0 +1,59 @@
+"""
+Programador de avisos de SLA (por vencer / vencido).
+
+Uso:
+    python manage.py programador_sla              # proceso continuo ("always-on")
+    python manage.py programador_sla --una-vez    # una pasada (para cron)
+
+Los avisos se encolan en la bandeja de salida; los envía
+`manage.py procesar_notificaciones`.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.utils import timezone
+
+from apps.tickets.programador_sla import ProgramadorSLA, cargar, emitir, refrescar
+
+
+class Command(BaseCommand):
+    help = "Encola avisos de SLA por vencer / vencido usando un min-heap de vencimientos."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--una-vez', action='store_true',
+                            help='Emitir lo que ya venció y terminar.')
+        parser.add_argument('--intervalo', type=float, default=30,
+                            help='Máximo de segundos entre revisiones de tickets cambiados (default 30).')
+        parser.add_argument('--aviso', type=float, default=None,
+                            help='Porcentaje del plazo para el aviso "por vencer" '
+                                 '(default SLA_AVISO_PORCENTAJE = 75).')
+
+    def handle(self, *args, **options):
+        programador = ProgramadorSLA(porcentaje_aviso=options['aviso'])
+        cargar(programador)
+        self.stdout.write(f'{len(programador)} ticket(s) con SLA activo en el programador.')
+
+        while True:
+            close_old_connections()
+            ahora = timezone.now()
+            refrescar(programador, ahora)
+
+            eventos = emitir(programador, ahora)
+            if eventos:
+                avisos = sum(1 for _, tipo in eventos if tipo == 'PUSH_SLA_AVISO')
+                self.stdout.write(
+                    f"[{timezone.localtime(ahora):%Y-%m-%d %H:%M:%S}] "
+                    f"por vencer={avisos} vencidos={len(eventos) - avisos}"
+                )
+
+            if options['una_vez']:
+                break
+
+            # Dormir hasta el próximo evento, pero sin pasar de --intervalo
+            # para enterarnos de tickets nuevos o cambiados.
+            espera = options['intervalo']
+            proximo = programador.proximo()
+            if proximo is not None:
+                espera = min(espera, max((proximo - timezone.now()).total_seconds(), 0))
+            time.sleep(espera)
@@ -0,0 +1,78 @@
+"""
+Recalcula la fecha límite SLA de los tickets pendientes / en proceso.
+
+Uso:
+    python manage.py recalcular_sla                    # todas las categorías
+    python manage.py recalcular_sla --categoria 3
+    python manage.py recalcular_sla --lote 200 --pausa 0.1
+    python manage.py recalcular_sla --pendientes       # los encolados al cambiar una categoría
+    python manage.py recalcular_sla --pendientes --continuo
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from apps.tickets.models import CategoriaAveria
+from apps.tickets.recalculo_sla import procesar_pendientes, recalcular_limites
+
+
+class Command(BaseCommand):
+    help = "Recalcula fecha_limite_sla (horario laboral) de los tickets con SLA activo, por lotes."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--categoria', type=int, default=None,
+                            help='Id de la categoría (default: todas).')
+        parser.add_argument('--lote', type=int, default=500,
+                            help='Tickets por lote / transacción (default 500).')
+        parser.add_argument('--pausa', type=float, default=0,
+                            help='Segundos de espera entre lotes, para dejar pasar otras escrituras.')
+        parser.add_argument('--pendientes', action='store_true',
+                            help='Procesar la cola de recálculos (RecalculoSLA) en vez de recalcular todo.')
+        parser.add_argument('--continuo', action='store_true',
+                            help='Con --pendientes: no terminar, revisar la cola cada --intervalo segundos.')
+        parser.add_argument('--intervalo', type=float, default=30,
+                            help='Segundos entre revisiones de la cola (default 30).')
+
+    def handle(self, *args, **options):
+        if options['pendientes']:
+            return self._procesar_cola(options)
+
+        categoria_id = options['categoria']
+        if categoria_id and not CategoriaAveria.objects.filter(pk=categoria_id).exists():
+            raise CommandError(f'No existe la categoría {categoria_id}.')
+
+        def progreso(procesados, cambiados):
+            self.stdout.write(f'  {procesados} revisados, {cambiados} con nuevo límite...')
+
+        procesados, cambiados = recalcular_limites(
+            categoria_id,
+            lote=options['lote'],
+            pausa=options['pausa'],
+            progreso=progreso,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Listo: {procesados} ticket(s) revisados, {cambiados} actualizados.'
+        ))
+
+    def _procesar_cola(self, options):
+        def progreso(recalculo):
+            self.stdout.write(
+                f'  [{recalculo.pk}] {recalculo.categoria or "todas"}: '
+                f'{recalculo.procesados} revisados, {recalculo.cambiados} con nuevo límite...'
+            )
+
+        while True:
+            close_old_connections()
+            for recalculo in procesar_pendientes(
+                lote=options['lote'], pausa=options['pausa'], progreso=progreso,
+            ):
+                estilo = self.style.SUCCESS if recalculo.estado == 'TERMINADO' else self.style.ERROR
+                self.stdout.write(estilo(
+                    f'[{recalculo.pk}] {recalculo.get_estado_display()}: '
+                    f'{recalculo.procesados} revisados, {recalculo.cambiados} actualizados.'
+                    + (f' {recalculo.ultimo_error}' if recalculo.ultimo_error else '')
+                ))
+            if not options['continuo']:
+                break
+            time.sleep(options['intervalo'])
@@ -0,0 +1,33 @@
+"""
+Recalcula los contadores de tickets de locales y técnicos y muestra las
+diferencias con los guardados.
+
+Uso:
+    python manage.py reconciliar_contadores            # revisa y corrige
+    python manage.py reconciliar_contadores --revisar  # solo informa
+"""
+from django.core.management.base import BaseCommand
+
+from apps.tickets.contadores import reconciliar
+
+
+class Command(BaseCommand):
+    help = "Recalcula Local.contador_* y Usuario.contador_abiertos desde la tabla de tickets."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--revisar', action='store_true',
+                            help='Solo informar las diferencias, sin corregirlas.')
+
+    def handle(self, *args, **options):
+        corregir = not options['revisar']
+        diferencias = reconciliar(corregir=corregir)
+
+        for objeto, campo, guardado, real in diferencias:
+            self.stdout.write(f'  {objeto}: {campo} {guardado} -> {real}')
+
+        if not diferencias:
+            self.stdout.write(self.style.SUCCESS('Contadores al día, sin diferencias.'))
+        elif corregir:
+            self.stdout.write(self.style.SUCCESS(f'{len(diferencias)} contador(es) corregidos.'))
+        else:
+            self.stdout.write(self.style.WARNING(f'{len(diferencias)} contador(es) con diferencias.'))
@@ -0,0 +1,28 @@
+"""
+Rehace el índice de búsqueda de texto completo de tickets.
+
+Uso:
+    python manage.py reconstruir_busqueda
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.tickets.busqueda import fts_disponible, reconstruir_indice
+
+
+class Command(BaseCommand):
+    help = "Reconstruye la tabla FTS5 de búsqueda de tickets (solo SQLite)."
+
+    def handle(self, *args, **options):
+        if not fts_disponible():
+            self.stdout.write('La base de datos no es SQLite: la búsqueda usa icontains, nada que hacer.')
+            return
+
+        inicio = time.perf_counter()
+        with transaction.atomic():
+            n = reconstruir_indice()
+        self.stdout.write(self.style.SUCCESS(
+            f'{n} ticket(s) indexados en {time.perf_counter() - inicio:.1f}s.'
+        ))
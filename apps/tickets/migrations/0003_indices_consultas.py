@@ -0,0 +1,37 @@
+# Generated by Django 4.2.7 on 2026-10-16 20:40
+
+from django.db import migrations, models
+
+
+# Los índices parciales de PostgreSQL están declarados en Ticket.Meta
+# (migración 0014).
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['-fecha_creacion', '-id'], name='tkt_fecha_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['estado', '-fecha_creacion'], name='tkt_estado_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['creado_por', '-fecha_creacion', '-id'], name='tkt_creado_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['asignado_a', 'estado'], name='tkt_asignado_estado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['estado', 'fecha_limite_sla'], name='tkt_estado_sla_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.7 on 2026-10-16 20:41
+
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def crear_secuencia_tickets(apps, schema_editor):
+    # Arranca donde lo dejaba el antiguo Max('id') de Ticket.save()
+    Secuencia = apps.get_model('tickets', 'Secuencia')
+    Ticket = apps.get_model('tickets', 'Ticket')
+    ultimo = Ticket.objects.aggregate(m=Max('id'))['m'] or 0
+    Secuencia.objects.get_or_create(nombre='numero_ticket', defaults={'valor': ultimo})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0003_indices_consultas'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Secuencia',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(max_length=50, unique=True, verbose_name='Nombre')),
+                ('valor', models.BigIntegerField(default=0, verbose_name='Último valor entregado')),
+            ],
+            options={
+                'verbose_name': 'Secuencia',
+                'verbose_name_plural': 'Secuencias',
+            },
+        ),
+        migrations.RunPython(crear_secuencia_tickets, migrations.RunPython.noop),
+    ]
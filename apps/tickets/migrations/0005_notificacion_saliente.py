@@ -0,0 +1,35 @@
+# Generated by Django 4.2.7 on 2026-10-16 20:42
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0004_secuencia_numero_ticket'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificacionSaliente',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('WHATSAPP_ASIGNADO', 'WhatsApp al técnico asignado'), ('PUSH_NUEVO_TICKET', 'Push FCM de nuevo ticket')], max_length=30, verbose_name='Tipo')),
+                ('estado', models.CharField(choices=[('PENDIENTE', 'Pendiente'), ('ENVIADA', 'Enviada'), ('FALLIDA', 'Fallida (sin más reintentos)')], default='PENDIENTE', max_length=20, verbose_name='Estado')),
+                ('intentos', models.PositiveIntegerField(default=0, verbose_name='Intentos')),
+                ('proximo_intento', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Próximo intento')),
+                ('ultimo_error', models.TextField(blank=True, null=True, verbose_name='Último error')),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de creación')),
+                ('fecha_envio', models.DateTimeField(blank=True, null=True, verbose_name='Fecha de envío')),
+                ('ticket', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notificaciones', to='tickets.ticket', verbose_name='Ticket')),
+            ],
+            options={
+                'verbose_name': 'Notificación saliente',
+                'verbose_name_plural': 'Notificaciones salientes',
+                'ordering': ['proximo_intento'],
+                'indexes': [models.Index(fields=['estado', 'proximo_intento'], name='notif_estado_proximo_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,48 @@
+from django.db import migrations
+
+
+# Tabla FTS5 de búsqueda (ver apps/tickets/busqueda.py). Solo en SQLite;
+# en otros motores la búsqueda usa icontains.
+CREAR = """
+    CREATE VIRTUAL TABLE IF NOT EXISTS tickets_busqueda USING fts5(
+        numero, titulo, local, descripcion, solucion, comentarios,
+        tokenize = 'unicode61 remove_diacritics 2'
+    )
+"""
+
+LLENAR = """
+    INSERT INTO tickets_busqueda
+        (rowid, numero, titulo, local, descripcion, solucion, comentarios)
+    SELECT t.id, t.numero_ticket, t.titulo, l.codigo || ' ' || l.nombre,
+           t.descripcion, COALESCE(t.solucion, ''),
+           COALESCE((SELECT group_concat(c.comentario, ' ')
+                     FROM tickets_comentarioticket c
+                     WHERE c.ticket_id = t.id), '')
+    FROM tickets_ticket t
+    JOIN locales_local l ON l.id = t.local_id
+"""
+
+
+def crear_tabla_busqueda(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(CREAR)
+    schema_editor.execute(LLENAR)
+
+
+def borrar_tabla_busqueda(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute('DROP TABLE IF EXISTS tickets_busqueda')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0005_notificacion_saliente'),
+        ('locales', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_tabla_busqueda, borrar_tabla_busqueda),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.7 on 2026-10-16 20:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0006_busqueda_fts'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='notificacionsaliente',
+            name='tipo',
+            field=models.CharField(choices=[('WHATSAPP_ASIGNADO', 'WhatsApp al técnico asignado'), ('PUSH_NUEVO_TICKET', 'Push FCM de nuevo ticket'), ('PUSH_SLA_AVISO', 'Push FCM: SLA por vencer'), ('PUSH_SLA_VENCIDO', 'Push FCM: SLA vencido')], max_length=30, verbose_name='Tipo'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['fecha_actualizacion'], name='tkt_actualizacion_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='notificacionsaliente',
+            constraint=models.UniqueConstraint(condition=models.Q(('tipo__in', ['PUSH_SLA_AVISO', 'PUSH_SLA_VENCIDO'])), fields=('ticket', 'tipo'), name='notif_sla_unica'),
+        ),
+    ]
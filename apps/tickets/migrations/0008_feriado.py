@@ -0,0 +1,31 @@
+# Generated by Django 4.2.7 on 2026-10-16 21:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0007_programador_sla'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Feriado',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField(verbose_name='Fecha')),
+                ('nombre', models.CharField(max_length=100, verbose_name='Nombre')),
+                ('provincia', models.CharField(blank=True, default='', help_text='Vacío = feriado nacional. Debe coincidir con la provincia del local.', max_length=100, verbose_name='Provincia')),
+            ],
+            options={
+                'verbose_name': 'Feriado',
+                'verbose_name_plural': 'Feriados',
+                'ordering': ['fecha'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='feriado',
+            constraint=models.UniqueConstraint(fields=('fecha', 'provincia'), name='feriado_fecha_provincia_unico'),
+        ),
+    ]
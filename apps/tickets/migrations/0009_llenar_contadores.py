@@ -0,0 +1,41 @@
+from datetime import datetime, time
+
+from django.db import migrations
+from django.db.models import Count
+from django.utils import timezone
+
+
+# Copia de ESTADOS_SLA_ACTIVO al momento de esta migración
+ABIERTOS = ['PENDIENTE', 'EN_PROCESO']
+
+
+def llenar_contadores(apps, schema_editor):
+    Ticket = apps.get_model('tickets', 'Ticket')
+    Local = apps.get_model('locales', 'Local')
+    Usuario = apps.get_model('usuarios', 'Usuario')
+
+    mes = timezone.localdate().replace(day=1)
+    inicio_mes = timezone.make_aware(datetime.combine(mes, time.min))
+    abiertos = Ticket.objects.filter(estado__in=ABIERTOS)
+
+    for local_id, n in abiertos.values('local_id').annotate(n=Count('id')).values_list('local_id', 'n'):
+        Local.objects.filter(pk=local_id).update(contador_abiertos=n)
+    del_mes = Ticket.objects.filter(fecha_creacion__gte=inicio_mes)
+    for local_id, n in del_mes.values('local_id').annotate(n=Count('id')).values_list('local_id', 'n'):
+        Local.objects.filter(pk=local_id).update(contador_mes=n, contador_mes_inicio=mes)
+    asignados = abiertos.filter(asignado_a__isnull=False)
+    for usuario_id, n in asignados.values('asignado_a_id').annotate(n=Count('id')).values_list('asignado_a_id', 'n'):
+        Usuario.objects.filter(pk=usuario_id).update(contador_abiertos=n)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0008_feriado'),
+        ('locales', '0003_contadores_tickets'),
+        ('usuarios', '0004_contador_abiertos'),
+    ]
+
+    operations = [
+        migrations.RunPython(llenar_contadores, migrations.RunPython.noop),
+    ]
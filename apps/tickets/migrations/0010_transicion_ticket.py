@@ -0,0 +1,91 @@
+# Generated by Django 4.2.7 on 2026-10-16 21:09
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def reconstruir_historial(apps, schema_editor):
+    """
+    Historial aproximado de los tickets existentes a partir de sus fechas:
+    alta, asignación, resolución, cierre y, si el estado actual no sale de
+    ahí (EN_PROCESO, CANCELADO...), un último cambio en fecha_actualizacion.
+    """
+    Ticket = apps.get_model('tickets', 'Ticket')
+    TransicionTicket = apps.get_model('tickets', 'TransicionTicket')
+
+    lote = []
+    campos = (
+        'id', 'estado', 'asignado_a_id', 'categoria_id', 'fecha_creacion',
+        'fecha_asignacion', 'fecha_resolucion', 'fecha_cierre', 'fecha_actualizacion',
+    )
+    for t in Ticket.objects.order_by('id').values(*campos).iterator(chunk_size=2000):
+        creacion = t['fecha_creacion']
+        eventos = []
+        if t['fecha_asignacion'] and t['asignado_a_id']:
+            eventos.append((t['fecha_asignacion'], None, t['asignado_a_id']))
+        if t['fecha_resolucion']:
+            eventos.append((t['fecha_resolucion'], 'RESUELTO', None))
+        if t['fecha_cierre']:
+            eventos.append((t['fecha_cierre'], 'CERRADO', None))
+        # El alta primero, aunque alguna fecha haya quedado un poco antes
+        eventos = [(creacion, 'PENDIENTE', None)] + sorted(
+            ((max(fecha, creacion), estado, tecnico) for fecha, estado, tecnico in eventos),
+            key=lambda e: e[0],
+        )
+
+        estado, tecnico = '', None
+        for fecha, nuevo_estado, nuevo_tecnico in eventos:
+            anterior, tecnico_anterior = estado, tecnico
+            estado = nuevo_estado or estado
+            tecnico = nuevo_tecnico or tecnico
+            lote.append(TransicionTicket(
+                ticket_id=t['id'], estado_anterior=anterior, estado_nuevo=estado,
+                tecnico_anterior_id=tecnico_anterior, tecnico_id=tecnico,
+                categoria_id=t['categoria_id'], fecha=fecha,
+            ))
+        if (estado, tecnico) != (t['estado'], t['asignado_a_id']):
+            lote.append(TransicionTicket(
+                ticket_id=t['id'], estado_anterior=estado, estado_nuevo=t['estado'],
+                tecnico_anterior_id=tecnico, tecnico_id=t['asignado_a_id'],
+                categoria_id=t['categoria_id'],
+                fecha=max(t['fecha_actualizacion'], eventos[-1][0]),
+            ))
+
+        if len(lote) >= 2000:
+            TransicionTicket.objects.bulk_create(lote)
+            lote = []
+    TransicionTicket.objects.bulk_create(lote)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('tickets', '0009_llenar_contadores'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TransicionTicket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('estado_anterior', models.CharField(blank=True, choices=[('PENDIENTE', 'Pendiente'), ('EN_PROCESO', 'En Proceso'), ('RESUELTO', 'Resuelto'), ('CERRADO', 'Cerrado'), ('CANCELADO', 'Cancelado')], help_text='Vacío = alta del ticket', max_length=20, verbose_name='Estado anterior')),
+                ('estado_nuevo', models.CharField(choices=[('PENDIENTE', 'Pendiente'), ('EN_PROCESO', 'En Proceso'), ('RESUELTO', 'Resuelto'), ('CERRADO', 'Cerrado'), ('CANCELADO', 'Cancelado')], max_length=20, verbose_name='Estado nuevo')),
+                ('fecha', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Fecha')),
+                ('actor', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Hecho por')),
+                ('categoria', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to='tickets.categoriaaveria', verbose_name='Categoría')),
+                ('tecnico', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='transiciones_tickets', to=settings.AUTH_USER_MODEL, verbose_name='Técnico asignado')),
+                ('tecnico_anterior', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Técnico anterior')),
+                ('ticket', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='transiciones', to='tickets.ticket', verbose_name='Ticket')),
+            ],
+            options={
+                'verbose_name': 'Transición de ticket',
+                'verbose_name_plural': 'Transiciones de tickets',
+                'ordering': ['fecha', 'id'],
+                'indexes': [models.Index(fields=['ticket', 'fecha', 'id'], name='trans_ticket_fecha_idx'), models.Index(fields=['fecha'], name='trans_fecha_idx'), models.Index(fields=['tecnico', 'fecha'], name='trans_tecnico_fecha_idx'), models.Index(fields=['categoria', 'fecha'], name='trans_categoria_fecha_idx')],
+            },
+        ),
+        migrations.RunPython(reconstruir_historial, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 4.2.7 on 2026-10-16 21:12
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('locales', '0003_contadores_tickets'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('tickets', '0010_transicion_ticket'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='transicionticket',
+            name='ticket',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='transiciones', to='tickets.ticket', verbose_name='Ticket'),
+        ),
+        migrations.CreateModel(
+            name='TicketArchivado',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False, verbose_name='ID')),
+                ('numero_ticket', models.CharField(max_length=20, unique=True, verbose_name='Número de ticket')),
+                ('titulo', models.CharField(max_length=200, verbose_name='Título')),
+                ('descripcion', models.TextField(verbose_name='Descripción del problema')),
+                ('prioridad', models.CharField(choices=[('BAJA', 'Baja'), ('MEDIA', 'Media'), ('ALTA', 'Alta'), ('CRITICA', 'Crítica')], max_length=20, verbose_name='Prioridad')),
+                ('estado', models.CharField(choices=[('PENDIENTE', 'Pendiente'), ('EN_PROCESO', 'En Proceso'), ('RESUELTO', 'Resuelto'), ('CERRADO', 'Cerrado'), ('CANCELADO', 'Cancelado')], max_length=20, verbose_name='Estado')),
+                ('fecha_creacion', models.DateTimeField(verbose_name='Fecha de creación')),
+                ('fecha_asignacion', models.DateTimeField(blank=True, null=True, verbose_name='Fecha de asignación')),
+                ('fecha_inicio_trabajo', models.DateTimeField(blank=True, null=True, verbose_name='Fecha de inicio de trabajo')),
+                ('fecha_resolucion', models.DateTimeField(blank=True, null=True, verbose_name='Fecha de resolución')),
+                ('fecha_cierre', models.DateTimeField(blank=True, null=True, verbose_name='Fecha de cierre')),
+                ('fecha_limite_sla', models.DateTimeField(verbose_name='Fecha límite SLA')),
+                ('solucion', models.TextField(blank=True, null=True, verbose_name='Solución aplicada')),
+                ('foto_reparacion', models.ImageField(blank=True, null=True, upload_to='fotos_reparaciones/%Y/%m/', verbose_name='Foto de la reparación')),
+                ('notificacion_enviada', models.BooleanField(default=False, verbose_name='Notificación enviada')),
+                ('fecha_actualizacion', models.DateTimeField(verbose_name='Fecha de actualización')),
+                ('fecha_archivado', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de archivado')),
+                ('asignado_a', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Asignado a')),
+                ('categoria', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to='tickets.categoriaaveria', verbose_name='Categoría')),
+                ('creado_por', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Creado por')),
+                ('local', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='tickets_archivados', to='locales.local', verbose_name='Local')),
+            ],
+            options={
+                'verbose_name': 'Ticket archivado',
+                'verbose_name_plural': 'Tickets archivados',
+                'ordering': ['-fecha_creacion'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ComentarioArchivado',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False, verbose_name='ID')),
+                ('comentario', models.TextField(verbose_name='Comentario')),
+                ('es_interno', models.BooleanField(default=False, verbose_name='Comentario interno')),
+                ('fecha_creacion', models.DateTimeField(verbose_name='Fecha de creación')),
+                ('ticket', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='comentarios', to='tickets.ticketarchivado', verbose_name='Ticket')),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Usuario')),
+            ],
+            options={
+                'verbose_name': 'Comentario archivado',
+                'verbose_name_plural': 'Comentarios archivados',
+                'ordering': ['fecha_creacion'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='ticketarchivado',
+            index=models.Index(fields=['fecha_creacion', 'id'], name='tkt_arch_fecha_id_idx'),
+        ),
+    ]
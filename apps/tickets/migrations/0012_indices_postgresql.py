@@ -0,0 +1,16 @@
+# Generated by Django 4.2.7 on 2026-10-16 21:30
+
+from django.db import migrations
+
+
+# Los índices parciales que creaba esta migración ahora están declarados
+# en Ticket.Meta (IndiceParcialPostgres) y se crean en la 0014.
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0011_archivo_tickets'),
+    ]
+
+    operations = []
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.7 on 2026-10-16 22:28
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0012_indices_postgresql'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecalculoSLA',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('motivo', models.CharField(blank=True, max_length=200, verbose_name='Motivo')),
+                ('estado', models.CharField(choices=[('PENDIENTE', 'Pendiente'), ('EN_CURSO', 'En curso'), ('TERMINADO', 'Terminado'), ('FALLIDO', 'Fallido')], default='PENDIENTE', max_length=20, verbose_name='Estado')),
+                ('procesados', models.PositiveIntegerField(default=0, verbose_name='Tickets revisados')),
+                ('cambiados', models.PositiveIntegerField(default=0, verbose_name='Tickets con nuevo límite')),
+                ('ultimo_error', models.TextField(blank=True, null=True, verbose_name='Último error')),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de creación')),
+                ('fecha_inicio', models.DateTimeField(blank=True, null=True, verbose_name='Fecha de inicio')),
+                ('fecha_fin', models.DateTimeField(blank=True, null=True, verbose_name='Fecha de fin')),
+                ('categoria', models.ForeignKey(blank=True, help_text='Vacío = todas las categorías', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='tickets.categoriaaveria', verbose_name='Categoría')),
+            ],
+            options={
+                'verbose_name': 'Recálculo de SLA',
+                'verbose_name_plural': 'Recálculos de SLA',
+                'ordering': ['fecha_creacion'],
+                'indexes': [models.Index(fields=['estado', 'fecha_creacion'], name='recalculo_estado_idx'), models.Index(fields=['fecha_fin'], name='recalculo_fin_idx')],
+            },
+        ),
+    ]
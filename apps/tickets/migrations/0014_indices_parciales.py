@@ -0,0 +1,53 @@
+# Generated by Django 4.2.7 on 2026-10-16 22:32
+
+import apps.tickets.models
+from django.db import migrations, models
+
+
+# Los parciales que 0003 y 0012 creaban con SQL a mano (con otra condición
+# en tkt_sin_asignar_cat_pidx): se borran para crearlos desde Ticket.Meta.
+INDICES_VIEJOS = [
+    'tkt_abiertos_sla_pidx',
+    'tkt_sin_asignar_cat_pidx',
+    'tkt_sla_activo_asignado_pidx',
+    'tkt_sla_activo_local_pidx',
+    'tkt_archivables_pidx',
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0013_recalculo_sla'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            [f'DROP INDEX IF EXISTS {nombre}' for nombre in INDICES_VIEJOS],
+            migrations.RunSQL.noop,
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=apps.tickets.models.IndiceParcialPostgres(condition=models.Q(('estado__in', ['PENDIENTE', 'EN_PROCESO', 'RESUELTO'])), fields=['fecha_limite_sla'], name='tkt_abiertos_sla_pidx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=apps.tickets.models.IndiceParcialPostgres(condition=models.Q(('estado__in', ['PENDIENTE', 'EN_PROCESO'])), fields=['-fecha_creacion', '-id'], name='tkt_activos_fecha_pidx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=apps.tickets.models.IndiceParcialPostgres(condition=models.Q(('asignado_a__isnull', True), ('estado__in', ['PENDIENTE', 'EN_PROCESO'])), fields=['categoria', '-fecha_creacion', '-id'], name='tkt_sin_asignar_cat_pidx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=apps.tickets.models.IndiceParcialPostgres(condition=models.Q(('estado__in', ['PENDIENTE', 'EN_PROCESO'])), fields=['asignado_a', 'fecha_limite_sla'], name='tkt_sla_activo_asignado_pidx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=apps.tickets.models.IndiceParcialPostgres(condition=models.Q(('estado__in', ['PENDIENTE', 'EN_PROCESO'])), fields=['local'], name='tkt_sla_activo_local_pidx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=apps.tickets.models.IndiceParcialPostgres(condition=models.Q(('estado__in', ['CERRADO', 'CANCELADO'])), fields=['fecha_actualizacion', 'id'], name='tkt_archivables_pidx'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+from django.db import migrations
+
+
+# La tabla de búsqueda con los comentarios internos en su propia columna
+# (ver apps/tickets/busqueda.py), para poder no buscarlos. Solo en SQLite.
+CREAR = """
+    CREATE VIRTUAL TABLE tickets_busqueda USING fts5(
+        numero, titulo, local, descripcion, solucion, comentarios, internos,
+        tokenize = 'unicode61 remove_diacritics 2'
+    )
+"""
+
+LLENAR = """
+    INSERT INTO tickets_busqueda
+        (rowid, numero, titulo, local, descripcion, solucion, comentarios, internos)
+    SELECT t.id, t.numero_ticket, t.titulo, l.codigo || ' ' || l.nombre,
+           t.descripcion, COALESCE(t.solucion, ''),
+           COALESCE((SELECT group_concat(c.comentario, ' ')
+                     FROM tickets_comentarioticket c
+                     WHERE c.ticket_id = t.id AND NOT c.es_interno), ''),
+           COALESCE((SELECT group_concat(c.comentario, ' ')
+                     FROM tickets_comentarioticket c
+                     WHERE c.ticket_id = t.id AND c.es_interno), '')
+    FROM tickets_ticket t
+    JOIN locales_local l ON l.id = t.local_id
+"""
+
+
+def separar_internos(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute('DROP TABLE IF EXISTS tickets_busqueda')
+    schema_editor.execute(CREAR)
+    schema_editor.execute(LLENAR)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0014_indices_parciales'),
+    ]
+
+    operations = [
+        # Hacia atrás no hace falta nada: el código anterior nombra sus
+        # columnas al insertar y `internos` queda vacía
+        migrations.RunPython(separar_internos, migrations.RunPython.noop),
+    ]
@@ -3,13 +3,123 @@ Modelos para el sistema de tickets de averías
 """
 from datetime import timedelta
 
-from django.db import models
+from django.db import DatabaseError, models, transaction
+from django.db.models import Case, F, Func, Q, Value, When
+from django.db.models.functions import Least
 from django.utils import timezone
 
 from apps.usuarios.models import Usuario
 from apps.locales.models import Local
 
 
+# Estados que cuentan como "abiertos" en dashboard y reportes
+ESTADOS_ABIERTOS = ['PENDIENTE', 'EN_PROCESO', 'RESUELTO']
+
+# Colores de SLA (clases de Bootstrap) que devuelve `get_color_sla`
+COLORES_SLA = ['success', 'warning', 'danger']
+
+# Estados en los que el SLA sigue corriendo (ver `esta_vencido`). Son
+# también los "abiertos" de tickets_lista.
+ESTADOS_SLA_ACTIVO = ['PENDIENTE', 'EN_PROCESO']
+
+# Pestaña "cerrados" de tickets_lista (el resto de los estados)
+ESTADOS_CERRADOS = ['RESUELTO', 'CERRADO', 'CANCELADO']
+
+# Los que `archivo.archivar` puede mover a TicketArchivado
+ESTADOS_ARCHIVABLES = ['CERRADO', 'CANCELADO']
+
+
+class SegundosEpoch(Func):
+    """Segundos desde 1970 (UTC) de un DateTimeField, en SQL."""
+    output_field = models.BigIntegerField()
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        # Django guarda los datetime en UTC como texto ISO
+        return self.as_sql(compiler, connection, template="CAST(strftime('%%%%s', %(expressions)s) AS INTEGER)")
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        return self.as_sql(compiler, connection, template='CAST(FLOOR(EXTRACT(EPOCH FROM %(expressions)s)) AS BIGINT)')
+
+    def as_mysql(self, compiler, connection, **extra_context):
+        return self.as_sql(compiler, connection, template='UNIX_TIMESTAMP(%(expressions)s)')
+
+
+class IndiceParcialPostgres(models.Index):
+    """
+    Índice parcial (`condition=`) que solo se crea en PostgreSQL. SQLite
+    los soporta pero no los usa cuando el `estado IN (...)` llega con
+    parámetros (siempre en Django): ahí solo costarían escrituras.
+
+    Para que PostgreSQL lo use, la consulta tiene que filtrar con la misma
+    lista que la condición, en positivo (`filter(estado__in=...)`): de un
+    `exclude(...)` no puede deducir la condición.
+    """
+
+    def create_sql(self, model, schema_editor, using='', **kwargs):
+        if schema_editor.connection.vendor != 'postgresql':
+            # El schema editor ejecuta lo que devolvamos: un comentario no hace nada
+            return f'-- {self.name}: solo en PostgreSQL'
+        return super().create_sql(model, schema_editor, using=using, **kwargs)
+
+    def remove_sql(self, model, schema_editor, **kwargs):
+        if schema_editor.connection.vendor != 'postgresql':
+            return f'-- {self.name}: solo en PostgreSQL'
+        return super().remove_sql(model, schema_editor, **kwargs)
+
+
+class TicketQuerySet(models.QuerySet):
+
+    def con_sla(self, ahora=None):
+        """
+        Anota el estado del SLA calculado en la base de datos, con las
+        mismas reglas que los métodos del modelo:
+
+        - sla_vencido: como `esta_vencido()`.
+        - sla_segundos_restantes: segundos hasta `fecha_limite_sla`
+          (negativo si ya pasó; None si el ticket ya no está abierto).
+        - sla_porcentaje: como `porcentaje_tiempo_usado()` (0 a 100).
+        - sla_color: como `get_color_sla()` ('success' / 'warning' / 'danger').
+
+        Así se puede ordenar y filtrar por ellos, p. ej.
+        `Ticket.objects.con_sla().filter(sla_color='danger')`.
+        """
+        ahora = ahora or timezone.now()
+        epoch = Value(int(ahora.timestamp()))
+        cerrados = ['RESUELTO', 'CERRADO', 'CANCELADO']
+
+        return self.alias(
+            sla_total=SegundosEpoch('fecha_limite_sla') - SegundosEpoch('fecha_creacion'),
+            sla_usado=epoch - SegundosEpoch('fecha_creacion'),
+        ).annotate(
+            sla_vencido=Case(
+                When(estado__in=cerrados, then=Value(False)),
+                When(fecha_limite_sla__lt=ahora, then=Value(True)),
+                default=Value(False),
+                output_field=models.BooleanField(),
+            ),
+            sla_segundos_restantes=Case(
+                When(estado__in=cerrados, then=None),
+                default=SegundosEpoch('fecha_limite_sla') - epoch,
+                output_field=models.BigIntegerField(),
+            ),
+            sla_porcentaje=Case(
+                When(sla_total__lte=0, then=Value(100.0)),
+                default=Least(
+                    Value(100.0),
+                    F('sla_usado') * Value(100.0) / F('sla_total'),
+                ),
+                output_field=models.FloatField(),
+            ),
+            sla_color=Case(
+                When(estado__in=['RESUELTO', 'CERRADO'], then=Value('success')),
+                When(sla_porcentaje__lt=50, then=Value('success')),
+                When(sla_porcentaje__lt=75, then=Value('warning')),
+                default=Value('danger'),
+                output_field=models.CharField(),
+            ),
+        )
+
+
 class CategoriaAveria(models.Model):
     """
     Categorías de averías (PC, Internet, Eléctrica, etc.)
@@ -53,6 +163,64 @@ class CategoriaAveria(models.Model):
         return self.nombre
 
 
+class Secuencia(models.Model):
+    """
+    Contador atómico para numeraciones (ej. `numero_ticket`).
+    Se incrementa con un único UPDATE; ver `apps.tickets.secuencias`.
+    """
+    nombre = models.CharField(
+        max_length=50,
+        unique=True,
+        verbose_name='Nombre'
+    )
+
+    valor = models.BigIntegerField(
+        default=0,
+        verbose_name='Último valor entregado'
+    )
+
+    class Meta:
+        verbose_name = 'Secuencia'
+        verbose_name_plural = 'Secuencias'
+
+    def __str__(self):
+        return f"{self.nombre} = {self.valor}"
+
+
+class Feriado(models.Model):
+    """
+    Días no laborables para el cálculo del SLA (ver `apps.tickets.calendario`).
+    Sin provincia aplica a todo el país.
+    """
+    fecha = models.DateField(
+        verbose_name='Fecha'
+    )
+
+    nombre = models.CharField(
+        max_length=100,
+        verbose_name='Nombre'
+    )
+
+    provincia = models.CharField(
+        max_length=100,
+        blank=True,
+        default='',
+        verbose_name='Provincia',
+        help_text='Vacío = feriado nacional. Debe coincidir con la provincia del local.'
+    )
+
+    class Meta:
+        verbose_name = 'Feriado'
+        verbose_name_plural = 'Feriados'
+        ordering = ['fecha']
+        constraints = [
+            models.UniqueConstraint(fields=['fecha', 'provincia'], name='feriado_fecha_provincia_unico'),
+        ]
+
+    def __str__(self):
+        return f"{self.fecha:%d/%m/%Y} - {self.nombre}" + (f" ({self.provincia})" if self.provincia else "")
+
+
 class Ticket(models.Model):
     """
     Modelo principal para los tickets de averías
@@ -196,6 +364,8 @@ class Ticket(models.Model):
         verbose_name='Fecha de actualización'
     )
 
+    objects = TicketQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'Ticket'
         verbose_name_plural = 'Tickets'
@@ -204,6 +374,100 @@ class Ticket(models.Model):
             ('puede_asignar_tickets', 'Puede asignar tickets'),
             ('puede_cerrar_tickets', 'Puede cerrar tickets'),
         ]
+        # Índices pensados para las consultas de tickets_lista, dashboard
+        # y reportes_dashboard (ver `manage.py benchmark_consultas`).
+        indexes = [
+            # Admin "todos" + paginación por cursor
+            models.Index(fields=['-fecha_creacion', '-id'], name='tkt_fecha_id_idx'),
+            # Admin abiertos/cerrados y ventanas de reportes
+            models.Index(fields=['estado', '-fecha_creacion'], name='tkt_estado_fecha_idx'),
+            # Digitador: solo los que él creó
+            models.Index(fields=['creado_por', '-fecha_creacion', '-id'], name='tkt_creado_fecha_idx'),
+            # Técnico: asignados a él / top técnicos
+            models.Index(fields=['asignado_a', 'estado'], name='tkt_asignado_estado_idx'),
+            # Abiertos ordenados/contados por SLA (dashboard, reportes).
+            # Compuesto y no parcial para SQLite; en PostgreSQL además los
+            # parciales de abajo.
+            models.Index(fields=['estado', 'fecha_limite_sla'], name='tkt_estado_sla_idx'),
+            # Programador de SLA: "qué cambió desde la última pasada"
+            models.Index(fields=['fecha_actualizacion'], name='tkt_actualizacion_idx'),
+
+            # --- Parciales, solo PostgreSQL (ver IndiceParcialPostgres) ---
+            # Dashboard y reportes: abiertos por SLA
+            IndiceParcialPostgres(
+                fields=['fecha_limite_sla'], name='tkt_abiertos_sla_pidx',
+                condition=Q(estado__in=ESTADOS_ABIERTOS),
+            ),
+            # tickets_lista "abiertos" (admin)
+            IndiceParcialPostgres(
+                fields=['-fecha_creacion', '-id'], name='tkt_activos_fecha_pidx',
+                condition=Q(estado__in=ESTADOS_SLA_ACTIVO),
+            ),
+            # tickets_lista técnico: sin asignar de sus categorías...
+            IndiceParcialPostgres(
+                fields=['categoria', '-fecha_creacion', '-id'], name='tkt_sin_asignar_cat_pidx',
+                condition=Q(asignado_a__isnull=True, estado__in=ESTADOS_SLA_ACTIVO),
+            ),
+            # ...y los suyos; también el índice de carga de la asignación
+            IndiceParcialPostgres(
+                fields=['asignado_a', 'fecha_limite_sla'], name='tkt_sla_activo_asignado_pidx',
+                condition=Q(estado__in=ESTADOS_SLA_ACTIVO),
+            ),
+            # Reconciliación de contadores por local
+            IndiceParcialPostgres(
+                fields=['local'], name='tkt_sla_activo_local_pidx',
+                condition=Q(estado__in=ESTADOS_SLA_ACTIVO),
+            ),
+            # archivo.archivables()
+            IndiceParcialPostgres(
+                fields=['fecha_actualizacion', 'id'], name='tkt_archivables_pidx',
+                condition=Q(estado__in=ESTADOS_ARCHIVABLES),
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._guardar_valores_cargados()
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None):
+        # También al leer un campo diferido (`.only()`), que pasa por aquí
+        super().refresh_from_db(using=using, fields=fields)
+        self._guardar_valores_cargados(fields)
+
+    def _guardar_valores_cargados(self, campos=None):
+        # Copia de los campos cargados (o recién guardados), para saber
+        # luego qué cambió
+        valores = {
+            f.attname: self.__dict__[f.attname]
+            for f in self._meta.concrete_fields
+            if f.attname in self.__dict__ and (campos is None or f.name in campos or f.attname in campos)
+        }
+        if campos is None or not hasattr(self, '_valores_cargados'):
+            self._valores_cargados = valores
+        else:
+            self._valores_cargados.update(valores)
+
+    def campos_modificados(self):
+        """
+        Nombres de los campos que cambiaron desde que se cargó (o se guardó)
+        el ticket. Los diferidos que nunca se leyeron no cuentan.
+        """
+        cargados = getattr(self, '_valores_cargados', None)
+        if cargados is None:
+            return {f.name for f in self._meta.concrete_fields if not f.primary_key}
+        modificados = set()
+        for f in self._meta.concrete_fields:
+            if f.primary_key or f.attname not in self.__dict__:
+                continue
+            valor = self.__dict__[f.attname]
+            if f.attname not in cargados or valor != cargados[f.attname]:
+                modificados.add(f.name)
+            elif isinstance(f, models.FileField) and valor and not getattr(valor, '_committed', True):
+                # Archivo nuevo con el mismo nombre que el anterior
+                modificados.add(f.name)
+        return modificados
 
     def save(self, *args, **kwargs):
         """
@@ -211,16 +475,29 @@ class Ticket(models.Model):
         1. Generar número de ticket automático
         2. Calcular fecha límite SLA
         3. Actualizar fechas según cambios de estado
+        4. En un ticket existente, escribir solo los campos que cambiaron
+           (`campos_modificados`) en vez de las ~20 columnas; si la fila
+           ya no existe (la borró otro), se guarda completo como siempre
+        5. Registrar en `TransicionTicket` el alta y cada cambio de estado
+           o de técnico (`actor=` el usuario que lo hizo)
         """
+        actor = kwargs.pop('actor', None)
+        nuevo = self._state.adding or kwargs.get('force_insert')
+        anteriores = dict(getattr(self, '_valores_cargados', {}))
+
         # Generar número de ticket si es nuevo
         if not self.numero_ticket:
-            from django.db.models import Max
-            ultimo = Ticket.objects.aggregate(Max('id'))['id__max'] or 0
-            self.numero_ticket = f"TKT-{(ultimo + 1):06d}"
+            from .secuencias import nuevo_numero_ticket
+            self.numero_ticket = nuevo_numero_ticket()
 
-        # Calcular fecha límite SLA si es nuevo
+        # Calcular fecha límite SLA si es nuevo (en horario laboral del local)
         if not self.pk and not self.fecha_limite_sla:
-            self.fecha_limite_sla = timezone.now() + timedelta(hours=self.categoria.tiempo_sla_horas)
+            from .calendario import calcular_limite_sla
+            self.fecha_limite_sla = calcular_limite_sla(
+                timezone.now(),
+                self.categoria.tiempo_sla_horas,
+                self.local.provincia,
+            )
 
         # Fecha de asignación
         if self.asignado_a and not self.fecha_asignacion:
@@ -234,13 +511,47 @@ class Ticket(models.Model):
         if self.estado == 'CERRADO' and not self.fecha_cierre:
             self.fecha_cierre = timezone.now()
 
-        super().save(*args, **kwargs)
+        deducidos = False
+        if not nuevo:
+            modificados = self.campos_modificados()
+            update_fields = kwargs.get('update_fields')
+            deducidos = update_fields is None
+            if update_fields is not None:
+                # Lo pedido + las fechas que se derivaron arriba
+                modificados &= {'fecha_asignacion', 'fecha_resolucion', 'fecha_cierre'}
+                modificados |= set(update_fields)
+            kwargs['update_fields'] = modificados | {'fecha_actualizacion'}
+
+        guardados = kwargs.get('update_fields') or ()
+        with transaction.atomic():
+            try:
+                super().save(*args, **kwargs)
+            except DatabaseError as error:
+                # Con update_fields Django no inserta si el UPDATE no tocó
+                # filas. Ese error no viene de la BD (los de la BD traen
+                # __cause__), así que la transacción sigue sana.
+                if not deducidos or error.__cause__ is not None:
+                    raise
+                transaction.set_rollback(False)
+                del kwargs['update_fields']
+                super().save(*args, **kwargs)
+            if nuevo:
+                TransicionTicket.registrar(self, '', None, actor)
+            elif {'estado', 'asignado_a'} & set(guardados):
+                estado_anterior = anteriores.get('estado', self.estado)
+                tecnico_anterior = anteriores.get('asignado_a_id', self.asignado_a_id)
+                if (estado_anterior, tecnico_anterior) != (self.estado, self.asignado_a_id):
+                    TransicionTicket.registrar(self, estado_anterior, tecnico_anterior, actor)
+        self._guardar_valores_cargados(kwargs.get('update_fields'))
 
     def __str__(self):
         return f"{self.numero_ticket} - {self.titulo}"
 
     def esta_vencido(self):
         """Verifica si el ticket está vencido según el SLA"""
+        if hasattr(self, 'sla_vencido'):
+            # Ya calculado en la consulta (TicketQuerySet.con_sla)
+            return self.sla_vencido
         if self.estado in ['RESUELTO', 'CERRADO', 'CANCELADO']:
             return False
         return timezone.now() > self.fecha_limite_sla
@@ -271,6 +582,8 @@ class Ticket(models.Model):
 
     def get_color_sla(self):
         """Color según el estado del SLA"""
+        if hasattr(self, 'sla_color'):
+            return self.sla_color
         if self.estado in ['RESUELTO', 'CERRADO']:
             return 'success'
 
@@ -322,3 +635,478 @@ class ComentarioTicket(models.Model):
 
     def __str__(self):
         return f"Comentario de {self.usuario} en {self.ticket.numero_ticket}"
+
+
+class TransicionTicket(models.Model):
+    """
+    Historial (solo de alta) de los cambios de estado y de técnico de un
+    ticket. Lo escribe `Ticket.save()`; los tiempos por estado se calculan
+    sobre estas filas (ver `apps.tickets.transiciones`).
+
+    Sin restricción de clave foránea: al archivar un ticket
+    (`apps.tickets.archivo`) su historial se queda aquí con el mismo id.
+    """
+    ticket = models.ForeignKey(
+        Ticket,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='transiciones',
+        verbose_name='Ticket'
+    )
+
+    estado_anterior = models.CharField(
+        max_length=20,
+        choices=Ticket.ESTADOS,
+        blank=True,
+        verbose_name='Estado anterior',
+        help_text='Vacío = alta del ticket'
+    )
+
+    estado_nuevo = models.CharField(
+        max_length=20,
+        choices=Ticket.ESTADOS,
+        verbose_name='Estado nuevo'
+    )
+
+    tecnico_anterior = models.ForeignKey(
+        Usuario,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name='Técnico anterior'
+    )
+
+    tecnico = models.ForeignKey(
+        Usuario,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='transiciones_tickets',
+        verbose_name='Técnico asignado'
+    )
+
+    # Copia de la categoría del ticket, para agrupar sin unir con tickets
+    categoria = models.ForeignKey(
+        CategoriaAveria,
+        on_delete=models.PROTECT,
+        related_name='+',
+        verbose_name='Categoría'
+    )
+
+    actor = models.ForeignKey(
+        Usuario,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name='Hecho por'
+    )
+
+    fecha = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Fecha'
+    )
+
+    class Meta:
+        verbose_name = 'Transición de ticket'
+        verbose_name_plural = 'Transiciones de tickets'
+        ordering = ['fecha', 'id']
+        indexes = [
+            # Historial de un ticket y "siguiente transición" (tiempo en estado)
+            models.Index(fields=['ticket', 'fecha', 'id'], name='trans_ticket_fecha_idx'),
+            # Reportes por ventana de fechas, técnico o categoría
+            models.Index(fields=['fecha'], name='trans_fecha_idx'),
+            models.Index(fields=['tecnico', 'fecha'], name='trans_tecnico_fecha_idx'),
+            models.Index(fields=['categoria', 'fecha'], name='trans_categoria_fecha_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.ticket_id}: {self.estado_anterior or '-'} -> {self.estado_nuevo} ({self.fecha:%d/%m/%Y %H:%M})"
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError('Las transiciones de tickets no se modifican.')
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def registrar(cls, ticket, estado_anterior, tecnico_anterior_id, actor=None, fecha=None):
+        """Agrega la transición al estado / técnico actuales del ticket."""
+        return cls.objects.create(
+            ticket_id=ticket.pk,
+            estado_anterior=estado_anterior,
+            estado_nuevo=ticket.estado,
+            tecnico_anterior_id=tecnico_anterior_id,
+            tecnico_id=ticket.asignado_a_id,
+            categoria_id=ticket.categoria_id,
+            actor=actor,
+            fecha=fecha or timezone.now(),
+        )
+
+
+class TicketArchivado(models.Model):
+    """
+    Tickets CERRADO / CANCELADO viejos, sacados de la tabla de tickets por
+    `manage.py archivar_tickets` (ver `apps.tickets.archivo`). Mismas
+    columnas y mismo id que tenían en `Ticket`.
+    """
+    id = models.BigIntegerField(
+        primary_key=True,
+        verbose_name='ID'
+    )
+
+    numero_ticket = models.CharField(
+        max_length=20,
+        unique=True,
+        verbose_name='Número de ticket'
+    )
+
+    local = models.ForeignKey(
+        Local,
+        on_delete=models.PROTECT,
+        related_name='tickets_archivados',
+        verbose_name='Local'
+    )
+
+    categoria = models.ForeignKey(
+        CategoriaAveria,
+        on_delete=models.PROTECT,
+        related_name='+',
+        verbose_name='Categoría'
+    )
+
+    titulo = models.CharField(
+        max_length=200,
+        verbose_name='Título'
+    )
+
+    descripcion = models.TextField(
+        verbose_name='Descripción del problema'
+    )
+
+    prioridad = models.CharField(
+        max_length=20,
+        choices=Ticket.PRIORIDADES,
+        verbose_name='Prioridad'
+    )
+
+    estado = models.CharField(
+        max_length=20,
+        choices=Ticket.ESTADOS,
+        verbose_name='Estado'
+    )
+
+    creado_por = models.ForeignKey(
+        Usuario,
+        on_delete=models.PROTECT,
+        related_name='+',
+        verbose_name='Creado por'
+    )
+
+    asignado_a = models.ForeignKey(
+        Usuario,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name='Asignado a'
+    )
+
+    fecha_creacion = models.DateTimeField(
+        verbose_name='Fecha de creación'
+    )
+
+    fecha_asignacion = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Fecha de asignación'
+    )
+
+    fecha_inicio_trabajo = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Fecha de inicio de trabajo'
+    )
+
+    fecha_resolucion = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Fecha de resolución'
+    )
+
+    fecha_cierre = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Fecha de cierre'
+    )
+
+    fecha_limite_sla = models.DateTimeField(
+        verbose_name='Fecha límite SLA'
+    )
+
+    solucion = models.TextField(
+        blank=True,
+        null=True,
+        verbose_name='Solución aplicada'
+    )
+
+    foto_reparacion = models.ImageField(
+        upload_to='fotos_reparaciones/%Y/%m/',
+        blank=True,
+        null=True,
+        verbose_name='Foto de la reparación'
+    )
+
+    notificacion_enviada = models.BooleanField(
+        default=False,
+        verbose_name='Notificación enviada'
+    )
+
+    fecha_actualizacion = models.DateTimeField(
+        verbose_name='Fecha de actualización'
+    )
+
+    fecha_archivado = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Fecha de archivado'
+    )
+
+    class Meta:
+        verbose_name = 'Ticket archivado'
+        verbose_name_plural = 'Tickets archivados'
+        ordering = ['-fecha_creacion']
+        indexes = [
+            # Exportación por rango de fechas
+            models.Index(fields=['fecha_creacion', 'id'], name='tkt_arch_fecha_id_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.numero_ticket} - {self.titulo} (archivado)"
+
+    def como_ticket(self):
+        """
+        Un `Ticket` (sin guardar) con estos datos, para mostrarlo con las
+        mismas plantillas y permisos que uno vivo.
+        """
+        ticket = Ticket(**{
+            f.attname: getattr(self, f.attname) for f in Ticket._meta.concrete_fields
+        })
+        ticket.archivado = True
+        return ticket
+
+
+class ComentarioArchivado(models.Model):
+    """Comentarios de un `TicketArchivado`, con el mismo id que tenían."""
+    id = models.BigIntegerField(
+        primary_key=True,
+        verbose_name='ID'
+    )
+
+    ticket = models.ForeignKey(
+        TicketArchivado,
+        on_delete=models.CASCADE,
+        related_name='comentarios',
+        verbose_name='Ticket'
+    )
+
+    usuario = models.ForeignKey(
+        Usuario,
+        on_delete=models.PROTECT,
+        related_name='+',
+        verbose_name='Usuario'
+    )
+
+    comentario = models.TextField(
+        verbose_name='Comentario'
+    )
+
+    es_interno = models.BooleanField(
+        default=False,
+        verbose_name='Comentario interno'
+    )
+
+    fecha_creacion = models.DateTimeField(
+        verbose_name='Fecha de creación'
+    )
+
+    class Meta:
+        verbose_name = 'Comentario archivado'
+        verbose_name_plural = 'Comentarios archivados'
+        ordering = ['fecha_creacion']
+
+    def __str__(self):
+        return f"Comentario de {self.usuario} en {self.ticket.numero_ticket}"
+
+
+class NotificacionSaliente(models.Model):
+    """
+    Bandeja de salida (outbox) de notificaciones de tickets.
+
+    Se escribe en la misma transacción que el ticket y la procesa un worker
+    aparte (`manage.py procesar_notificaciones`), así crear un ticket no
+    depende de lo que tarden Twilio o Firebase.
+    """
+    TIPOS = [
+        ('WHATSAPP_ASIGNADO', 'WhatsApp al técnico asignado'),
+        ('PUSH_NUEVO_TICKET', 'Push FCM de nuevo ticket'),
+        ('PUSH_SLA_AVISO', 'Push FCM: SLA por vencer'),
+        ('PUSH_SLA_VENCIDO', 'Push FCM: SLA vencido'),
+    ]
+
+    # Avisos de SLA: como mucho uno de cada tipo por ticket
+    TIPOS_SLA = ['PUSH_SLA_AVISO', 'PUSH_SLA_VENCIDO']
+
+    ESTADOS = [
+        ('PENDIENTE', 'Pendiente'),
+        ('ENVIADA', 'Enviada'),
+        ('FALLIDA', 'Fallida (sin más reintentos)'),
+    ]
+
+    ticket = models.ForeignKey(
+        Ticket,
+        on_delete=models.CASCADE,
+        related_name='notificaciones',
+        verbose_name='Ticket'
+    )
+
+    tipo = models.CharField(
+        max_length=30,
+        choices=TIPOS,
+        verbose_name='Tipo'
+    )
+
+    estado = models.CharField(
+        max_length=20,
+        choices=ESTADOS,
+        default='PENDIENTE',
+        verbose_name='Estado'
+    )
+
+    intentos = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Intentos'
+    )
+
+    proximo_intento = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Próximo intento'
+    )
+
+    ultimo_error = models.TextField(
+        blank=True,
+        null=True,
+        verbose_name='Último error'
+    )
+
+    fecha_creacion = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Fecha de creación'
+    )
+
+    fecha_envio = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Fecha de envío'
+    )
+
+    class Meta:
+        verbose_name = 'Notificación saliente'
+        verbose_name_plural = 'Notificaciones salientes'
+        ordering = ['proximo_intento']
+        indexes = [
+            # El worker solo busca pendientes ya vencidas
+            models.Index(fields=['estado', 'proximo_intento'], name='notif_estado_proximo_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['ticket', 'tipo'],
+                condition=models.Q(tipo__in=['PUSH_SLA_AVISO', 'PUSH_SLA_VENCIDO']),
+                name='notif_sla_unica',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.get_tipo_display()} - {self.ticket_id} ({self.get_estado_display()})"
+
+class RecalculoSLA(models.Model):
+    """
+    Recálculo de `fecha_limite_sla` pendiente (cola). Se encola al cambiar
+    el SLA de una categoría y lo hace `manage.py recalcular_sla --pendientes`
+    por lotes, fuera de la petición del admin (ver `apps.tickets.recalculo_sla`).
+    """
+    ESTADOS = [
+        ('PENDIENTE', 'Pendiente'),
+        ('EN_CURSO', 'En curso'),
+        ('TERMINADO', 'Terminado'),
+        ('FALLIDO', 'Fallido'),
+    ]
+
+    categoria = models.ForeignKey(
+        CategoriaAveria,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name='Categoría',
+        help_text='Vacío = todas las categorías'
+    )
+
+    motivo = models.CharField(
+        max_length=200,
+        blank=True,
+        verbose_name='Motivo'
+    )
+
+    estado = models.CharField(
+        max_length=20,
+        choices=ESTADOS,
+        default='PENDIENTE',
+        verbose_name='Estado'
+    )
+
+    # Progreso: se actualizan después de cada lote
+    procesados = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Tickets revisados'
+    )
+
+    cambiados = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Tickets con nuevo límite'
+    )
+
+    ultimo_error = models.TextField(
+        blank=True,
+        null=True,
+        verbose_name='Último error'
+    )
+
+    fecha_creacion = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Fecha de creación'
+    )
+
+    fecha_inicio = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Fecha de inicio'
+    )
+
+    fecha_fin = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Fecha de fin'
+    )
+
+    class Meta:
+        verbose_name = 'Recálculo de SLA'
+        verbose_name_plural = 'Recálculos de SLA'
+        ordering = ['fecha_creacion']
+        indexes = [
+            # El worker busca pendientes; la asignación, el último terminado
+            models.Index(fields=['estado', 'fecha_creacion'], name='recalculo_estado_idx'),
+            models.Index(fields=['fecha_fin'], name='recalculo_fin_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.categoria or 'Todas'} - {self.get_estado_display()} ({self.procesados} revisados)"
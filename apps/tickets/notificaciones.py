@@ -0,0 +1,146 @@
+"""
+Bandeja de salida (outbox) de notificaciones de tickets.
+
+La vista solo inserta filas en `NotificacionSaliente` dentro de la misma
+transacción que el ticket; el envío real (Twilio / FCM) lo hace
+`manage.py procesar_notificaciones` con reintentos y backoff exponencial.
+Las que agotan los intentos quedan como FALLIDA (dead letter) para
+revisarlas en el admin.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import NotificacionSaliente, Ticket
+
+logger = logging.getLogger(__name__)
+
+
+def _enviar_whatsapp(ticket):
+    from .utils import enviar_whatsapp_ticket_asignado
+    enviar_whatsapp_ticket_asignado(ticket)
+
+
+def _enviar_push(ticket):
+    from .fcm import enviar_notificacion_nuevo_ticket
+    enviar_notificacion_nuevo_ticket(ticket, lanzar_errores=True)
+
+
+def _enviar_aviso_sla(ticket):
+    from .fcm import enviar_alerta_sla
+    enviar_alerta_sla(ticket, vencido=False, lanzar_errores=True)
+
+
+def _enviar_sla_vencido(ticket):
+    from .fcm import enviar_alerta_sla
+    enviar_alerta_sla(ticket, vencido=True, lanzar_errores=True)
+
+
+MANEJADORES = {
+    'WHATSAPP_ASIGNADO': _enviar_whatsapp,
+    'PUSH_NUEVO_TICKET': _enviar_push,
+    'PUSH_SLA_AVISO': _enviar_aviso_sla,
+    'PUSH_SLA_VENCIDO': _enviar_sla_vencido,
+}
+
+
+def encolar_notificaciones_nuevo_ticket(ticket):
+    """
+    Registra las notificaciones de un ticket recién creado.
+    Debe llamarse dentro de la misma transacción que guarda el ticket.
+    """
+    if not ticket.asignado_a_id:
+        return []
+
+    return NotificacionSaliente.objects.bulk_create([
+        NotificacionSaliente(ticket=ticket, tipo='WHATSAPP_ASIGNADO'),
+        NotificacionSaliente(ticket=ticket, tipo='PUSH_NUEVO_TICKET'),
+    ])
+
+
+def encolar_alertas_sla(eventos):
+    """
+    Registra avisos de SLA: `eventos` es una lista de (ticket_id, tipo).
+    La restricción `notif_sla_unica` descarta los que ya existían.
+    """
+    return NotificacionSaliente.objects.bulk_create(
+        [NotificacionSaliente(ticket_id=ticket_id, tipo=tipo) for ticket_id, tipo in eventos],
+        ignore_conflicts=True,
+    )
+
+
+def _espera_reintento(intentos):
+    """Backoff exponencial: base, 2*base, 4*base... con tope de 1 hora."""
+    base = getattr(settings, 'NOTIFICACIONES_REINTENTO_SEGUNDOS', 30)
+    return timedelta(seconds=min(base * 2 ** (intentos - 1), 3600))
+
+
+def _reclamar(notificacion_id, ahora, bloqueo):
+    """
+    Toma la notificación para este worker empujando `proximo_intento`
+    hacia adelante. Si otro worker ya la tomó, el UPDATE no afecta filas.
+    Si el worker muere a mitad de envío, se vuelve a intentar al vencer
+    el bloqueo.
+    """
+    return NotificacionSaliente.objects.filter(
+        pk=notificacion_id,
+        estado='PENDIENTE',
+        proximo_intento__lte=ahora,
+    ).update(proximo_intento=ahora + bloqueo) == 1
+
+
+def procesar_pendientes(lote=50):
+    """
+    Envía hasta `lote` notificaciones vencidas.
+    Devuelve un dict con cuántas se enviaron, reprogramaron y fallaron.
+    """
+    ahora = timezone.now()
+    max_intentos = getattr(settings, 'NOTIFICACIONES_MAX_INTENTOS', 5)
+    bloqueo = timedelta(seconds=getattr(settings, 'NOTIFICACIONES_BLOQUEO_SEGUNDOS', 300))
+
+    ids = list(
+        NotificacionSaliente.objects
+        .filter(estado='PENDIENTE', proximo_intento__lte=ahora)
+        .order_by('proximo_intento')
+        .values_list('id', flat=True)[:lote]
+    )
+
+    resultado = {'enviadas': 0, 'reintentos': 0, 'fallidas': 0}
+
+    for pk in ids:
+        if not _reclamar(pk, ahora, bloqueo):
+            continue
+
+        notif = NotificacionSaliente.objects.select_related(
+            'ticket__asignado_a', 'ticket__categoria', 'ticket__local'
+        ).get(pk=pk)
+        notif.intentos += 1
+
+        try:
+            MANEJADORES[notif.tipo](notif.ticket)
+        except Exception as e:
+            notif.ultimo_error = f"{type(e).__name__}: {e}"[:2000]
+            if notif.intentos >= max_intentos:
+                notif.estado = 'FALLIDA'
+                resultado['fallidas'] += 1
+                logger.error(
+                    "Notificación %s (%s) del ticket %s descartada tras %s intentos: %s",
+                    notif.pk, notif.tipo, notif.ticket_id, notif.intentos, notif.ultimo_error,
+                )
+            else:
+                notif.proximo_intento = timezone.now() + _espera_reintento(notif.intentos)
+                resultado['reintentos'] += 1
+        else:
+            notif.estado = 'ENVIADA'
+            notif.fecha_envio = timezone.now()
+            notif.ultimo_error = None
+            resultado['enviadas'] += 1
+            Ticket.objects.filter(pk=notif.ticket_id).update(notificacion_enviada=True)
+
+        notif.save(update_fields=[
+            'estado', 'intentos', 'proximo_intento', 'ultimo_error', 'fecha_envio',
+        ])
+
+    return resultado
@@ -0,0 +1,87 @@
+"""
+Paginación por cursor (keyset) para listados de tickets.
+
+En vez de OFFSET usamos la última pareja (fecha_creacion, id) de la página
+como cursor: la siguiente página es "todo lo que viene después de esa
+pareja" en el orden (-fecha_creacion, -id). Así el costo de cada página es
+el mismo aunque la tabla tenga cientos de miles de tickets.
+"""
+import base64
+from datetime import datetime
+
+from django.db.models import Q
+
+
+# Campos que la fila de `tickets_lista.html` realmente imprime.
+CAMPOS_FILA_TICKET = [
+    'id',
+    'numero_ticket',
+    'titulo',
+    'prioridad',
+    'estado',
+    'fecha_creacion',
+    'local__codigo',
+    'local__nombre',
+    'categoria__nombre',
+    'asignado_a__username',
+    'asignado_a__first_name',
+    'asignado_a__last_name',
+]
+
+
+def codificar_cursor(fecha, pk):
+    """Convierte (fecha_creacion, id) en un texto seguro para la URL."""
+    crudo = f"{fecha.isoformat()}|{pk}".encode('utf-8')
+    return base64.urlsafe_b64encode(crudo).decode('ascii').rstrip('=')
+
+
+def decodificar_cursor(cursor):
+    """
+    Devuelve la pareja (fecha_creacion, id) del cursor,
+    o None si viene vacío o mal formado.
+
+    El cursor llega por la URL: una fecha sin zona horaria o un id fuera
+    del rango de la columna se tratan igual que la basura.
+    """
+    if not cursor:
+        return None
+    try:
+        relleno = '=' * (-len(cursor) % 4)
+        crudo = base64.urlsafe_b64decode(cursor + relleno).decode('utf-8')
+        fecha_txt, pk_txt = crudo.split('|', 1)
+        fecha, pk = datetime.fromisoformat(fecha_txt), int(pk_txt)
+    except (ValueError, UnicodeDecodeError):
+        return None
+    if fecha.tzinfo is None or not 0 < pk < 2 ** 63:
+        return None
+    return fecha, pk
+
+
+def paginar_por_cursor(qs, cursor=None, por_pagina=50):
+    """
+    Devuelve (tickets, siguiente_cursor) para el queryset dado.
+
+    - Ordena siempre por (-fecha_creacion, -id) para que el cursor sea estable
+      aunque dos tickets tengan la misma fecha.
+    - Pide una fila extra para saber si hay más páginas sin hacer COUNT.
+    - `siguiente_cursor` es None cuando no hay más tickets.
+    """
+    qs = qs.order_by('-fecha_creacion', '-id')
+
+    posicion = decodificar_cursor(cursor)
+    if posicion:
+        fecha, pk = posicion
+        qs = qs.filter(
+            Q(fecha_creacion__lt=fecha) |
+            Q(fecha_creacion=fecha, id__lt=pk)
+        )
+
+    tickets = list(qs[:por_pagina + 1])
+
+    siguiente_cursor = None
+    if len(tickets) > por_pagina:
+        tickets = tickets[:por_pagina]
+        ultimo = tickets[-1]
+        siguiente_cursor = codificar_cursor(ultimo.fecha_creacion, ultimo.id)
+
+    return tickets, siguiente_cursor
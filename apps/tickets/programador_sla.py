@@ -0,0 +1,212 @@
+"""
+Programador de avisos de SLA.
+
+Guarda en un min-heap los próximos vencimientos de los tickets con SLA
+activo: para cada uno, el momento del aviso (SLA_AVISO_PORCENTAJE del
+plazo) y el del vencimiento. El worker (`manage.py programador_sla`)
+duerme hasta el primero, encola la notificación en la bandeja de salida
+y sigue; cada evento cuesta O(log n) en vez de recorrer todos los
+tickets abiertos.
+
+Los cambios (tickets nuevos, cerrados, reasignados o con otro límite) se
+recogen consultando `fecha_actualizacion` > última marca, que tiene
+índice. Las entradas viejas del heap no se borran: al salir se comparan
+con el límite vigente del ticket y se descartan si ya no coinciden.
+
+Un evento cuenta como emitido recién cuando su fila en la bandeja de
+salida quedó confirmada; si el encolado falla, vuelve al heap.
+"""
+import heapq
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import ESTADOS_SLA_ACTIVO, NotificacionSaliente, Ticket
+from .notificaciones import encolar_alertas_sla
+
+
+AVISO = 'PUSH_SLA_AVISO'
+VENCIDO = 'PUSH_SLA_VENCIDO'
+
+CAMPOS = ['id', 'estado', 'fecha_creacion', 'fecha_limite_sla', 'fecha_actualizacion']
+
+
+class ProgramadorSLA:
+
+    def __init__(self, porcentaje_aviso=None):
+        if porcentaje_aviso is None:
+            porcentaje_aviso = getattr(settings, 'SLA_AVISO_PORCENTAJE', 75)
+        self.porcentaje_aviso = porcentaje_aviso
+        self._heap = []         # (momento, ticket_id, tipo, limite)
+        self._vigentes = {}     # ticket_id -> (fecha_creacion, fecha_limite_sla)
+        self._emitidos = set()  # (ticket_id, tipo) ya encolados
+        self.marca = None       # mayor fecha_actualizacion vista
+
+    def __len__(self):
+        return len(self._vigentes)
+
+    def momento_aviso(self, creacion, limite):
+        return creacion + (limite - creacion) * (self.porcentaje_aviso / 100)
+
+    # ------------------------------------------------------------------
+    # Altas / bajas
+    # ------------------------------------------------------------------
+    def programar(self, ticket_id, creacion, limite, ahora):
+        """Agenda (o reagenda si cambió el límite) los eventos de un ticket."""
+        if self._vigentes.get(ticket_id) == (creacion, limite):
+            return
+        self._vigentes[ticket_id] = (creacion, limite)
+
+        aviso = self.momento_aviso(creacion, limite)
+        if (ticket_id, AVISO) not in self._emitidos and limite > ahora:
+            heapq.heappush(self._heap, (aviso, ticket_id, AVISO, limite))
+        if (ticket_id, VENCIDO) not in self._emitidos:
+            heapq.heappush(self._heap, (limite, ticket_id, VENCIDO, limite))
+
+    def quitar(self, ticket_id):
+        # Sus eventos del heap quedan viejos; si el ticket se reabre, la
+        # restricción `notif_sla_unica` evita repetir los ya encolados.
+        self._vigentes.pop(ticket_id, None)
+        self._emitidos.discard((ticket_id, AVISO))
+        self._emitidos.discard((ticket_id, VENCIDO))
+
+    def aplicar(self, filas, ahora):
+        """Procesa filas (dicts con CAMPOS) de tickets nuevos o cambiados."""
+        for fila in filas:
+            if fila['estado'] in ESTADOS_SLA_ACTIVO:
+                self.programar(fila['id'], fila['fecha_creacion'], fila['fecha_limite_sla'], ahora)
+            else:
+                self.quitar(fila['id'])
+            if self.marca is None or fila['fecha_actualizacion'] > self.marca:
+                self.marca = fila['fecha_actualizacion']
+
+    # ------------------------------------------------------------------
+    # Eventos
+    # ------------------------------------------------------------------
+    def _vigente(self, entrada):
+        _momento, ticket_id, tipo, limite = entrada
+        datos = self._vigentes.get(ticket_id)
+        return (
+            datos is not None
+            and datos[1] == limite
+            and (ticket_id, tipo) not in self._emitidos
+        )
+
+    def proximo(self):
+        """Momento del próximo evento vigente, o None si no hay."""
+        while self._heap and not self._vigente(self._heap[0]):
+            heapq.heappop(self._heap)
+        return self._heap[0][0] if self._heap else None
+
+    def vencidos(self, ahora):
+        """
+        Saca del heap y devuelve los (ticket_id, tipo) con momento <= ahora.
+        No los marca: eso lo hace `marcar_emitidos` una vez encolados (o
+        `devolver` los reagenda si no se pudo).
+        """
+        eventos = []
+        vistos = set()  # el mismo límite puede estar dos veces en el heap
+        while self._heap and self._heap[0][0] <= ahora:
+            entrada = heapq.heappop(self._heap)
+            _momento, ticket_id, tipo, _limite = entrada
+            if not self._vigente(entrada) or (ticket_id, tipo) in vistos:
+                continue
+            vistos.add((ticket_id, tipo))
+            eventos.append((ticket_id, tipo))
+        return eventos
+
+    def marcar_emitidos(self, eventos):
+        for ticket_id, tipo in eventos:
+            if tipo == VENCIDO:
+                # Ya vencido: el aviso de "por vencer" no tiene sentido
+                self._emitidos.add((ticket_id, AVISO))
+            self._emitidos.add((ticket_id, tipo))
+
+    def devolver(self, eventos):
+        """Vuelve a agendar eventos sacados por `vencidos` que no se encolaron."""
+        for ticket_id, tipo in eventos:
+            datos = self._vigentes.get(ticket_id)
+            if datos is None:
+                continue
+            creacion, limite = datos
+            momento = limite if tipo == VENCIDO else self.momento_aviso(creacion, limite)
+            heapq.heappush(self._heap, (momento, ticket_id, tipo, limite))
+
+
+# ----------------------------------------------------------------------
+# Integración con la base de datos
+# ----------------------------------------------------------------------
+def cargar(programador, ahora=None):
+    """Carga todos los tickets con SLA activo y los avisos ya encolados."""
+    ahora = ahora or timezone.now()
+    programador._emitidos.update(
+        NotificacionSaliente.objects
+        .filter(tipo__in=NotificacionSaliente.TIPOS_SLA, ticket__estado__in=ESTADOS_SLA_ACTIVO)
+        .values_list('ticket_id', 'tipo')
+    )
+    programador.aplicar(
+        Ticket.objects.filter(estado__in=ESTADOS_SLA_ACTIVO).values(*CAMPOS).iterator(chunk_size=2000),
+        ahora,
+    )
+    if programador.marca is None:
+        programador.marca = ahora
+
+
+def refrescar(programador, ahora=None, solapamiento=timedelta(seconds=5)):
+    """
+    Aplica los tickets cambiados desde la última marca. Se relee un poco
+    hacia atrás (`solapamiento`) por si un commit llegó tarde; reaplicar
+    un ticket sin cambios no hace nada.
+    """
+    ahora = ahora or timezone.now()
+    cambiados = (
+        Ticket.objects
+        .filter(fecha_actualizacion__gte=programador.marca - solapamiento)
+        .values(*CAMPOS)
+    )
+    programador.aplicar(cambiados, ahora)
+
+
+def emitir(programador, ahora=None):
+    """
+    Encola en la bandeja de salida los eventos vencidos. Antes se confirma
+    contra la BD que el ticket siga abierto y con el mismo límite (un
+    `QuerySet.update()` no toca `fecha_actualizacion`). Los eventos se
+    marcan como emitidos al confirmarse la transacción del encolado; si
+    falla, vuelven al heap. Devuelve los eventos encolados.
+    """
+    ahora = ahora or timezone.now()
+    eventos = programador.vencidos(ahora)
+    if not eventos:
+        return []
+
+    try:
+        actuales = {
+            fila['id']: fila
+            for fila in Ticket.objects.filter(pk__in={t for t, _ in eventos}).values(*CAMPOS)
+        }
+    except Exception:
+        programador.devolver(eventos)
+        raise
+    confirmados = []
+    for ticket_id, tipo in eventos:
+        fila = actuales.get(ticket_id)
+        if fila is None or fila['estado'] not in ESTADOS_SLA_ACTIVO:
+            programador.quitar(ticket_id)
+            continue
+        if fila['fecha_limite_sla'] != programador._vigentes[ticket_id][1]:
+            # Cambió el límite sin pasar por save(): reprogramar
+            programador.aplicar([fila], ahora)
+            continue
+        confirmados.append((ticket_id, tipo))
+
+    try:
+        with transaction.atomic():
+            encolar_alertas_sla(confirmados)
+            transaction.on_commit(lambda: programador.marcar_emitidos(confirmados))
+    except Exception:
+        programador.devolver(confirmados)
+        raise
+    return confirmados
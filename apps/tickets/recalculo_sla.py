@@ -0,0 +1,183 @@
+"""
+Recalcular `fecha_limite_sla` de los tickets con SLA activo.
+
+Se usa cuando cambia `CategoriaAveria.tiempo_sla_horas` o a mano con
+`manage.py recalcular_sla` (p. ej. después de cambiar el horario laboral
+o cargar feriados).
+
+Al guardar la categoría no se recalcula en la petición del admin: se
+encola un `RecalculoSLA` en la misma transacción y lo procesa
+`manage.py recalcular_sla --pendientes` (cron o `--continuo`), que deja el
+progreso en la fila (y en el log) después de cada lote.
+
+Trabaja por lotes de ids crecientes: cada lote es una lectura y un solo
+UPDATE (`bulk_update`, un CASE por id) en su propia transacción corta,
+así SQLite no queda bloqueado mientras se recorren miles de tickets y las
+vistas pueden seguir escribiendo entre lote y lote.
+"""
+import logging
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_save, pre_save
+from django.utils import timezone
+
+from . import asignacion
+from .calendario import calcular_limite_sla
+from .models import ESTADOS_SLA_ACTIVO, CategoriaAveria, RecalculoSLA, Ticket
+
+logger = logging.getLogger(__name__)
+
+
+def recalcular_limites(categoria_id=None, lote=500, pausa=0, progreso=None):
+    """
+    Recalcula el límite SLA de los tickets PENDIENTE / EN_PROCESO (de una
+    categoría o de todas). `progreso(procesados, cambiados)` se llama tras
+    cada lote. Devuelve (procesados, cambiados).
+
+    `bulk_update` no dispara señales: al terminar se invalida el índice de
+    carga de la asignación automática, que guarda los límites (en todos los
+    procesos: sube su versión en la caché).
+    """
+    qs = Ticket.objects.filter(estado__in=ESTADOS_SLA_ACTIVO)
+    if categoria_id:
+        qs = qs.filter(categoria_id=categoria_id)
+    horas = dict(CategoriaAveria.objects.values_list('id', 'tiempo_sla_horas'))
+
+    procesados = cambiados = 0
+    ultimo_id = 0
+    while True:
+        filas = list(
+            qs.filter(id__gt=ultimo_id)
+            .order_by('id')
+            .values_list('id', 'categoria_id', 'fecha_creacion', 'fecha_limite_sla', 'local__provincia')[:lote]
+        )
+        if not filas:
+            break
+        ultimo_id = filas[-1][0]
+
+        ahora = timezone.now()
+        tickets = []
+        for pk, cat_id, creado, limite, provincia in filas:
+            nuevo = calcular_limite_sla(creado, horas[cat_id], provincia)
+            if nuevo != limite:
+                # fecha_actualizacion a mano: bulk_update no pasa por auto_now
+                # y el programador de SLA se guía por ella.
+                tickets.append(Ticket(pk=pk, fecha_limite_sla=nuevo, fecha_actualizacion=ahora))
+
+        if tickets:
+            with transaction.atomic():
+                # Solo si sigue con SLA activo (pudo cerrarse mientras tanto)
+                Ticket.objects.filter(
+                    pk__in=[t.pk for t in tickets], estado__in=ESTADOS_SLA_ACTIVO,
+                ).bulk_update(tickets, ['fecha_limite_sla', 'fecha_actualizacion'])
+
+        procesados += len(filas)
+        cambiados += len(tickets)
+        if progreso:
+            progreso(procesados, cambiados)
+        if pausa:
+            time.sleep(pausa)
+
+    if cambiados:
+        asignacion.invalidar_indice()
+    return procesados, cambiados
+
+
+# ----------------------------------------------------------------------
+# Cola de recálculos
+# ----------------------------------------------------------------------
+def encolar(categoria=None, motivo=''):
+    """
+    Encola un recálculo (de una categoría o de todas), salvo que ya haya
+    uno pendiente igual: lee las horas al correr, así que alcanza con uno.
+    """
+    pendientes = RecalculoSLA.objects.filter(estado='PENDIENTE', categoria=categoria)
+    if pendientes.exists():
+        return None
+    return RecalculoSLA.objects.create(categoria=categoria, motivo=motivo[:200])
+
+
+def _reclamar(recalculo_id):
+    # Como en la bandeja de notificaciones: si otro worker ya lo tomó, el
+    # UPDATE no afecta filas
+    return RecalculoSLA.objects.filter(pk=recalculo_id, estado='PENDIENTE').update(
+        estado='EN_CURSO', fecha_inicio=timezone.now(),
+    ) == 1
+
+
+def procesar_pendientes(lote=None, pausa=0, progreso=None):
+    """
+    Corre los recálculos encolados, en orden. `progreso(recalculo)` se
+    llama tras cada lote (además de guardarlo en la fila y en el log).
+    Devuelve la lista de recálculos procesados.
+    """
+    if lote is None:
+        lote = getattr(settings, 'SLA_RECALCULO_LOTE', 500)
+    ids = list(
+        RecalculoSLA.objects.filter(estado='PENDIENTE')
+        .order_by('fecha_creacion').values_list('id', flat=True)
+    )
+
+    hechos = []
+    for pk in ids:
+        if not _reclamar(pk):
+            continue
+        recalculo = RecalculoSLA.objects.select_related('categoria').get(pk=pk)
+
+        def _lote(procesados, cambiados, recalculo=recalculo):
+            recalculo.procesados, recalculo.cambiados = procesados, cambiados
+            recalculo.save(update_fields=['procesados', 'cambiados'])
+            logger.info(
+                "Recálculo de SLA %s (%s): %s ticket(s) revisados, %s con nuevo límite...",
+                recalculo.pk, recalculo.categoria or 'todas', procesados, cambiados,
+            )
+            if progreso:
+                progreso(recalculo)
+
+        try:
+            recalcular_limites(recalculo.categoria_id, lote=lote, pausa=pausa, progreso=_lote)
+        except Exception as e:
+            recalculo.estado = 'FALLIDO'
+            recalculo.ultimo_error = f"{type(e).__name__}: {e}"[:2000]
+            logger.exception("Recálculo de SLA %s falló.", recalculo.pk)
+        else:
+            recalculo.estado = 'TERMINADO'
+            logger.info(
+                "Recálculo de SLA %s (%s) terminado: %s ticket(s) revisados, %s con nuevo límite.",
+                recalculo.pk, recalculo.categoria or 'todas', recalculo.procesados, recalculo.cambiados,
+            )
+        recalculo.fecha_fin = timezone.now()
+        recalculo.save(update_fields=['estado', 'ultimo_error', 'fecha_fin'])
+        hechos.append(recalculo)
+
+    return hechos
+
+
+# ----------------------------------------------------------------------
+# Encolado automático al cambiar el SLA de una categoría
+# ----------------------------------------------------------------------
+def _horas_anteriores(sender, instance, raw=False, **kwargs):
+    if raw or not instance.pk:
+        return
+    instance._sla_horas_anterior = (
+        CategoriaAveria.objects.filter(pk=instance.pk)
+        .values_list('tiempo_sla_horas', flat=True).first()
+    )
+
+
+def _categoria_guardada(sender, instance, created, raw=False, **kwargs):
+    if raw or created or not getattr(settings, 'SLA_RECALCULO_AUTOMATICO', True):
+        return
+    anterior = getattr(instance, '_sla_horas_anterior', None)
+    if anterior is None or anterior == instance.tiempo_sla_horas:
+        return
+
+    # En la misma transacción que la categoría; el trabajo lo hace el worker
+    encolar(instance, f"SLA cambió de {anterior}h a {instance.tiempo_sla_horas}h")
+
+
+def conectar_senales():
+    pre_save.connect(_horas_anteriores, sender=CategoriaAveria, dispatch_uid='recalculo_sla_pre_save')
+    post_save.connect(_categoria_guardada, sender=CategoriaAveria, dispatch_uid='recalculo_sla_post_save')
@@ -0,0 +1,133 @@
+"""
+Asignador atómico de números de ticket.
+
+Antes `Ticket.save()` hacía `aggregate(Max('id'))` en cada alta: una
+consulta extra y, con dos workers creando a la vez, ambos obtenían el
+mismo `TKT-xxxxxx` y uno reventaba con el UNIQUE.
+
+Ahora cada número sale de una fila contador (`Secuencia`) que se
+incrementa con un único `UPDATE ... RETURNING`. Opcionalmente cada proceso
+reserva un bloque de números (settings.TICKETS_BLOQUE_NUMEROS) y los va
+entregando en memoria, así la mayoría de las altas no tocan el contador.
+
+El contador se reserva fuera de la transacción del alta: `ticket_crear`
+pide el número (`nuevo_numero_ticket`) antes de abrirla. Si se reservara
+adentro, la fila de `Secuencia` quedaría bloqueada hasta el commit de
+todo el alta (asignación, historial, notificaciones) y las altas volverían
+a ir de a una.
+"""
+import os
+import threading
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F, Max
+
+from .models import Secuencia, Ticket
+
+
+SECUENCIA_TICKETS = 'numero_ticket'
+
+
+def _soporta_update_returning():
+    if connection.vendor == 'postgresql':
+        return True
+    return connection.vendor == 'sqlite' and connection.features.can_return_columns_from_insert
+
+
+def _crear_secuencia(nombre):
+    """
+    Crea el contador si no existe, arrancando desde el mayor id de ticket
+    (misma numeración que usaba el antiguo Max('id')).
+    """
+    inicial = Ticket.objects.aggregate(m=Max('id'))['m'] or 0
+    try:
+        with transaction.atomic():
+            Secuencia.objects.create(nombre=nombre, valor=inicial)
+    except IntegrityError:
+        # Otro proceso la creó justo antes: no pasa nada.
+        pass
+
+
+def reservar_bloque(nombre, cantidad=1):
+    """
+    Suma `cantidad` al contador en una sola sentencia y devuelve el último
+    número reservado. El bloque entregado es (valor - cantidad, valor].
+    """
+    tabla = connection.ops.quote_name(Secuencia._meta.db_table)
+
+    for _intento in range(2):
+        if _soporta_update_returning():
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"UPDATE {tabla} SET valor = valor + %s WHERE nombre = %s RETURNING valor",
+                    [cantidad, nombre],
+                )
+                fila = cursor.fetchone()
+            if fila:
+                return fila[0]
+        else:
+            with transaction.atomic():
+                if Secuencia.objects.filter(nombre=nombre).update(valor=F('valor') + cantidad):
+                    return Secuencia.objects.values_list('valor', flat=True).get(nombre=nombre)
+
+        _crear_secuencia(nombre)
+
+    raise RuntimeError(f"No se pudo reservar la secuencia '{nombre}'.")
+
+
+class AsignadorNumeros:
+    """
+    Entrega números consecutivos reservando bloques del contador.
+    Seguro entre hilos; tras un fork (workers de gunicorn/uwsgi) descarta
+    el bloque heredado para no repetir números del proceso padre.
+
+    Dentro de una transacción se siguen entregando los números que quedan
+    del bloque (ya confirmado: si la transacción se deshace solo queda un
+    hueco), pero no se reserva un bloque nuevo: si se deshiciera, el
+    contador volvería atrás y esos números se repetirían. En ese caso se
+    reserva solo el número que se usa, con la fila bloqueada hasta el fin
+    de la transacción.
+    """
+
+    def __init__(self, nombre, bloque=1):
+        self.nombre = nombre
+        self.bloque = max(int(bloque), 1)
+        self._lock = threading.Lock()
+        self._pid = None
+        self._actual = 0
+        self._limite = 0
+
+    def siguiente(self):
+        with self._lock:
+            if self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._actual = self._limite = 0
+
+            if self._actual >= self._limite:
+                if connection.in_atomic_block:
+                    return reservar_bloque(self.nombre, 1)
+                self._limite = reservar_bloque(self.nombre, self.bloque)
+                self._actual = self._limite - self.bloque
+
+            self._actual += 1
+            return self._actual
+
+
+_asignador_tickets = None
+
+
+def siguiente_numero_ticket():
+    """Siguiente número para `Ticket.numero_ticket`."""
+    global _asignador_tickets
+    if _asignador_tickets is None:
+        _asignador_tickets = AsignadorNumeros(
+            SECUENCIA_TICKETS,
+            bloque=getattr(settings, 'TICKETS_BLOQUE_NUMEROS', 1),
+        )
+    return _asignador_tickets.siguiente()
+
+
+def nuevo_numero_ticket():
+    """`numero_ticket` para un alta ('TKT-000123')."""
+    return f"TKT-{siguiente_numero_ticket():06d}"
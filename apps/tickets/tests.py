@@ -0,0 +1,1124 @@
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+from unittest import mock
+
+import requests
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.http import Http404
+from django.db import DatabaseError, connection, transaction
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.locales.models import Local
+from config.sqlite.base import DatabaseWrapper as SQLiteWrapper
+from apps.reportes import resumenes
+from apps.reportes.models import ResumenDiario
+from apps.usuarios.models import DispositivoNotificacion, Usuario
+from . import asignacion, contadores, notificaciones
+from .archivo import archivables, archivar, archivar_lote, comentarios_de, obtener_ticket
+from .asignacion import tomar_ticket
+from .busqueda import filtrar_busqueda
+from .calendario import calcular_limite_sla, invalidar_calendarios
+from .fcm import ErrorTemporalFCM, enviar_notificacion_nuevo_ticket
+from .models import (
+    CategoriaAveria, ComentarioTicket, Feriado, IndiceParcialPostgres, NotificacionSaliente,
+    RecalculoSLA, Secuencia, Ticket, TicketArchivado, TransicionTicket,
+)
+from .paginacion import codificar_cursor, paginar_por_cursor
+from .programador_sla import AVISO, VENCIDO, ProgramadorSLA, emitir
+from .recalculo_sla import procesar_pendientes
+from .secuencias import AsignadorNumeros, reservar_bloque
+from .transiciones import tiempo_en_estados, tiempo_por_tecnico, tiempo_por_ticket
+from .visibilidad import categorias_de_tecnico, puede_ver_ticket, tickets_visibles
+
+
+class DatosTickets:
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = Usuario.objects.create_user('admin', password='x', rol='ADMIN')
+        cls.tecnico = Usuario.objects.create_user('tecnico', password='x', rol='TECNICO')
+        cls.categoria = CategoriaAveria.objects.create(nombre='PC')
+        cls.local = Local.objects.create(
+            codigo='L1', nombre='Banca 1', direccion='-',
+            provincia='Santo Domingo', municipio='Santo Domingo Este',
+        )
+
+    def crear_ticket(self, **extra):
+        return Ticket.objects.create(**{
+            'local': self.local, 'categoria': self.categoria, 'titulo': 'No enciende',
+            'descripcion': '-', 'creado_por': self.admin, **extra,
+        })
+
+
+class AportesTests(DatosTickets, TestCase):
+
+    def resumenes_no_vacios(self):
+        filas = ResumenDiario.objects.values_list(
+            'dia', 'local_id', 'categoria_id', 'tecnico_id', *resumenes.METRICAS,
+        )
+        # Restar un aporte deja la fila en cero, no la borra
+        return sorted((fila for fila in filas if any(fila[4:])), key=repr)
+
+    def assertDatosAlDia(self):
+        # Lo mantenido por señales == lo recalculado desde cero
+        self.assertEqual(contadores.reconciliar(corregir=False), [])
+        guardados = self.resumenes_no_vacios()
+        resumenes.reconstruir()
+        self.assertEqual(guardados, self.resumenes_no_vacios())
+
+    def test_cargar_no_consulta_nada_mas(self):
+        ticket = self.crear_ticket(asignado_a=self.tecnico)
+        ticket.estado = 'CERRADO'
+        ticket.save()
+        # Ni calendario laboral ni locales al cargar un ticket cerrado
+        with self.assertNumQueries(1):
+            Ticket.objects.get(pk=ticket.pk)
+
+    def lecturas_de_tickets(self, funcion):
+        with CaptureQueriesContext(connection) as consultas:
+            funcion()
+        return [
+            q['sql'] for q in consultas.captured_queries
+            if q['sql'].startswith('SELECT') and 'FROM "tickets_ticket"' in q['sql']
+        ]
+
+    def test_guardar_sin_tocar_campos_de_aporte(self):
+        ticket = Ticket.objects.get(pk=self.crear_ticket().pk)
+        ticket.titulo = 'Otro título'
+        with CaptureQueriesContext(connection) as consultas:
+            ticket.save()
+        tablas = ' '.join(q['sql'] for q in consultas.captured_queries)
+        self.assertNotIn('reportes_resumendiario', tablas)
+        self.assertNotIn('locales_local"', tablas)
+        self.assertNotIn('SELECT "tickets_ticket"', tablas)
+
+    def test_only_pide_lo_que_falta_una_vez(self):
+        pk = self.crear_ticket().pk
+        # Los que lee Ticket.save(); local, categoría y fecha_creacion no
+        ticket = Ticket.objects.only(
+            'id', 'numero_ticket', 'estado', 'asignado_a', 'fecha_limite_sla',
+            'fecha_asignacion', 'fecha_resolucion', 'fecha_cierre',
+        ).get(pk=pk)
+        ticket.estado = 'EN_PROCESO'
+        self.assertEqual(len(self.lecturas_de_tickets(ticket.save)), 1)
+
+    def test_cambios_de_estado_y_tecnico(self):
+        ticket = self.crear_ticket()
+        self.assertDatosAlDia()
+
+        ticket = Ticket.objects.get(pk=ticket.pk)
+        ticket.asignado_a = self.tecnico
+        ticket.estado = 'EN_PROCESO'
+        ticket.save()
+        self.assertDatosAlDia()
+
+        ticket = Ticket.objects.only('id', 'estado').get(pk=ticket.pk)
+        ticket.estado = 'CERRADO'
+        ticket.save()
+        self.assertDatosAlDia()
+        self.local.refresh_from_db()
+        self.assertEqual(self.local.contador_abiertos, 0)
+
+    def test_dos_instancias_viejas_del_mismo_ticket(self):
+        pk = self.crear_ticket(asignado_a=self.tecnico).pk
+        a, b = Ticket.objects.get(pk=pk), Ticket.objects.get(pk=pk)
+        a.estado = 'CERRADO'
+        a.save()
+        # b todavía cree que está PENDIENTE: no puede restar el abierto otra vez
+        b.estado = 'CANCELADO'
+        b.save()
+        self.assertDatosAlDia()
+        self.assertEqual(contadores.reconciliar(corregir=False), [])
+
+        c, d = Ticket.objects.get(pk=pk), Ticket.objects.get(pk=pk)
+        c.estado = 'EN_PROCESO'
+        c.save()
+        # d solo escribe el técnico: el estado de la BD es el de c
+        d.asignado_a = None
+        d.save()
+        self.assertEqual(Ticket.objects.values_list('estado', 'asignado_a').get(), ('EN_PROCESO', None))
+        self.assertDatosAlDia()
+
+    def test_borrar(self):
+        self.crear_ticket(asignado_a=self.tecnico)
+        Ticket.objects.only('id').get().delete()
+        self.assertDatosAlDia()
+        self.tecnico.refresh_from_db()
+        self.assertEqual(self.tecnico.contador_abiertos, 0)
+
+    def test_tomar_y_luego_guardar(self):
+        ticket = Ticket.objects.get(pk=self.crear_ticket().pk)
+        self.assertTrue(tomar_ticket(ticket, self.tecnico))
+        self.assertDatosAlDia()
+        ticket.estado = 'EN_PROCESO'
+        ticket.save(actor=self.tecnico)
+        self.assertDatosAlDia()
+        self.assertEqual(
+            list(ticket.transiciones.values_list('estado_nuevo', 'tecnico_anterior_id')),
+            [('PENDIENTE', None), ('PENDIENTE', None), ('EN_PROCESO', self.tecnico.pk)],
+        )
+
+
+class SecuenciasTests(TransactionTestCase):
+
+    def test_unicos_y_crecientes_con_y_sin_transaccion(self):
+        Secuencia.objects.create(nombre='prueba')
+        asignador = AsignadorNumeros('prueba', bloque=5)
+        numeros = []
+        with CaptureQueriesContext(connection) as consultas:
+            for i in range(12):
+                if i % 3:
+                    numeros.append(asignador.siguiente())
+                else:
+                    with transaction.atomic():
+                        numeros.append(asignador.siguiente())
+        self.assertEqual(numeros, list(range(1, 13)))
+        # Dentro de la transacción se usa el bloque ya reservado; solo se
+        # reserva uno suelto si se acabó justo ahí (1 y 7): 2 bloques + 2
+        reservas = [q for q in consultas.captured_queries if q['sql'].startswith('UPDATE')]
+        self.assertEqual(len(reservas), 4)
+        self.assertEqual(Secuencia.objects.get(nombre='prueba').valor, 12)
+
+    def test_transaccion_deshecha_no_repite(self):
+        asignador = AsignadorNumeros('prueba', bloque=3)
+        confirmados = [asignador.siguiente()]
+        try:
+            with transaction.atomic():
+                asignador.siguiente()
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        confirmados += [asignador.siguiente() for _ in range(5)]
+        self.assertEqual(confirmados, sorted(set(confirmados)))
+
+    def test_hilos_y_procesos(self):
+        # Dos asignadores = dos procesos con el mismo contador
+        asignadores = [AsignadorNumeros('prueba', bloque=4), AsignadorNumeros('prueba', bloque=1)]
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            # La base de pruebas en memoria no espera (busy_timeout) a otra
+            # conexión que escribe: falla en el acto. Ahí, uno compartido.
+            asignadores = asignadores[:1]
+        AsignadorNumeros('prueba').siguiente()  # crea la fila antes de arrancar
+        numeros, errores = [], []
+
+        def trabajar(asignador):
+            try:
+                for _ in range(25):
+                    numeros.append(asignador.siguiente())
+            except Exception as error:
+                errores.append(error)
+            finally:
+                connection.close()
+
+        hilos = [
+            threading.Thread(target=trabajar, args=(asignadores[i % len(asignadores)],))
+            for i in range(4)
+        ]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        self.assertEqual(errores, [])
+        self.assertEqual(len(numeros), 100)
+        self.assertEqual(len(set(numeros)), 100)
+
+    def test_crear_reserva_fuera_de_la_transaccion(self):
+        admin = Usuario.objects.create_user('admin', password='x', rol='ADMIN')
+        categoria = CategoriaAveria.objects.create(nombre='PC')
+        self.client.force_login(admin)
+        en_transaccion = []
+
+        def reservar(*args):
+            en_transaccion.append(connection.in_atomic_block)
+            return reservar_bloque(*args)
+
+        with mock.patch('apps.tickets.secuencias.reservar_bloque', reservar):
+            self.client.post(reverse('ticket_crear'), {
+                'local': 'gd01', 'categoria': categoria.pk, 'descripcion': 'No enciende',
+                'prioridad': 'MEDIA',
+            })
+        ticket = Ticket.objects.get()
+        self.assertTrue(ticket.numero_ticket.startswith('TKT-'))
+        self.assertEqual(en_transaccion, [False])
+
+
+class IndicesParcialesTests(TestCase):
+
+    def test_solo_en_postgresql(self):
+        parciales = [
+            indice.name for indice in Ticket._meta.indexes
+            if isinstance(indice, IndiceParcialPostgres)
+        ]
+        with connection.cursor() as cursor:
+            existentes = connection.introspection.get_constraints(cursor, 'tickets_ticket')
+        self.assertTrue(parciales)
+        for nombre in parciales:
+            self.assertEqual(nombre in existentes, connection.vendor == 'postgresql', nombre)
+
+
+class IndiceCargaTests(DatosTickets, TestCase):
+
+    def setUp(self):
+        asignacion.invalidar_indice()
+        self.tecnico.especialidades.add(self.categoria)
+
+    def test_elegir_sin_consultas(self):
+        asignacion.obtener_indice()
+        with self.assertNumQueries(0):
+            self.assertEqual(asignacion.obtener_indice().elegir(
+                self.categoria.pk, timezone.now(), self.local.pk,
+            ), self.tecnico.pk)
+
+    def test_se_arma_fuera_del_lock(self):
+        tomado = []
+        armar = asignacion._armar
+
+        def tomar_lock():
+            if asignacion._lock.acquire(timeout=1):
+                tomado.append(True)
+                asignacion._lock.release()
+
+        def armar_y_mirar():
+            # Otro hilo puede tomar el lock mientras se lee la BD
+            hilo = threading.Thread(target=tomar_lock)
+            hilo.start()
+            hilo.join()
+            # Un ticket que se confirma mientras tanto no se pierde
+            asignacion._aplicar(999, 'PENDIENTE', self.tecnico.pk, timezone.now(), self.local.pk)
+            return armar()
+
+        with mock.patch.object(asignacion, '_armar', armar_y_mirar):
+            indice = asignacion.obtener_indice()
+        self.assertEqual(tomado, [True])
+        self.assertEqual(indice.carga(self.tecnico.pk), 1)
+
+
+class BusquedaTests(DatosTickets, TestCase):
+
+    def setUp(self):
+        self.digitador = Usuario.objects.create_user('digitador', password='x', rol='DIGITADOR')
+        self.ticket = Ticket.objects.create(
+            local=self.local, categoria=self.categoria, titulo='Impresora atascada',
+            descripcion='No saca papel', creado_por=self.digitador,
+        )
+        self.otro = self.crear_ticket()
+        ComentarioTicket.objects.create(ticket=self.ticket, usuario=self.admin, comentario='Cambiado el rodillo')
+        ComentarioTicket.objects.create(
+            ticket=self.ticket, usuario=self.admin, comentario='Clave del router ornitorrinco', es_interno=True,
+        )
+
+    def encontrados(self, texto, internos=True):
+        return list(filtrar_busqueda(Ticket.objects.all(), texto, internos))
+
+    def test_campos_y_prefijos(self):
+        self.assertEqual(self.encontrados('impres'), [self.ticket])
+        self.assertEqual(self.encontrados('rodillo'), [self.ticket])
+        self.assertEqual(self.encontrados(self.ticket.numero_ticket), [self.ticket])
+        # Todas las palabras son obligatorias
+        self.assertEqual(self.encontrados('impresora rodillo'), [self.ticket])
+        self.assertEqual(self.encontrados('impresora inexistente'), [])
+        self.assertEqual(self.encontrados('"* -'), [])
+        self.assertEqual(set(self.encontrados('banca')), {self.ticket, self.otro})
+
+    def test_internos_solo_para_quien_los_lee(self):
+        self.assertEqual(self.encontrados('ornitorrinco'), [self.ticket])
+        self.assertEqual(self.encontrados('ornitorrinco', internos=False), [])
+        self.assertEqual(self.encontrados('impresora', internos=False), [self.ticket])
+
+        url = reverse('tickets_lista') + '?buscar=ornitorrinco&ver=todos'
+        self.client.force_login(self.digitador)
+        self.assertEqual(list(self.client.get(url).context['tickets']), [])
+        self.client.force_login(self.admin)
+        self.assertEqual(list(self.client.get(url).context['tickets']), [self.ticket])
+
+    def test_renombrar_local(self):
+        self.local.nombre = 'Banca Esperanza'
+        self.local.save()
+        self.assertEqual(set(self.encontrados('esperanza')), {self.ticket, self.otro})
+        self.local.codigo = 'ZX9'
+        self.local.save(update_fields=['codigo'])
+        self.assertEqual(set(self.encontrados('zx9')), {self.ticket, self.otro})
+
+    def test_comentario_borrado(self):
+        ComentarioTicket.objects.get(es_interno=False).delete()
+        self.assertEqual(self.encontrados('rodillo'), [])
+        self.assertEqual(self.encontrados('impresora'), [self.ticket])
+
+
+class PaginacionTests(DatosTickets, TestCase):
+
+    def setUp(self):
+        self.tickets = [self.crear_ticket() for _ in range(7)]
+        # Tres con la misma fecha: desempata el id
+        fecha = self.tickets[2].fecha_creacion
+        Ticket.objects.filter(pk__in=[t.pk for t in self.tickets[2:5]]).update(fecha_creacion=fecha)
+        self.orden = list(Ticket.objects.order_by('-fecha_creacion', '-id').values_list('id', flat=True))
+
+    def test_recorrer_todas_las_paginas(self):
+        vistos, cursor, paginas = [], None, 0
+        while True:
+            tickets, cursor = paginar_por_cursor(Ticket.objects.all(), cursor=cursor, por_pagina=2)
+            vistos += [t.id for t in tickets]
+            paginas += 1
+            if cursor is None:
+                break
+        self.assertEqual(vistos, self.orden)
+        self.assertEqual(paginas, 4)
+
+    def test_estable_si_llegan_tickets_nuevos(self):
+        primera, cursor = paginar_por_cursor(Ticket.objects.all(), por_pagina=3)
+        self.crear_ticket()
+        segunda, _ = paginar_por_cursor(Ticket.objects.all(), cursor=cursor, por_pagina=3)
+        self.assertEqual([t.id for t in primera + segunda], self.orden[:6])
+
+    def test_cursores_invalidos(self):
+        enorme = codificar_cursor(timezone.now(), 10 ** 30)
+        sin_zona = codificar_cursor(timezone.now().replace(tzinfo=None), self.orden[0])
+        self.client.force_login(self.admin)
+        for cursor in ['', 'basura', '%%%', 'w6k', 'eHx5', enorme, sin_zona]:
+            respuesta = self.client.get(reverse('tickets_lista'), {'ver': 'todos', 'cursor': cursor})
+            self.assertEqual(respuesta.status_code, 200, cursor)
+        # Uno malo es "sin cursor": la primera página
+        respuesta = self.client.get(reverse('tickets_lista'), {'ver': 'todos', 'cursor': 'basura'})
+        self.assertEqual([t.id for t in respuesta.context['tickets']], self.orden)
+
+    def test_digitador_ve_todos_los_estados_de_los_suyos(self):
+        digitador = Usuario.objects.create_user('digitador', password='x', rol='DIGITADOR')
+        propios = [
+            Ticket.objects.create(
+                local=self.local, categoria=self.categoria, titulo=estado, descripcion='-',
+                creado_por=digitador, estado=estado,
+            )
+            for estado in ['PENDIENTE', 'CERRADO']
+        ]
+        self.client.force_login(digitador)
+        for ver in [None, 'abiertos', 'cerrados']:
+            respuesta = self.client.get(reverse('tickets_lista'), {'ver': ver} if ver else {})
+            self.assertEqual(set(respuesta.context['tickets']), set(propios), ver)
+            self.assertEqual(respuesta.context['ver'], 'todos')
+
+
+class RecalculoSLATests(DatosTickets, TestCase):
+
+    def cambiar_sla(self, horas):
+        self.categoria.tiempo_sla_horas = horas
+        self.categoria.save()
+
+    def test_guardar_categoria_solo_encola(self):
+        ticket = self.crear_ticket()
+        limite = ticket.fecha_limite_sla
+        self.cambiar_sla(48)
+        self.cambiar_sla(72)
+        ticket.refresh_from_db()
+        self.assertEqual(ticket.fecha_limite_sla, limite)
+        self.assertEqual(RecalculoSLA.objects.filter(estado='PENDIENTE').count(), 1)
+
+    def test_worker_recalcula_con_progreso(self):
+        tickets = [self.crear_ticket() for _ in range(3)]
+        self.crear_ticket(estado='CERRADO')
+        self.cambiar_sla(48)
+
+        vistos = []
+        hechos = procesar_pendientes(lote=2, progreso=lambda r: vistos.append(r.procesados))
+
+        self.assertEqual(len(hechos), 1)
+        recalculo = RecalculoSLA.objects.get()
+        self.assertEqual(recalculo.estado, 'TERMINADO')
+        self.assertEqual((recalculo.procesados, recalculo.cambiados), (3, 3))
+        self.assertEqual(vistos, [2, 3])
+        for ticket in tickets:
+            anterior = ticket.fecha_limite_sla
+            ticket.refresh_from_db()
+            self.assertGreater(ticket.fecha_limite_sla, anterior)
+        self.assertEqual(procesar_pendientes(), [])
+
+    def test_indice_de_asignacion_se_rearma(self):
+        indice = asignacion.obtener_indice()
+        self.assertIs(asignacion.obtener_indice(), indice)
+
+        self.crear_ticket(asignado_a=self.tecnico)
+        self.cambiar_sla(48)
+        procesar_pendientes()
+        self.assertIsNot(asignacion.obtener_indice(), indice)
+
+        # Terminado en otro proceso: este se entera por la versión en caché
+        indice = asignacion.obtener_indice()
+        cache.incr(asignacion.CLAVE_VERSION)
+        self.assertIsNot(asignacion.obtener_indice(), indice)
+
+
+class ProgramadorSLATests(DatosTickets, TestCase):
+
+    def setUp(self):
+        self.programador = ProgramadorSLA(porcentaje_aviso=50)
+        self.inicio = timezone.now()
+
+    def horas(self, n):
+        return self.inicio + timedelta(hours=n)
+
+    def test_eventos_en_orden_de_momento(self):
+        # Aviso a mitad del plazo: 1 -> 5h/10h, 2 -> 2h/4h, 3 -> 4h/8h
+        for ticket_id, limite in [(1, 10), (2, 4), (3, 8)]:
+            self.programador.programar(ticket_id, self.inicio, self.horas(limite), self.inicio)
+        self.assertEqual(self.programador.proximo(), self.horas(2))
+        # Empate a las 4h: desempata el id del ticket
+        self.assertEqual(self.programador.vencidos(self.horas(4)), [(2, AVISO), (2, VENCIDO), (3, AVISO)])
+        self.assertEqual(self.programador.vencidos(self.horas(24)), [(1, AVISO), (3, VENCIDO), (1, VENCIDO)])
+        self.assertIsNone(self.programador.proximo())
+
+    def test_entradas_viejas_se_descartan(self):
+        self.programador.programar(1, self.inicio, self.horas(10), self.inicio)
+        # Nuevo límite: las entradas de 5h/10h quedan en el heap pero viejas
+        self.programador.programar(1, self.inicio, self.horas(20), self.inicio)
+        self.assertEqual(self.programador.vencidos(self.horas(9)), [])
+        self.assertEqual(self.programador.proximo(), self.horas(10))
+        # Vuelta al límite original: sus entradas aparecen una sola vez
+        self.programador.programar(1, self.inicio, self.horas(10), self.inicio)
+        self.assertEqual(self.programador.vencidos(self.horas(10)), [(1, AVISO), (1, VENCIDO)])
+        self.programador.quitar(1)
+        self.assertIsNone(self.programador.proximo())
+
+    def test_cerrar_olvida_lo_emitido(self):
+        self.programador.programar(1, self.inicio, self.horas(10), self.inicio)
+        self.programador.marcar_emitidos(self.programador.vencidos(self.horas(10)))
+        self.programador.quitar(1)
+        self.assertEqual(self.programador._emitidos, set())
+        # Reabierto con el mismo límite: se vuelve a agendar
+        self.programador.programar(1, self.inicio, self.horas(10), self.inicio)
+        self.assertEqual(self.programador.proximo(), self.horas(5))
+
+    def programar_vencido(self):
+        # Ya vencido al agendarlo: solo el evento VENCIDO
+        ticket = self.crear_ticket()
+        creacion = timezone.now() - timedelta(hours=10)
+        Ticket.objects.filter(pk=ticket.pk).update(fecha_creacion=creacion, fecha_limite_sla=self.inicio)
+        self.programador.aplicar(
+            Ticket.objects.filter(pk=ticket.pk).values('id', 'estado', 'fecha_creacion',
+                                                       'fecha_limite_sla', 'fecha_actualizacion'),
+            self.inicio,
+        )
+        return ticket
+
+    def test_se_marca_al_confirmar_el_encolado(self):
+        ticket = self.programar_vencido()
+        with self.captureOnCommitCallbacks(execute=False) as pendientes:
+            self.assertEqual(emitir(self.programador, self.inicio), [(ticket.pk, VENCIDO)])
+        self.assertEqual(self.programador._emitidos, set())
+        for callback in pendientes:
+            callback()
+        self.assertEqual(self.programador._emitidos, {(ticket.pk, AVISO), (ticket.pk, VENCIDO)})
+        self.assertEqual(NotificacionSaliente.objects.filter(ticket=ticket, tipo=VENCIDO).count(), 1)
+
+    def test_si_falla_el_encolado_se_reintenta(self):
+        ticket = self.programar_vencido()
+        with mock.patch('apps.tickets.programador_sla.encolar_alertas_sla', side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                emitir(self.programador, self.inicio)
+        self.assertEqual(self.programador._emitidos, set())
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(emitir(self.programador, self.inicio), [(ticket.pk, VENCIDO)])
+        self.assertEqual(NotificacionSaliente.objects.filter(ticket=ticket, tipo=VENCIDO).count(), 1)
+        self.assertIsNone(self.programador.proximo())
+
+
+class CalendarioSLATests(TestCase):
+    # Horario por defecto: lunes a sábado de 8:00 a 18:00. El 2 de marzo
+    # de 2026 es lunes.
+
+    def setUp(self):
+        invalidar_calendarios()
+        self.addCleanup(invalidar_calendarios)
+
+    def hora(self, dia, hora, minuto=0):
+        return timezone.make_aware(datetime(2026, 3, dia, hora, minuto))
+
+    def test_inicio_fuera_de_horario(self):
+        casos = [
+            (self.hora(2, 6), 1, self.hora(2, 9)),     # antes de abrir
+            (self.hora(2, 20), 2, self.hora(3, 10)),   # después de cerrar
+            (self.hora(1, 12), 1, self.hora(2, 9)),    # domingo
+        ]
+        for inicio, horas, esperado in casos:
+            self.assertEqual(calcular_limite_sla(inicio, horas), esperado, inicio)
+
+    def test_termina_justo_al_cierre(self):
+        # Vence a las 18:00 del mismo día, no a las 8:00 del siguiente
+        self.assertEqual(calcular_limite_sla(self.hora(2, 8), 10), self.hora(2, 18))
+        self.assertEqual(calcular_limite_sla(self.hora(2, 17, 30), 20), self.hora(4, 17, 30))
+
+    def test_salta_feriados_y_dias_cerrados_seguidos(self):
+        # Sábado 7 y lunes 9 feriados, domingo cerrado: del viernes al martes
+        Feriado.objects.create(fecha=date(2026, 3, 7), nombre='Uno')
+        Feriado.objects.create(fecha=date(2026, 3, 9), nombre='Dos')
+        self.assertEqual(calcular_limite_sla(self.hora(6, 17), 2), self.hora(10, 9))
+
+    @override_settings(SLA_HORARIO_LABORAL={
+        0: ('08:00', '18:00'), 1: ('00:00', '00:00'), 2: ('12:00', '12:00'), 3: ('08:00', '12:00'),
+    })
+    def test_dias_de_cero_horas(self):
+        # Martes y miércoles sin horas: del lunes 17:00 al jueves 9:00
+        self.assertEqual(calcular_limite_sla(self.hora(2, 17), 2), self.hora(5, 9))
+        # Jueves termina a las 12:00 y no abre hasta el lunes siguiente
+        self.assertEqual(calcular_limite_sla(self.hora(5, 11), 2), self.hora(9, 9))
+
+    def test_feriado_de_provincia(self):
+        Feriado.objects.create(fecha=date(2026, 3, 3), nombre='Local', provincia='Santiago')
+        inicio = self.hora(2, 17)
+        self.assertEqual(calcular_limite_sla(inicio, 2, 'Santiago'), self.hora(4, 9))
+        self.assertEqual(calcular_limite_sla(inicio, 2, 'Santo Domingo'), self.hora(3, 9))
+        self.assertEqual(calcular_limite_sla(inicio, 2), self.hora(3, 9))
+
+
+class GuardadoParcialTests(DatosTickets, TestCase):
+
+    def updates(self, ticket):
+        with CaptureQueriesContext(connection) as consultas:
+            ticket.save()
+        return [q['sql'] for q in consultas.captured_queries if q['sql'].startswith('UPDATE "tickets_ticket"')]
+
+    def test_solo_las_columnas_cambiadas(self):
+        ticket = Ticket.objects.get(pk=self.crear_ticket().pk)
+        ticket.prioridad = 'ALTA'
+        [sql] = self.updates(ticket)
+        asignaciones = sql.split(' SET ')[1].split(' WHERE ')[0]
+        columnas = sorted(parte.split(' = ')[0] for parte in asignaciones.split(', '))
+        self.assertEqual(columnas, ['"fecha_actualizacion"', '"prioridad"'])
+
+        # Sin cambios: solo fecha_actualizacion
+        [sql] = self.updates(ticket)
+        self.assertNotIn('"prioridad"', sql)
+
+    def test_fila_borrada_se_vuelve_a_insertar(self):
+        ticket = Ticket.objects.get(pk=self.crear_ticket().pk)
+        Ticket.objects.filter(pk=ticket.pk).delete()
+        ticket.prioridad = 'ALTA'
+        ticket.save()
+        self.assertEqual(Ticket.objects.get(pk=ticket.pk).prioridad, 'ALTA')
+
+        # update_fields explícitos: sigue el comportamiento de Django
+        Ticket.objects.filter(pk=ticket.pk).delete()
+        with self.assertRaises(DatabaseError):
+            ticket.save(update_fields=['prioridad'])
+
+
+@override_settings(NOTIFICACIONES_MAX_INTENTOS=3, NOTIFICACIONES_REINTENTO_SEGUNDOS=30)
+class BandejaSalidaTests(DatosTickets, TestCase):
+
+    def setUp(self):
+        ticket = self.crear_ticket(asignado_a=self.tecnico)
+        self.notif = NotificacionSaliente.objects.create(ticket=ticket, tipo='PUSH_NUEVO_TICKET')
+        self.envios = []
+        self.error = None
+        parche = mock.patch.dict(notificaciones.MANEJADORES, {'PUSH_NUEVO_TICKET': self.enviar})
+        parche.start()
+        self.addCleanup(parche.stop)
+
+    def enviar(self, ticket):
+        self.envios.append(ticket.pk)
+        if self.error:
+            raise self.error
+
+    def procesar(self):
+        # Como si ya hubiera pasado la espera del reintento
+        NotificacionSaliente.objects.filter(estado='PENDIENTE').update(proximo_intento=timezone.now())
+        return notificaciones.procesar_pendientes()
+
+    def test_enviada(self):
+        self.assertEqual(self.procesar(), {'enviadas': 1, 'reintentos': 0, 'fallidas': 0})
+        self.notif.refresh_from_db()
+        self.assertEqual((self.notif.estado, self.notif.intentos), ('ENVIADA', 1))
+        self.assertTrue(Ticket.objects.get(pk=self.notif.ticket_id).notificacion_enviada)
+        # Ya no se vuelve a enviar
+        self.procesar()
+        self.assertEqual(self.envios, [self.notif.ticket_id])
+
+    def test_reintentos_con_backoff_hasta_fallida(self):
+        self.error = ConnectionError('sin red')
+        esperas = []
+        for _ in range(2):
+            antes = timezone.now()
+            self.assertEqual(self.procesar()['reintentos'], 1)
+            self.notif.refresh_from_db()
+            esperas.append(round((self.notif.proximo_intento - antes).total_seconds()))
+        self.assertEqual(esperas, [30, 60])
+        self.assertEqual(self.notif.ultimo_error, 'ConnectionError: sin red')
+
+        with self.assertLogs('apps.tickets.notificaciones', 'ERROR'):
+            self.assertEqual(self.procesar()['fallidas'], 1)
+        self.notif.refresh_from_db()
+        self.assertEqual((self.notif.estado, self.notif.intentos), ('FALLIDA', 3))
+        self.procesar()
+        self.assertEqual(len(self.envios), 3)
+
+    def test_espera_con_tope(self):
+        self.assertEqual(notificaciones._espera_reintento(1), timedelta(seconds=30))
+        self.assertEqual(notificaciones._espera_reintento(20), timedelta(hours=1))
+
+    def test_reclamada_por_otro_worker(self):
+        ahora = timezone.now()
+        bloqueo = timedelta(minutes=5)
+        self.assertTrue(notificaciones._reclamar(self.notif.pk, ahora, bloqueo))
+        # Otro worker en el mismo momento: ya no está disponible
+        self.assertFalse(notificaciones._reclamar(self.notif.pk, ahora, bloqueo))
+        self.assertEqual(notificaciones.procesar_pendientes(), {'enviadas': 0, 'reintentos': 0, 'fallidas': 0})
+        # Si el que la tomó murió, vuelve a estar disponible al vencer el bloqueo
+        self.assertTrue(notificaciones._reclamar(self.notif.pk, ahora + bloqueo, bloqueo))
+
+    def test_encolar_nuevo_ticket(self):
+        ticket = self.crear_ticket(asignado_a=self.tecnico)
+        tipos = [n.tipo for n in notificaciones.encolar_notificaciones_nuevo_ticket(ticket)]
+        self.assertEqual(tipos, ['WHATSAPP_ASIGNADO', 'PUSH_NUEVO_TICKET'])
+        self.assertEqual(notificaciones.encolar_notificaciones_nuevo_ticket(self.crear_ticket()), [])
+
+
+class PushTokensInvalidosTests(DatosTickets, TestCase):
+
+    def setUp(self):
+        for token in ['bueno', 'desinstalado', 'ocupado']:
+            DispositivoNotificacion.objects.create(usuario=self.tecnico, fcm_token=token)
+        silencio = mock.patch('apps.tickets.fcm.print', create=True)
+        silencio.start()
+        self.addCleanup(silencio.stop)
+
+    def respuesta(self, status, cuerpo):
+        resp = requests.Response()
+        resp.status_code = status
+        resp._content = json.dumps(cuerpo).encode()
+        return resp
+
+    def test_desactiva_los_invalidos_y_reintenta_los_temporales(self):
+        cliente = mock.Mock()
+        cliente.enviar_a_tokens.return_value = {
+            'bueno': self.respuesta(200, {'name': 'ok'}),
+            'desinstalado': self.respuesta(404, {'error': {
+                'status': 'NOT_FOUND', 'details': [{'errorCode': 'UNREGISTERED'}],
+            }}),
+            'ocupado': self.respuesta(503, {'error': {'status': 'UNAVAILABLE'}}),
+        }
+        ticket = self.crear_ticket(asignado_a=self.tecnico)
+        with mock.patch('apps.tickets.fcm.obtener_cliente_fcm', return_value=cliente):
+            with self.assertRaises(ErrorTemporalFCM):
+                enviar_notificacion_nuevo_ticket(ticket, lanzar_errores=True)
+
+        [(tokens, _mensaje), _] = cliente.enviar_a_tokens.call_args
+        self.assertEqual(sorted(tokens), ['bueno', 'desinstalado', 'ocupado'])
+        activos = DispositivoNotificacion.objects.filter(activo=True).values_list('fcm_token', flat=True)
+        self.assertEqual(sorted(activos), ['bueno', 'ocupado'])
+
+        # El reintento ya no incluye el token desactivado
+        cliente.enviar_a_tokens.return_value = {}
+        with mock.patch('apps.tickets.fcm.obtener_cliente_fcm', return_value=cliente):
+            enviar_notificacion_nuevo_ticket(ticket, lanzar_errores=True)
+        self.assertEqual(sorted(cliente.enviar_a_tokens.call_args.args[0]), ['bueno', 'ocupado'])
+
+
+class VisibilidadTests(DatosTickets, TestCase):
+
+    def setUp(self):
+        cache.clear()
+        internet = CategoriaAveria.objects.create(nombre='Internet')
+        self.tecnico.especialidades.add(self.categoria)
+        self.sin_especialidad = Usuario.objects.create_user('comodin', password='x', rol='TECNICO')
+        self.digitador = Usuario.objects.create_user('digitador', password='x', rol='DIGITADOR')
+        self.pc_libre = self.crear_ticket(creado_por=self.digitador)
+        self.internet_libre = self.crear_ticket(categoria=internet)
+        self.internet_suyo = self.crear_ticket(categoria=internet, asignado_a=self.tecnico)
+        self.pc_de_otro = self.crear_ticket(asignado_a=self.sin_especialidad)
+        cache.clear()
+
+    def test_por_rol(self):
+        esperados = {
+            self.admin: {self.pc_libre, self.internet_libre, self.internet_suyo, self.pc_de_otro},
+            self.digitador: {self.pc_libre},
+            self.tecnico: {self.pc_libre, self.internet_suyo},
+            self.sin_especialidad: {self.pc_libre, self.internet_libre, self.pc_de_otro},
+            Usuario.objects.create_user('otro', password='x', rol='OTRO'): set(),
+        }
+        for usuario, visibles in esperados.items():
+            self.assertEqual(set(tickets_visibles(usuario, Ticket.objects.all())), visibles, usuario.rol)
+            # Las mismas reglas para un ticket ya cargado
+            for ticket in Ticket.objects.all():
+                self.assertEqual(puede_ver_ticket(usuario, ticket), ticket in visibles, (usuario, ticket))
+
+    def test_especialidades_cacheadas(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(categorias_de_tecnico(self.tecnico), {self.categoria.pk})
+        # Otro objeto del mismo técnico (otra petición): sale de la caché
+        tecnico = Usuario.objects.get(pk=self.tecnico.pk)
+        with self.assertNumQueries(0):
+            categorias_de_tecnico(tecnico)
+            puede_ver_ticket(tecnico, self.pc_libre)
+
+    def test_cambios_de_especialidades_invalidan(self):
+        nueva = CategoriaAveria.objects.create(nombre='Impresora')
+        categorias_de_tecnico(self.tecnico)
+        self.tecnico.especialidades.add(nueva)
+        self.assertEqual(categorias_de_tecnico(self.tecnico), {self.categoria.pk, nueva.pk})
+
+        # Desde el lado de la categoría (otro objeto usuario: solo la caché)
+        nueva.tecnicos_especialistas.remove(self.tecnico)
+        self.assertEqual(categorias_de_tecnico(Usuario.objects.get(pk=self.tecnico.pk)), {self.categoria.pk})
+        self.categoria.tecnicos_especialistas.clear()
+        self.assertEqual(categorias_de_tecnico(Usuario.objects.get(pk=self.tecnico.pk)), frozenset())
+
+
+class ConSLATests(DatosTickets, TestCase):
+
+    def setUp(self):
+        self.ahora = timezone.now().replace(microsecond=0)
+        # (estado, horas usadas, horas de plazo)
+        casos = [
+            ('PENDIENTE', 2, 10), ('EN_PROCESO', 6, 10), ('PENDIENTE', 8, 10),
+            ('PENDIENTE', 12, 10), ('RESUELTO', 12, 10), ('CERRADO', 3, 10),
+            ('CANCELADO', 12, 10), ('PENDIENTE', 10, 10), ('PENDIENTE', 1, 0),
+        ]
+        for estado, usadas, plazo in casos:
+            ticket = self.crear_ticket(estado=estado)
+            creacion = self.ahora - timedelta(hours=usadas)
+            Ticket.objects.filter(pk=ticket.pk).update(
+                fecha_creacion=creacion, fecha_limite_sla=creacion + timedelta(hours=plazo),
+            )
+
+    def test_igual_que_los_metodos_del_modelo(self):
+        anotados = {t.pk: t for t in Ticket.objects.con_sla(self.ahora)}
+        with mock.patch('apps.tickets.models.timezone.now', return_value=self.ahora):
+            for ticket in Ticket.objects.all():
+                anotado = anotados[ticket.pk]
+                caso = (ticket.estado, ticket.fecha_limite_sla - ticket.fecha_creacion)
+                self.assertEqual(anotado.sla_vencido, ticket.esta_vencido(), caso)
+                self.assertEqual(anotado.sla_color, ticket.get_color_sla(), caso)
+                self.assertAlmostEqual(anotado.sla_porcentaje, ticket.porcentaje_tiempo_usado(), 6, caso)
+                restante = ticket.tiempo_restante_sla()
+                if restante is None:
+                    self.assertIsNone(anotado.sla_segundos_restantes, caso)
+                else:
+                    self.assertEqual(max(anotado.sla_segundos_restantes, 0), restante.total_seconds(), caso)
+                # Con la anotación, los métodos no vuelven a calcular
+                self.assertEqual(anotado.esta_vencido(), anotado.sla_vencido)
+                self.assertEqual(anotado.get_color_sla(), anotado.sla_color)
+
+    def test_filtrar_y_ordenar_en_sql(self):
+        colores = Ticket.objects.con_sla(self.ahora).values_list('sla_color', flat=True)
+        self.assertEqual(sorted(colores), ['danger'] * 5 + ['success'] * 3 + ['warning'])
+        self.assertEqual(Ticket.objects.con_sla(self.ahora).filter(sla_vencido=True).count(), 2)
+        restantes = list(
+            Ticket.objects.con_sla(self.ahora).filter(estado='PENDIENTE')
+            .order_by('sla_segundos_restantes').values_list('sla_segundos_restantes', flat=True)
+        )
+        self.assertEqual(restantes, [-7200, -3600, 0, 7200, 28800])
+
+
+class TomarTicketTests(DatosTickets, TestCase):
+
+    def test_dos_tecnicos_con_el_mismo_ticket_cargado(self):
+        otro = Usuario.objects.create_user('otro', password='x', rol='TECNICO')
+        pk = self.crear_ticket().pk
+        primero, segundo = Ticket.objects.get(pk=pk), Ticket.objects.get(pk=pk)
+
+        self.assertTrue(tomar_ticket(primero, self.tecnico))
+        self.assertFalse(tomar_ticket(segundo, otro))
+        self.assertIsNone(segundo.asignado_a_id)
+
+        # Guardar la copia vieja no pisa el técnico (solo escribe lo que cambió)
+        segundo.prioridad = 'ALTA'
+        segundo.save(actor=otro)
+        ticket = Ticket.objects.get(pk=pk)
+        self.assertEqual((ticket.asignado_a_id, ticket.prioridad), (self.tecnico.pk, 'ALTA'))
+        self.assertEqual(
+            list(ticket.transiciones.values_list('tecnico_id', 'actor_id')),
+            [(None, None), (self.tecnico.pk, self.tecnico.pk)],
+        )
+
+    def test_cerrado_no_se_toma(self):
+        ticket = self.crear_ticket(estado='CERRADO')
+        self.assertFalse(tomar_ticket(ticket, self.tecnico))
+        self.assertIsNone(Ticket.objects.get(pk=ticket.pk).asignado_a_id)
+
+    def test_vista(self):
+        ticket = self.crear_ticket()
+        self.client.force_login(self.tecnico)
+        self.client.post(reverse('ticket_tomar', args=[ticket.pk]))
+        self.assertEqual(Ticket.objects.get(pk=ticket.pk).asignado_a_id, self.tecnico.pk)
+
+        otro = Usuario.objects.create_user('otro', password='x', rol='TECNICO')
+        self.client.force_login(otro)
+        respuesta = self.client.post(reverse('ticket_tomar', args=[ticket.pk]))
+        mensajes = [str(m) for m in get_messages(respuesta.wsgi_request)]
+        self.assertEqual(mensajes[-1], 'Este ticket ya tiene un técnico asignado.')
+        self.assertEqual(Ticket.objects.get(pk=ticket.pk).asignado_a_id, self.tecnico.pk)
+
+
+class TomarTicketConcurrenteTests(TransactionTestCase):
+
+    def setUp(self):
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            self.skipTest('La base de pruebas en memoria no espera a otra conexión que escribe')
+
+    def test_solo_uno_lo_consigue(self):
+        admin = Usuario.objects.create_user('admin', password='x', rol='ADMIN')
+        tecnicos = [Usuario.objects.create_user(f'tecnico{i}', password='x', rol='TECNICO') for i in range(6)]
+        ticket = Ticket.objects.create(
+            local=Local.objects.create(codigo='L1', nombre='Banca 1'),
+            categoria=CategoriaAveria.objects.create(nombre='PC'),
+            titulo='No enciende', descripcion='-', creado_por=admin,
+        )
+        barrera = threading.Barrier(len(tecnicos), timeout=10)
+        resultados, errores = {}, []
+
+        def tomar(tecnico):
+            try:
+                copia = Ticket.objects.get(pk=ticket.pk)
+                barrera.wait()
+                resultados[tecnico.pk] = tomar_ticket(copia, tecnico)
+            except Exception as error:
+                errores.append(error)
+            finally:
+                connection.close()
+
+        hilos = [threading.Thread(target=tomar, args=(t,)) for t in tecnicos]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+
+        self.assertEqual(errores, [])
+        ganadores = [pk for pk, tomado in resultados.items() if tomado]
+        self.assertEqual(len(ganadores), 1)
+        self.assertEqual(Ticket.objects.get(pk=ticket.pk).asignado_a_id, ganadores[0])
+        self.assertEqual(
+            list(TransicionTicket.objects.filter(ticket_id=ticket.pk).values_list('tecnico_id', flat=True)),
+            [None, ganadores[0]],
+        )
+        self.assertEqual(contadores.reconciliar(corregir=False), [])
+
+
+class TiempoEnEstadosTests(DatosTickets, TestCase):
+
+    def setUp(self):
+        self.otro = Usuario.objects.create_user('otro', password='x', rol='TECNICO')
+        self.inicio = timezone.now().replace(microsecond=0) - timedelta(days=1)
+        self.ahora = self.inicio + timedelta(hours=10)
+
+    def historial(self, *tramos):
+        """Ticket con transiciones (horas desde el inicio, estado, técnico)."""
+        ticket = self.crear_ticket()
+        TransicionTicket.objects.filter(ticket=ticket).delete()
+        for horas, estado, tecnico in tramos:
+            TransicionTicket.registrar(
+                SimpleNamespace(pk=ticket.pk, estado=estado, asignado_a_id=tecnico and tecnico.pk,
+                                categoria_id=ticket.categoria_id),
+                '', None, fecha=self.inicio + timedelta(hours=horas),
+            )
+        return ticket
+
+    def test_tramos_hasta_la_siguiente_transicion(self):
+        ticket = self.historial(
+            (0, 'PENDIENTE', None),
+            (1, 'PENDIENTE', self.tecnico),       # asignado
+            (3, 'EN_PROCESO', self.tecnico),
+            (4, 'PENDIENTE', self.otro),          # reasignado
+            (6, 'CERRADO', self.otro),            # no cuenta
+        )
+        self.assertEqual(
+            tiempo_por_ticket(ticket.pk, ahora=self.ahora),
+            {'PENDIENTE': timedelta(hours=5), 'EN_PROCESO': timedelta(hours=1)},
+        )
+        filas = list(tiempo_en_estados(ahora=self.ahora, ticket_id=ticket.pk))
+        self.assertEqual([(f['estado'], f['tramos'], f['tickets']) for f in filas],
+                         [('EN_PROCESO', 1, 1), ('PENDIENTE', 3, 1)])
+
+        por_tecnico = {
+            (f['tecnico_id'], f['estado']): f['segundos'] for f in tiempo_por_tecnico(ahora=self.ahora)
+        }
+        self.assertEqual(por_tecnico, {
+            (None, 'PENDIENTE'): 3600,
+            (self.tecnico.pk, 'PENDIENTE'): 7200,
+            (self.tecnico.pk, 'EN_PROCESO'): 3600,
+            (self.otro.pk, 'PENDIENTE'): 7200,
+        })
+
+    def test_ultimo_tramo_abierto_y_empates(self):
+        ticket = self.historial((2, 'PENDIENTE', None), (2, 'PENDIENTE', self.tecnico))
+        # Misma fecha: el primero dura 0 y el segundo sigue hasta ahora
+        self.assertEqual(tiempo_por_ticket(ticket.pk, ahora=self.ahora), {'PENDIENTE': timedelta(hours=8)})
+
+    def test_rango_por_inicio_del_tramo(self):
+        self.historial((0, 'PENDIENTE', None), (1, 'EN_PROCESO', self.tecnico), (5, 'RESUELTO', self.tecnico))
+        filas = tiempo_en_estados(
+            desde=self.inicio + timedelta(minutes=30), hasta=self.inicio + timedelta(hours=5), ahora=self.ahora,
+        )
+        # Solo el tramo EN_PROCESO empieza dentro; su fin sigue siendo el siguiente
+        self.assertEqual([(f['estado'], f['segundos']) for f in filas], [('EN_PROCESO', 4 * 3600)])
+
+    def test_save_registra_solo_cambios_de_estado_o_tecnico(self):
+        ticket = self.crear_ticket()
+        ticket.titulo = 'Otro título'
+        ticket.save()
+        ticket.asignado_a = self.tecnico
+        ticket.save(actor=self.admin)
+        ticket.estado = 'EN_PROCESO'
+        ticket.save(actor=self.tecnico)
+        self.assertEqual(
+            list(ticket.transiciones.order_by('fecha', 'id').values_list(
+                'estado_anterior', 'estado_nuevo', 'tecnico_anterior_id', 'tecnico_id', 'actor_id',
+            )),
+            [
+                ('', 'PENDIENTE', None, None, None),
+                ('PENDIENTE', 'PENDIENTE', None, self.tecnico.pk, self.admin.pk),
+                ('PENDIENTE', 'EN_PROCESO', self.tecnico.pk, self.tecnico.pk, self.tecnico.pk),
+            ],
+        )
+        transicion = ticket.transiciones.first()
+        with self.assertRaises(ValueError):
+            transicion.save()
+
+
+class ArchivoTests(DatosTickets, TestCase):
+
+    def setUp(self):
+        self.viejo = self.crear_ticket(asignado_a=self.tecnico, titulo='Impresora atascada')
+        self.viejo.estado = 'CERRADO'
+        self.viejo.save(actor=self.tecnico)
+        ComentarioTicket.objects.create(ticket=self.viejo, usuario=self.tecnico, comentario='Cambiado el rodillo')
+        self.cancelado = self.crear_ticket(estado='CANCELADO')
+        self.reciente = self.crear_ticket(estado='CERRADO')
+        self.abierto = self.crear_ticket()
+        hace_un_ano = timezone.now() - timedelta(days=365)
+        Ticket.objects.exclude(pk=self.reciente.pk).update(fecha_actualizacion=hace_un_ano)
+
+    def test_solo_cerrados_o_cancelados_viejos(self):
+        self.assertEqual(set(archivables(dias=30)), {self.viejo, self.cancelado})
+        avance = []
+        self.assertEqual(archivar(dias=30, lote=1, progreso=avance.append), 2)
+        self.assertEqual(avance, [1, 2])
+        self.assertEqual(set(Ticket.objects.all()), {self.reciente, self.abierto})
+        self.assertEqual(set(TicketArchivado.objects.values_list('id', flat=True)), {self.viejo.pk, self.cancelado.pk})
+
+    def test_se_vuelve_a_comprobar_en_el_lote(self):
+        # Reabierto entre la lista de ids y el lote: no se archiva
+        ids = list(archivables(dias=30).values_list('id', flat=True))
+        self.viejo.estado = 'PENDIENTE'
+        self.viejo.save()
+        self.assertEqual(archivar_lote(ids, dias=30), 1)
+        self.assertTrue(Ticket.objects.filter(pk=self.viejo.pk).exists())
+
+    def test_archivar_y_leer_de_vuelta(self):
+        original = Ticket.objects.get(pk=self.viejo.pk)
+        valores = {f.attname: getattr(original, f.attname) for f in Ticket._meta.concrete_fields}
+        NotificacionSaliente.objects.create(ticket=original, tipo='PUSH_NUEVO_TICKET')
+        contadores_antes = list(Local.objects.values_list(*Local.CONTADORES))
+        resumenes_antes = sorted(ResumenDiario.objects.values_list(*resumenes.METRICAS))
+        transiciones = list(original.transiciones.values_list('id', flat=True))
+        comentario_id = ComentarioTicket.objects.get(ticket=original).pk
+
+        self.assertEqual(archivar_lote([original.pk], dias=30), 1)
+
+        # Se lee igual que antes de archivarlo, pero marcado y sin guardar
+        ticket = obtener_ticket(original.pk)
+        self.assertTrue(ticket.archivado)
+        self.assertEqual({f.attname: getattr(ticket, f.attname) for f in Ticket._meta.concrete_fields}, valores)
+        self.assertEqual(
+            [(c.pk, c.comentario) for c in comentarios_de(ticket)], [(comentario_id, 'Cambiado el rodillo')],
+        )
+        self.assertFalse(ComentarioTicket.objects.filter(pk=comentario_id).exists())
+        self.assertFalse(obtener_ticket(self.abierto.pk).archivado)
+        with self.assertRaises(Http404):
+            obtener_ticket(10 ** 6)
+
+        # Sin notificaciones, fuera de la búsqueda; reportes y contadores igual
+        self.assertFalse(NotificacionSaliente.objects.filter(ticket_id=original.pk).exists())
+        self.assertEqual(list(filtrar_busqueda(Ticket.objects.all(), 'rodillo')), [])
+        self.assertEqual(list(Local.objects.values_list(*Local.CONTADORES)), contadores_antes)
+        self.assertEqual(sorted(ResumenDiario.objects.values_list(*resumenes.METRICAS)), resumenes_antes)
+        self.assertEqual(
+            list(TransicionTicket.objects.filter(ticket_id=original.pk).values_list('id', flat=True)), transiciones,
+        )
+
+    def test_detalle_solo_lectura(self):
+        archivar_lote([self.viejo.pk], dias=30)
+        self.client.force_login(self.admin)
+        url = reverse('ticket_detalle', args=[self.viejo.pk])
+        respuesta = self.client.get(url)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertFalse(respuesta.context['puede_actualizar_estado'])
+        self.assertEqual([c.comentario for c in respuesta.context['comentarios']], ['Cambiado el rodillo'])
+        self.assertEqual(self.client.post(url, {'agregar_comentario': '1'}).status_code, 403)
+
+
+class PerfilSQLiteTests(SimpleTestCase):
+
+    def setUp(self):
+        carpeta = tempfile.TemporaryDirectory()
+        self.addCleanup(carpeta.cleanup)
+        self.ruta = os.path.join(carpeta.name, 'perfil.sqlite3')
+
+    def conexion(self, **opciones):
+        ajustes = {**connection.settings_dict, 'NAME': self.ruta, 'OPTIONS': opciones}
+        conexion = SQLiteWrapper(ajustes, alias='perfil')
+        self.addCleanup(conexion.close)
+        return conexion
+
+    def pragma(self, conexion, nombre):
+        with conexion.cursor() as cursor:
+            cursor.execute(f'PRAGMA {nombre}')
+            return cursor.fetchone()[0]
+
+    def test_pragmas_en_cada_conexion(self):
+        pragmas = {
+            'journal_mode': 'WAL', 'synchronous': 'NORMAL', 'busy_timeout': 1234,
+            'mmap_size': 1048576, 'cache_size': -2000, 'temp_store': 'MEMORY',
+        }
+        conexion = self.conexion(pragmas=pragmas, timeout=1)
+        esperados = {
+            'journal_mode': 'wal', 'synchronous': 1, 'busy_timeout': 1234,
+            'mmap_size': 1048576, 'cache_size': -2000, 'temp_store': 2,
+        }
+        for nombre, valor in esperados.items():
+            self.assertEqual(self.pragma(conexion, nombre), valor, nombre)
+        # Una conexión nueva (p. ej. tras CONN_MAX_AGE) los vuelve a aplicar
+        conexion.close()
+        self.assertEqual(self.pragma(conexion, 'busy_timeout'), 1234)
+
+    def test_pragma_invalido(self):
+        conexion = self.conexion(pragmas={'journal_mode': 'WAL; DROP TABLE x'})
+        with self.assertRaises(ImproperlyConfigured):
+            conexion.ensure_connection()
+
+    def bloqueada_por(self, conexion):
+        """True si mientras `conexion` abre una transacción otro no puede escribir."""
+        conexion.ensure_connection()
+        conexion.set_autocommit(False, force_begin_transaction_with_broken_autocommit=True)
+        otro = sqlite3.connect(self.ruta, timeout=0)
+        try:
+            otro.execute('BEGIN IMMEDIATE')
+            otro.rollback()
+            return False
+        except sqlite3.OperationalError as error:
+            self.assertIn('locked', str(error))
+            return True
+        finally:
+            otro.close()
+            conexion.rollback()
+            conexion.set_autocommit(True)
+
+    def test_transaction_mode(self):
+        self.assertFalse(self.bloqueada_por(self.conexion()))
+        self.assertFalse(self.bloqueada_por(self.conexion(transaction_mode='deferred')))
+        # IMMEDIATE toma el lock de escritura al empezar, sin haber escrito
+        self.assertTrue(self.bloqueada_por(self.conexion(transaction_mode='IMMEDIATE')))
+
+    def test_transaction_mode_invalido(self):
+        conexion = self.conexion(transaction_mode='LAZY')
+        conexion.ensure_connection()
+        with self.assertRaises(ImproperlyConfigured):
+            conexion.set_autocommit(False, force_begin_transaction_with_broken_autocommit=True)
@@ -0,0 +1,87 @@
+"""
+Tiempo en cada estado a partir de `TransicionTicket`.
+
+Cada transición abre un tramo (estado_nuevo, técnico) que dura hasta la
+siguiente transición del mismo ticket, o hasta ahora si es la última. La
+siguiente se busca con una subconsulta sobre el índice (ticket, fecha,
+id), y la suma se hace en la base de datos agrupando filas de eventos
+(pocas columnas) en vez de recorrer la tabla de tickets.
+
+Los tramos en CERRADO / CANCELADO no se cuentan (no tienen fin). Con
+`desde` / `hasta` entran los tramos que empiezan en ese rango.
+"""
+from datetime import timedelta
+
+from django.db import models
+from django.db.models import Count, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import SegundosEpoch, TransicionTicket
+
+
+ESTADOS_FINALES = ['CERRADO', 'CANCELADO']
+
+
+def con_duracion(qs=None, ahora=None):
+    """Anota `duracion` (segundos) de cada tramo y deja fuera los finales."""
+    ahora = ahora or timezone.now()
+    qs = TransicionTicket.objects.all() if qs is None else qs
+    siguiente = (
+        TransicionTicket.objects
+        .filter(ticket_id=OuterRef('ticket_id'))
+        .filter(Q(fecha__gt=OuterRef('fecha')) | Q(fecha=OuterRef('fecha'), id__gt=OuterRef('id')))
+        .order_by('fecha', 'id')
+        .values('fecha')[:1]
+    )
+    return qs.exclude(estado_nuevo__in=ESTADOS_FINALES).alias(
+        fin=Coalesce(
+            Subquery(siguiente),
+            Value(ahora, output_field=models.DateTimeField()),
+        ),
+    ).annotate(
+        duracion=SegundosEpoch('fin') - SegundosEpoch('fecha'),
+    )
+
+
+def tiempo_en_estados(por=(), desde=None, hasta=None, ahora=None, **filtros):
+    """
+    Filas {'estado', *por, 'segundos', 'tramos', 'tickets'} con el tiempo
+    total en cada estado, agrupado además por los campos de `por` (p. ej.
+    'tecnico_id', 'categoria_id'). `filtros` se aplica a las transiciones.
+    Un ticket puede tener varios tramos en el mismo estado (reasignado,
+    reabierto): para promedios por ticket dividir por `tickets`.
+    """
+    qs = TransicionTicket.objects.filter(**filtros)
+    if desde:
+        qs = qs.filter(fecha__gte=desde)
+    if hasta:
+        qs = qs.filter(fecha__lt=hasta)
+    return (
+        con_duracion(qs, ahora)
+        .values(*por, estado=models.F('estado_nuevo'))
+        .annotate(
+            segundos=Sum('duracion'),
+            tramos=Count('id'),
+            tickets=Count('ticket_id', distinct=True),
+        )
+        .order_by(*por, 'estado')
+    )
+
+
+def tiempo_por_ticket(ticket_id, ahora=None):
+    """{estado: timedelta} de un ticket."""
+    return {
+        fila['estado']: timedelta(seconds=fila['segundos'] or 0)
+        for fila in tiempo_en_estados(ahora=ahora, ticket_id=ticket_id)
+    }
+
+
+def tiempo_por_tecnico(desde=None, hasta=None, ahora=None):
+    """Tiempo por (técnico, estado); técnico None = sin asignar."""
+    return tiempo_en_estados(('tecnico_id',), desde, hasta, ahora)
+
+
+def tiempo_por_categoria(desde=None, hasta=None, ahora=None):
+    """Tiempo por (categoría, estado)."""
+    return tiempo_en_estados(('categoria_id',), desde, hasta, ahora)
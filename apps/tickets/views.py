@@ -1,14 +1,19 @@
-from django.db.models import Q
+from django.conf import settings
+from django.db import transaction
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.http import HttpResponseForbidden
 
-from .utils import enviar_whatsapp_ticket_asignado
-from apps.tickets.models import Ticket, ComentarioTicket
+from apps.tickets.models import COLORES_SLA, ESTADOS_CERRADOS, ESTADOS_SLA_ACTIVO, Ticket
 from apps.tickets.forms import TicketForm, ComentarioTicketForm, TicketEstadoForm
-from .fcm import enviar_notificacion_nuevo_ticket
-from apps.locales.models import Local
+from .archivo import comentarios_de, obtener_ticket
+from .asignacion import asignar_automaticamente, tomar_ticket
+from .busqueda import paginar_busqueda
+from .notificaciones import encolar_notificaciones_nuevo_ticket
+from .paginacion import CAMPOS_FILA_TICKET, paginar_por_cursor
+from .secuencias import nuevo_numero_ticket
+from .visibilidad import categoria_permitida, puede_ver_ticket, tickets_visibles
 
 
 
@@ -20,62 +25,91 @@ def tickets_lista(request):
     - ADMIN:
         puede ver abiertos / cerrados / todos (filtro ?ver=...)
     - DIGITADOR:
-        igual que admin pero solo de los que él creó
+        solo los que él creó, en cualquier estado (sin filtro ?ver)
     - TÉCNICO:
         SOLO ve tickets ABIERTOS:
           * los que tiene asignados
           * + los sin asignar de sus categorías de especialidad
+
+    Las reglas por rol viven en `apps.tickets.visibilidad`.
+
+    Paginado por cursor (?cursor=...) sobre (fecha_creacion, id) y
+    trayendo solo las columnas que imprime la fila de la tabla.
+
+    Con ?buscar=... se filtra por texto completo (número, título, local,
+    descripción, solución o comentarios) ordenando por relevancia y
+    paginando por número (?pagina=...).
+
+    El SLA de cada fila se calcula en la consulta (`con_sla`) y se puede
+    filtrar por color con ?sla=success|warning|danger.
     """
     usuario = request.user
     ver = request.GET.get('ver', 'abiertos')
+    buscar = request.GET.get('buscar', '').strip()
+    sla = request.GET.get('sla', '')
+    if sla not in COLORES_SLA:
+        sla = ''
 
     tickets = Ticket.objects.select_related(
-        'local', 'categoria', 'creado_por', 'asignado_a'
-    )
+        'local', 'categoria', 'asignado_a'
+    ).only(*CAMPOS_FILA_TICKET).con_sla()
 
-    # --- Filtro por rol ---
-    if usuario.es_digitador():
-        tickets = tickets.filter(creado_por=usuario)
-
-    elif usuario.es_tecnico():
-        cats = usuario.especialidades.all()
+    if sla:
+        tickets = tickets.filter(sla_color=sla)
 
-        if cats.exists():
-            tickets = tickets.filter(
-                Q(asignado_a=usuario) |
-                Q(asignado_a__isnull=True, categoria__in=cats)
-            )
-        else:
-            # Técnico sin especialidades configuradas => ve solo
-            # tickets abiertos asignados a él o sin asignar
-            tickets = tickets.filter(
-                Q(asignado_a=usuario) |
-                Q(asignado_a__isnull=True)
-            )
+    # --- Filtro por rol ---
+    tickets = tickets_visibles(usuario, tickets)
 
+    if usuario.es_tecnico():
         # Para técnicos SIEMPRE solo abiertos, ignoramos ?ver
-        tickets = tickets.exclude(
-            estado__in=['RESUELTO', 'CERRADO', 'CANCELADO']
-        )
+        tickets = tickets.filter(estado__in=ESTADOS_SLA_ACTIVO)
         ver = 'abiertos'  # para marcar pestaña en plantilla si usas tabs
 
+    elif usuario.es_digitador():
+        # Digitador: todos los estados de los suyos, ignoramos ?ver
+        ver = 'todos'
+
     else:
-        # ADMIN normal
+        # ADMIN. En positivo y con las mismas listas que los índices
+        # parciales de Ticket (PostgreSQL no los usa con exclude)
         if ver == 'abiertos':
-            tickets = tickets.exclude(
-                estado__in=['RESUELTO', 'CERRADO', 'CANCELADO']
-            )
+            tickets = tickets.filter(estado__in=ESTADOS_SLA_ACTIVO)
         elif ver == 'cerrados':
-            tickets = tickets.filter(
-                estado__in=['RESUELTO', 'CERRADO', 'CANCELADO']
-            )
+            tickets = tickets.filter(estado__in=ESTADOS_CERRADOS)
         # ver == 'todos' => sin filtro extra
 
-    tickets = tickets.order_by('-fecha_creacion')
+    por_pagina = getattr(settings, 'TICKETS_POR_PAGINA', 50)
+    cursor = siguiente_cursor = None
+    pagina, hay_siguiente = 1, False
+
+    if buscar:
+        try:
+            pagina = max(int(request.GET.get('pagina', 1)), 1)
+        except ValueError:
+            pagina = 1
+        tickets, hay_siguiente = paginar_busqueda(
+            tickets, buscar, pagina=pagina, por_pagina=por_pagina,
+            # Los comentarios internos solo los leen admin y técnicos
+            internos=usuario.puede_trabajar_tickets(),
+        )
+    else:
+        cursor = request.GET.get('cursor')
+        tickets, siguiente_cursor = paginar_por_cursor(
+            tickets,
+            cursor=cursor,
+            por_pagina=por_pagina,
+        )
 
     contexto = {
         'tickets': tickets,
         'ver': ver,
+        'buscar': buscar,
+        'sla': sla,
+        'cursor': cursor,
+        'siguiente_cursor': siguiente_cursor,
+        'pagina': pagina,
+        'pagina_anterior': pagina - 1,
+        'pagina_siguiente': pagina + 1 if hay_siguiente else None,
     }
     return render(request, 'tickets/tickets_lista.html', contexto)
 
@@ -114,85 +148,63 @@ def ticket_crear(request):
             ticket.titulo = f'{base} - {resumen}' if resumen else base
             # ==========================
 
-            ticket.save()
-            form.save_m2m()  # por si el form tiene ManyToMany
-
-            # 👉 WhatsApp al técnico asignado (como ya tenías)
-            enviar_whatsapp_ticket_asignado(ticket)
+            # El número antes de la transacción: así el contador no queda
+            # bloqueado hasta que termine el alta (ver secuencias.py)
+            ticket.numero_ticket = nuevo_numero_ticket()
 
-            # 👉 NUEVO: notificación push al técnico asignado (FCM)
-            try:
-                enviar_notificacion_nuevo_ticket(ticket)
-            except Exception:
-                import logging
-                logging.getLogger(__name__).exception(
-                    "Error enviando notificación FCM para el ticket %s",
-                    ticket.id,
-                )
+            # Ticket + notificaciones en la misma transacción: el envío
+            # (WhatsApp / FCM) lo hace `manage.py procesar_notificaciones`.
+            with transaction.atomic():
+                # Sin técnico elegido: el de menos carga de esa especialidad
+                asignar_automaticamente(ticket)
+                ticket.save(actor=usuario)
+                form.save_m2m()  # por si el form tiene ManyToMany
+                encolar_notificaciones_nuevo_ticket(ticket)
 
             messages.success(request, f'Ticket {ticket.numero_ticket} creado correctamente.')
             return redirect('ticket_detalle', pk=ticket.pk)
     else:
         form = TicketForm(usuario=usuario)
-    locales_sugeridos = Local.objects.filter(activo=True).order_by('nombre')\
-        .values_list('nombre', flat=True)
-        
+
+    # Las sugerencias de locales las pide el navegador a
+    # `locales:autocompletar` mientras se escribe.
     contexto = {
         'form': form,
-        'locales_sugeridos': locales_sugeridos,   
-    }         
-        
+    }
 
     return render(request, 'tickets/ticket_form.html', contexto)
 
 
 @login_required
 def ticket_detalle(request, pk):
-    ticket = get_object_or_404(Ticket, pk=pk)
+    # Vivo o archivado (los archivados se muestran solo para lectura)
+    ticket = obtener_ticket(pk)
     usuario = request.user
 
     # ---------- PERMISOS DE VISUALIZACIÓN ----------
-    if usuario.es_admin():
-        # Admin ve todo
-        pass
-
-    elif usuario.es_digitador():
-        # Digitador solo ve tickets que él creó
-        if ticket.creado_por != usuario:
-            return HttpResponseForbidden("No tienes permiso para ver este ticket.")
-
-    elif usuario.es_tecnico():
-        # Técnico: siempre puede ver los que están asignados a él
-        if ticket.asignado_a == usuario:
-            pass
-        else:
-            # Si está asignado a otro → no
-            if ticket.asignado_a is not None:
-                return HttpResponseForbidden("No tienes permiso para ver este ticket.")
-
-            # Si está sin asignar: solo si la categoría está en sus especialidades
-            cats = usuario.especialidades.all()
-            if cats.exists() and ticket.categoria not in cats:
-                return HttpResponseForbidden("No tienes permiso para ver este ticket.")
-    else:
+    # (reglas por rol en apps.tickets.visibilidad)
+    if not puede_ver_ticket(usuario, ticket):
         return HttpResponseForbidden("No tienes permiso para ver este ticket.")
     # ---------- FIN PERMISOS DE VISTA ----------
 
     # ¿Quién puede CAMBIAR el ESTADO?
     #   ✅ Admin
     #   ✅ Técnico asignado
-    if usuario.es_admin():
+    if ticket.archivado:
+        puede_actualizar_estado = False
+    elif usuario.es_admin():
         puede_actualizar_estado = True
-    elif usuario.es_tecnico() and ticket.asignado_a == usuario:
+    elif usuario.es_tecnico() and ticket.asignado_a_id == usuario.pk:
         puede_actualizar_estado = True
     else:
         puede_actualizar_estado = False
 
-    comentarios = ComentarioTicket.objects.filter(
-        ticket=ticket
-    ).select_related('usuario').order_by('fecha_creacion')
+    comentarios = comentarios_de(ticket)
 
     # ---------- POST / GET ----------
+    if request.method == "POST" and ticket.archivado:
+        return HttpResponseForbidden("El ticket está archivado; no se puede modificar.")
+
     if request.method == "POST":
 
         # 1) Actualizar estado
@@ -217,7 +229,7 @@ def ticket_detalle(request, pk):
                 if not usuario.es_admin():
                     ticket_obj.asignado_a = tecnico_original
 
-                ticket_obj.save()
+                ticket_obj.save(actor=usuario)
                 messages.success(request, "Ticket actualizado correctamente.")
                 return redirect("ticket_detalle", pk=ticket_obj.pk)
 
@@ -259,6 +271,9 @@ def ticket_tomar(request, pk):
     """
     Permite a un TÉCNICO tomar un ticket que esté sin asignar.
     Solo si la categoría está dentro de sus especialidades.
+
+    La asignación es un UPDATE condicional (`tomar_ticket`): si dos
+    técnicos lo toman a la vez, solo uno lo consigue.
     """
     usuario = request.user
     ticket = get_object_or_404(Ticket, pk=pk)
@@ -267,20 +282,22 @@ def ticket_tomar(request, pk):
         return HttpResponseForbidden("Solo los técnicos pueden tomar tickets.")
 
     # Ya tiene técnico asignado → no se puede tomar
-    if ticket.asignado_a and ticket.asignado_a != usuario:
+    if ticket.asignado_a_id and ticket.asignado_a_id != usuario.pk:
         messages.error(request, "Este ticket ya tiene un técnico asignado.")
         return redirect('ticket_detalle', pk=ticket.pk)
 
     # Comprobar especialidades
-    cats = usuario.especialidades.all()
-    if cats.exists() and ticket.categoria not in cats:
+    if not categoria_permitida(usuario, ticket.categoria_id):
         messages.error(request, "Este ticket no corresponde a tus tipos de avería.")
         return redirect('ticket_detalle', pk=ticket.pk)
 
     if request.method == 'POST':
-        ticket.asignado_a = usuario
-        ticket.save()
-        messages.success(request, "Has tomado este ticket.")
+        if ticket.asignado_a_id == usuario.pk:
+            messages.info(request, "Ya tienes este ticket asignado.")
+        elif tomar_ticket(ticket, usuario):
+            messages.success(request, "Has tomado este ticket.")
+        else:
+            messages.error(request, "Otro técnico tomó este ticket primero.")
         return redirect('ticket_detalle', pk=ticket.pk)
 
     return redirect('ticket_detalle', pk=ticket.pk)
@@ -309,7 +326,7 @@ def ticket_actualizar_estado(request, pk):
             if not request.user.es_admin():
                 ticket_obj.asignado_a = tecnico_original
 
-            ticket_obj.save()
+            ticket_obj.save(actor=usuario)
             messages.success(request, "Ticket actualizado correctamente.")
             return redirect('ticket_detalle', pk=ticket_obj.pk)
     else:
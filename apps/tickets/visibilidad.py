@@ -0,0 +1,101 @@
+"""
+Quién puede ver / tomar qué tickets, en un solo lugar.
+
+- ADMIN: todos.
+- DIGITADOR: solo los que él creó.
+- TÉCNICO: los asignados a él + los sin asignar de sus especialidades
+  (si no tiene especialidades configuradas, todos los sin asignar).
+
+Las especialidades del técnico se guardan como un frozenset de ids de
+categoría en la caché de Django (y en el propio objeto usuario durante la
+petición), así los permisos de un ticket no hacen consultas extra. Se
+invalidan con `m2m_changed` de `Usuario.especialidades`; si la caché no
+es compartida entre procesos, los demás se enteran al vencer
+VISIBILIDAD_CACHE_SEGUNDOS.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+from django.db.models.signals import m2m_changed
+
+from apps.usuarios.models import Usuario
+
+
+def _clave(usuario_id):
+    return f'visibilidad:especialidades:{usuario_id}'
+
+
+def categorias_de_tecnico(usuario):
+    """frozenset con los ids de las especialidades del usuario."""
+    ids = getattr(usuario, '_ids_especialidades', None)
+    if ids is None:
+        ids = cache.get(_clave(usuario.pk))
+        if ids is None:
+            ids = frozenset(usuario.especialidades.values_list('id', flat=True))
+            cache.set(_clave(usuario.pk), ids, getattr(settings, 'VISIBILIDAD_CACHE_SEGUNDOS', 300))
+        usuario._ids_especialidades = ids
+    return ids
+
+
+def tickets_visibles(usuario, qs):
+    """Restringe el queryset de tickets a lo que el usuario puede ver."""
+    if usuario.es_admin():
+        return qs
+    if usuario.es_digitador():
+        return qs.filter(creado_por=usuario)
+    if usuario.es_tecnico():
+        cats = categorias_de_tecnico(usuario)
+        sin_asignar = Q(asignado_a__isnull=True)
+        if cats:
+            sin_asignar &= Q(categoria_id__in=cats)
+        return qs.filter(Q(asignado_a=usuario) | sin_asignar)
+    return qs.none()
+
+
+def categoria_permitida(usuario, categoria_id):
+    """True si el técnico atiende esa categoría (o no tiene especialidades)."""
+    cats = categorias_de_tecnico(usuario)
+    return not cats or categoria_id in cats
+
+
+def puede_ver_ticket(usuario, ticket):
+    """Mismas reglas que `tickets_visibles`, para un ticket ya cargado."""
+    if usuario.es_admin():
+        return True
+    if usuario.es_digitador():
+        return ticket.creado_por_id == usuario.pk
+    if usuario.es_tecnico():
+        if ticket.asignado_a_id == usuario.pk:
+            return True
+        return ticket.asignado_a_id is None and categoria_permitida(usuario, ticket.categoria_id)
+    return False
+
+
+# ----------------------------------------------------------------------
+# Invalidación
+# ----------------------------------------------------------------------
+def _especialidades_cambiadas(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear', 'pre_clear'):
+        return
+    if not reverse:
+        # usuario.especialidades.add/remove/clear(...)
+        instance.__dict__.pop('_ids_especialidades', None)
+        usuarios = [instance.pk]
+    elif pk_set:
+        # categoria.tecnicos_especialistas.add/remove(...)
+        usuarios = list(pk_set)
+    elif action == 'pre_clear':
+        # categoria.tecnicos_especialistas.clear(): hay que saber a quiénes
+        # tenía antes de borrar las filas
+        usuarios = list(instance.tecnicos_especialistas.values_list('id', flat=True))
+    else:
+        return
+    cache.delete_many([_clave(pk) for pk in usuarios])
+
+
+def conectar_senales():
+    m2m_changed.connect(
+        _especialidades_cambiadas,
+        sender=Usuario.especialidades.through,
+        dispatch_uid='visibilidad_especialidades',
+    )
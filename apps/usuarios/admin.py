@@ -33,7 +33,7 @@ class UsuarioAdminForm(forms.ModelForm):
 class UsuarioAdmin(UserAdmin):
     form = UsuarioAdminForm
 
-    list_display = ("username", "first_name", "last_name", "rol", "is_active")
+    list_display = ("username", "first_name", "last_name", "rol", "contador_abiertos", "is_active")
     list_filter = ("rol", "is_active", "is_staff", "is_superuser")
 
     fieldsets = UserAdmin.fieldsets + (
@@ -1,90 +1,157 @@
-import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
 import requests
+from requests.adapters import HTTPAdapter
 from django.conf import settings
-from apps.usuarios.models import DispositivoNotificacion
 
 from google.oauth2 import service_account
 from google.auth.transport.requests import Request
 
 SCOPES = ["https://www.googleapis.com/auth/firebase.messaging"]
 
+# errorCode de FCM que significan "este token ya no sirve, no reintentar"
+CODIGOS_TOKEN_INVALIDO = {"UNREGISTERED", "SENDER_ID_MISMATCH"}
 
-def _get_access_token():
+
+class ClienteFCM:
     """
-    Obtiene un token de acceso OAuth2 usando el JSON de servicio de Firebase.
+    Cliente compartido de FCM HTTP v1.
+
+    - Lee el JSON de la cuenta de servicio una sola vez.
+    - Guarda el access token y solo lo renueva cuando le faltan menos de
+      `margen` para vencer (con lock, seguro entre hilos).
+    - Reutiliza una `requests.Session` con pool keep-alive, así no se abre
+      una conexión TCP/TLS nueva por cada dispositivo.
+    - Envía a varios dispositivos en paralelo con un pool de hilos acotado.
     """
-    print("[FCM] Obteniendo access token...")
 
-    credentials = service_account.Credentials.from_service_account_file(
-        str(settings.FIREBASE_CREDENTIALS_FILE),
-        scopes=SCOPES,
-    )
-    credentials.refresh(Request())
-    print("[FCM] Access token obtenido OK.")
-    return credentials.token
+    def __init__(self, archivo_credenciales, project_id, margen=timedelta(minutes=5), pool=10, hilos=8):
+        self.archivo_credenciales = str(archivo_credenciales)
+        self.project_id = project_id
+        self.margen = margen
+        self.url = f"https://fcm.googleapis.com/v1/projects/{project_id}/messages:send"
+
+        self.session = requests.Session()
+        adaptador = HTTPAdapter(pool_connections=1, pool_maxsize=pool)
+        self.session.mount("https://", adaptador)
+
+        self._lock = threading.Lock()
+        self._credenciales = None
+        self._hilos = ThreadPoolExecutor(max_workers=hilos, thread_name_prefix="fcm")
+
+    def _token_vigente(self):
+        cred = self._credenciales
+        if cred is None or not cred.token or cred.expiry is None:
+            return False
+        # google-auth guarda `expiry` como datetime UTC sin zona
+        ahora = datetime.now(timezone.utc).replace(tzinfo=None)
+        return cred.expiry - self.margen > ahora
+
+    def token(self, forzar=False):
+        """Access token OAuth2; solo hace el intercambio si está por vencer."""
+        with self._lock:
+            if self._credenciales is None:
+                self._credenciales = service_account.Credentials.from_service_account_file(
+                    self.archivo_credenciales,
+                    scopes=SCOPES,
+                )
+            if forzar or not self._token_vigente():
+                print("[FCM] Renovando access token...")
+                self._credenciales.refresh(Request(session=self.session))
+            return self._credenciales.token
+
+    def enviar(self, mensaje, timeout=10):
+        """
+        Envía un `message` de FCM y devuelve la `requests.Response`.
+        Si FCM responde 401 (token revocado) renueva y reintenta una vez.
+        """
+        for intento in range(2):
+            headers = {
+                "Authorization": f"Bearer {self.token(forzar=intento > 0)}",
+                "Content-Type": "application/json; charset=UTF-8",
+            }
+            resp = self.session.post(self.url, headers=headers, json={"message": mensaje}, timeout=timeout)
+            if resp.status_code != 401:
+                break
+        return resp
+
+    def enviar_a_tokens(self, tokens, mensaje, timeout=10):
+        """
+        Envía `mensaje` a cada token en paralelo. La latencia total se acerca
+        a la del dispositivo más lento y no a la suma de todos.
+        Devuelve {token: Response} o {token: excepción de red}.
+        """
+        # Renovar el token una sola vez antes de repartir el trabajo
+        self.token()
+
+        def _uno(token):
+            try:
+                return self.enviar(dict(mensaje, token=token), timeout=timeout)
+            except requests.RequestException as e:
+                return e
+
+        return dict(zip(tokens, self._hilos.map(_uno, tokens)))
+
+
+def token_invalido(resp):
+    """
+    True si FCM dice que el token del dispositivo ya no es válido
+    (desinstalado, token de otro proyecto o mal formado).
+    """
+    if not isinstance(resp, requests.Response) or resp.status_code not in (400, 403, 404):
+        return False
+    try:
+        error = resp.json().get("error", {})
+    except ValueError:
+        return False
 
+    codigos = {d.get("errorCode") for d in error.get("details", []) if isinstance(d, dict)}
+    if codigos & CODIGOS_TOKEN_INVALIDO:
+        return True
 
-def enviar_notificacion_nuevo_ticket(ticket):
+    # INVALID_ARGUMENT también sale por un payload mal armado: solo cuenta
+    # como token inválido si el mensaje habla del token.
+    codigos.add(error.get("status"))
+    return "INVALID_ARGUMENT" in codigos and "token" in (error.get("message") or "").lower()
+
+
+_cliente = None
+_cliente_pid = None
+_cliente_lock = threading.Lock()
+
+
+def obtener_cliente_fcm():
     """
-    Envía una notificación push FCM al técnico asignado al ticket.
-    Usa HTTP v1: https://fcm.googleapis.com/v1/projects/PROJECT_ID/messages:send
+    Devuelve el cliente FCM del proceso (uno por worker: tras un fork se
+    crea otro para no compartir sockets con el proceso padre).
     """
-    try:
-        if not ticket.asignado_a:
-            print(f"[FCM] Ticket {ticket.id}: sin técnico asignado. No se envía push.")
-            return
-
-        # 1) Buscar dispositivos activos del técnico
-        dispositivos = DispositivoNotificacion.objects.filter(
-            usuario=ticket.asignado_a,
-            activo=True,
-        ).exclude(fcm_token__isnull=True).exclude(fcm_token__exact="")
-
-        if not dispositivos.exists():
-            print(f"[FCM] Ticket {ticket.id}: el técnico {ticket.asignado_a} no tiene dispositivos activos.")
-            return
-
-        print(f"[FCM] Ticket {ticket.id}: encontré {dispositivos.count()} dispositivo(s) para {ticket.asignado_a}.")
-
-        # 2) Access token
-        access_token = _get_access_token()
-
-        url = f"https://fcm.googleapis.com/v1/projects/{settings.FIREBASE_PROJECT_ID}/messages:send"
-        headers = {
-            "Authorization": f"Bearer {access_token}",
-            "Content-Type": "application/json; charset=UTF-8",
-        }
-
-        # URL completa al detalle del ticket en tu web
-        ticket_url = f"{settings.BASE_URL}/tickets/{ticket.id}/"
-
-        # 3) Enviar a cada dispositivo
-        for disp in dispositivos:
-            cuerpo = {
-                "message": {
-                    "token": disp.fcm_token,
-                    "notification": {
-                        "title": f"Nuevo ticket {ticket.numero_ticket}",
-                        "body": f"{ticket.local} - {ticket.categoria.nombre if ticket.categoria else ''}",
-                    },
-                    "data": {
-                        "ticket_id": str(ticket.id),
-                        "ticket_url": ticket_url,
-                        "estado": ticket.estado,
-                    },
-                    "android": {
-                        "notification": {
-                            "click_action": "FLUTTER_NOTIFICATION_CLICK",
-                        }
-                    },
-                }
-            }
+    global _cliente, _cliente_pid
+    with _cliente_lock:
+        if _cliente is None or _cliente_pid != os.getpid():
+            _cliente = ClienteFCM(
+                settings.FIREBASE_CREDENTIALS_FILE,
+                settings.FIREBASE_PROJECT_ID,
+                pool=getattr(settings, 'FCM_HTTP_POOL', 10),
+                hilos=getattr(settings, 'FCM_MAX_HILOS', 8),
+            )
+            _cliente_pid = os.getpid()
+        return _cliente
 
-            print(f"[FCM] Enviando a token {disp.fcm_token[:20]}...")
 
-            resp = requests.post(url, headers=headers, json=cuerpo, timeout=10)
+def _get_access_token():
+    """
+    Obtiene un token de acceso OAuth2 usando el JSON de servicio de Firebase.
+    (Cacheado en el cliente compartido hasta poco antes de vencer.)
+    """
+    return obtener_cliente_fcm().token()
 
-            print(f"[FCM] Respuesta FCM: {resp.status_code} - {resp.text}")
 
-    except Exception as e:
-        print(f"[FCM] ERROR enviando notificación: {e}")
+def enviar_notificacion_nuevo_ticket(ticket):
+    """
+    Compatibilidad: la implementación vive en `apps.tickets.fcm`.
+    """
+    from apps.tickets.fcm import enviar_notificacion_nuevo_ticket as enviar
+    return enviar(ticket)
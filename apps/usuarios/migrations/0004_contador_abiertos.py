@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-16 21:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('usuarios', '0003_dispositivonotificacion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='usuario',
+            name='contador_abiertos',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Tickets abiertos asignados'),
+        ),
+    ]
@@ -61,6 +61,14 @@ class Usuario(AbstractUser):
         verbose_name='Fecha de actualización'
     )
 
+    # Tickets PENDIENTE / EN_PROCESO asignados; lo mantiene
+    # apps.tickets.contadores (`manage.py reconciliar_contadores`).
+    contador_abiertos = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Tickets abiertos asignados'
+    )
+
     class Meta:
         verbose_name = 'Usuario'
         verbose_name_plural = 'Usuarios'
@@ -69,6 +77,20 @@ class Usuario(AbstractUser):
     def __str__(self):
         return f"{self.get_full_name() or self.username} ({self.get_rol_display()})"
 
+    def save(self, *args, **kwargs):
+        if (
+            kwargs.get('update_fields') is None
+            and not self._state.adding
+            and not kwargs.get('force_insert')
+        ):
+            # Editar el usuario no debe pisar el contador con lo que tenía
+            # en memoria al cargarse
+            kwargs['update_fields'] = [
+                f.name for f in self._meta.concrete_fields
+                if not f.primary_key and f.name != 'contador_abiertos'
+            ]
+        super().save(*args, **kwargs)
+
     def es_admin(self):
         """Verifica si el usuario es administrador"""
         return self.rol == 'ADMIN'
@@ -0,0 +1,159 @@
+import json
+import threading
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+import requests
+from django.test import SimpleTestCase, override_settings
+
+from . import fcm
+
+
+class CredencialesFalsas:
+    """Lo que usa ClienteFCM de google.oauth2 Credentials."""
+
+    def __init__(self, vigencia):
+        self.vigencia = vigencia
+        self.token = None
+        self.expiry = None
+        self.renovaciones = 0
+
+    def refresh(self, request):
+        self.renovaciones += 1
+        self.token = f'token-{self.renovaciones}'
+        self.expiry = datetime.now(timezone.utc).replace(tzinfo=None) + self.vigencia
+
+
+def respuesta(status, cuerpo=b'{}'):
+    resp = requests.Response()
+    resp.status_code = status
+    resp._content = cuerpo
+    return resp
+
+
+class ClienteFCMTests(SimpleTestCase):
+
+    def setUp(self):
+        self.credenciales = CredencialesFalsas(timedelta(hours=1))
+        lectura = mock.patch.object(
+            fcm.service_account.Credentials, 'from_service_account_file', return_value=self.credenciales,
+        )
+        self.lectura = lectura.start()
+        self.addCleanup(lectura.stop)
+        silencio = mock.patch.object(fcm, 'print', create=True)
+        silencio.start()
+        self.addCleanup(silencio.stop)
+        self.cliente = fcm.ClienteFCM('cuenta.json', 'proyecto', hilos=4)
+
+    def test_token_cacheado_hasta_que_esta_por_vencer(self):
+        self.assertEqual(self.cliente.token(), 'token-1')
+        self.assertEqual(self.cliente.token(), 'token-1')
+        self.assertEqual(self.lectura.call_count, 1)
+
+        # Le quedan 4 minutos (margen de 5): se renueva
+        self.credenciales.expiry = datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(minutes=4)
+        self.assertEqual(self.cliente.token(), 'token-2')
+        self.assertEqual(self.cliente.token(forzar=True), 'token-3')
+        self.assertEqual(self.lectura.call_count, 1)
+
+    def test_una_sola_renovacion_entre_hilos(self):
+        barrera = threading.Barrier(8)
+
+        def pedir():
+            barrera.wait()
+            self.cliente.token()
+
+        hilos = [threading.Thread(target=pedir) for _ in range(8)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        self.assertEqual(self.credenciales.renovaciones, 1)
+
+    def test_401_renueva_y_reintenta_una_vez(self):
+        with mock.patch.object(self.cliente.session, 'post',
+                               side_effect=[respuesta(401), respuesta(200)]) as post:
+            self.assertEqual(self.cliente.enviar({'token': 'x'}).status_code, 200)
+        autorizaciones = [llamada.kwargs['headers']['Authorization'] for llamada in post.call_args_list]
+        self.assertEqual(autorizaciones, ['Bearer token-1', 'Bearer token-2'])
+
+        with mock.patch.object(self.cliente.session, 'post', return_value=respuesta(401)) as post:
+            self.assertEqual(self.cliente.enviar({'token': 'x'}).status_code, 401)
+        self.assertEqual(post.call_count, 2)
+
+    def test_sesion_con_pool_compartida(self):
+        adaptador = self.cliente.session.get_adapter('https://fcm.googleapis.com/')
+        self.assertEqual(adaptador._pool_maxsize, 10)
+        with mock.patch.object(self.cliente.session, 'post', return_value=respuesta(200)) as post:
+            self.cliente.enviar({'token': 'a'})
+            self.cliente.enviar({'token': 'b'})
+        self.assertEqual(post.call_count, 2)
+        self.assertEqual(self.lectura.call_count, 1)
+
+
+@override_settings(FIREBASE_CREDENTIALS_FILE='cuenta.json', FIREBASE_PROJECT_ID='proyecto')
+class ObtenerClienteFCMTests(SimpleTestCase):
+
+    def setUp(self):
+        parche = mock.patch.multiple(fcm, _cliente=None, _cliente_pid=None)
+        parche.start()
+        self.addCleanup(parche.stop)
+
+    def test_uno_por_proceso(self):
+        cliente = fcm.obtener_cliente_fcm()
+        self.assertIs(fcm.obtener_cliente_fcm(), cliente)
+        self.assertEqual(cliente.url, 'https://fcm.googleapis.com/v1/projects/proyecto/messages:send')
+        # Tras un fork (otro pid) se arma uno nuevo
+        with mock.patch.object(fcm.os, 'getpid', return_value=-1):
+            self.assertIsNot(fcm.obtener_cliente_fcm(), cliente)
+
+
+class EnvioMultipleTests(SimpleTestCase):
+
+    def test_en_paralelo_y_errores_de_red_por_token(self):
+        cliente = fcm.ClienteFCM('cuenta.json', 'proyecto', hilos=4)
+        en_curso, maximo, lock = [0], [0], threading.Lock()
+        barrera = threading.Barrier(4, timeout=5)
+
+        def enviar(mensaje, timeout):
+            with lock:
+                en_curso[0] += 1
+                maximo[0] = max(maximo[0], en_curso[0])
+            barrera.wait()  # solo pasa si los 4 están a la vez
+            with lock:
+                en_curso[0] -= 1
+            if mensaje['token'] == 't3':
+                raise requests.ConnectionError('caído')
+            return respuesta(200)
+
+        with mock.patch.object(cliente, 'token'), mock.patch.object(cliente, 'enviar', side_effect=enviar):
+            respuestas = cliente.enviar_a_tokens(['t1', 't2', 't3', 't4'], {'data': {}})
+
+        self.assertEqual(maximo[0], 4)
+        self.assertEqual(list(respuestas), ['t1', 't2', 't3', 't4'])
+        self.assertIsInstance(respuestas['t3'], requests.ConnectionError)
+        self.assertEqual(respuestas['t1'].status_code, 200)
+
+
+class TokenInvalidoTests(SimpleTestCase):
+
+    def error(self, status, estado=None, mensaje='', codigo=None):
+        detalles = [{'@type': 'type.googleapis.com/google.firebase.fcm.v1.FcmError', 'errorCode': codigo}]
+        cuerpo = {'error': {'code': status, 'status': estado, 'message': mensaje,
+                            'details': detalles if codigo else []}}
+        return respuesta(status, json.dumps(cuerpo).encode())
+
+    def test_casos(self):
+        casos = [
+            (self.error(404, 'NOT_FOUND', codigo='UNREGISTERED'), True),
+            (self.error(403, 'PERMISSION_DENIED', codigo='SENDER_ID_MISMATCH'), True),
+            (self.error(400, 'INVALID_ARGUMENT', 'The registration token is not a valid FCM registration token'), True),
+            (self.error(400, 'INVALID_ARGUMENT', 'Invalid JSON payload received', codigo='INVALID_ARGUMENT'), False),
+            (self.error(500, 'INTERNAL', codigo='INTERNAL'), False),
+            (self.error(429, 'RESOURCE_EXHAUSTED', codigo='QUOTA_EXCEEDED'), False),
+            (respuesta(404, b'<html>no es json</html>'), False),
+            (respuesta(200), False),
+            (requests.ConnectionError('caído'), False),
+        ]
+        for resp, esperado in casos:
+            self.assertEqual(fcm.token_invalido(resp), esperado, getattr(resp, 'content', resp))
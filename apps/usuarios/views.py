@@ -51,34 +51,22 @@ def dashboard(request):
     - DIGITADOR: ve sus tickets abiertos.
     - TÉCNICO: ve sus tickets asignados abiertos + (si aplica) tickets sin asignar de sus especialidades.
     """
-    from apps.tickets.models import Ticket  # import local para evitar ciclos raros
-    from django.db.models import Q
+    from apps.tickets.models import Ticket, ESTADOS_ABIERTOS  # import local para evitar ciclos raros
+    from apps.tickets.visibilidad import tickets_visibles
     from django.utils import timezone
     from datetime import timedelta
 
     usuario = request.user
     ahora = timezone.now()
 
-    estados_abiertos = ['PENDIENTE', 'EN_PROCESO', 'RESUELTO']
-
     qs = (
         Ticket.objects
-        .filter(estado__in=estados_abiertos)
+        .filter(estado__in=ESTADOS_ABIERTOS)
         .select_related('local', 'categoria', 'asignado_a', 'creado_por')
     )
 
-    if usuario.rol == 'DIGITADOR':
-        qs = qs.filter(creado_por=usuario)
-
-    elif usuario.rol == 'TECNICO':
-        cats = usuario.especialidades.all()
-        if cats.exists():
-            qs = qs.filter(
-                Q(asignado_a=usuario) |
-                Q(asignado_a__isnull=True, categoria__in=cats)
-            )
-        else:
-            qs = qs.filter(asignado_a=usuario)
+    # Mismas reglas por rol que el listado de tickets
+    qs = tickets_visibles(usuario, qs)
 
     # Resumen
     total_abiertos = qs.count()
@@ -88,8 +76,9 @@ def dashboard(request):
         fecha_limite_sla__lte=ahora + timedelta(hours=2),
     ).count()
 
-    # Orden: lo más urgente arriba
-    tickets_abiertos = qs.order_by('fecha_limite_sla', '-fecha_creacion')[:50]
+    # Orden: lo más urgente arriba. El color/vencido del SLA sale de la
+    # consulta (con_sla), no de un cálculo por fila en la plantilla.
+    tickets_abiertos = qs.con_sla(ahora).order_by('fecha_limite_sla', '-fecha_creacion')[:50]
 
     contexto = {
         "user": usuario,
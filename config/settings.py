@@ -71,21 +71,66 @@ TEMPLATES = [
 WSGI_APPLICATION = 'config.wsgi.application'
 
 # Database
-# Usamos SQLite simple y diferenciamos local vs PythonAnywhere
-if 'PYTHONANYWHERE_DOMAIN' in os.environ:
+# Usamos SQLite simple y diferenciamos local vs PythonAnywhere.
+# Perfil de cada conexión nueva (ver config/sqlite/base.py): WAL deja leer
+# mientras otro escribe, busy_timeout espera el lock en vez de fallar con
+# "database is locked" y BEGIN IMMEDIATE toma el lock al empezar la
+# transacción. Si el disco no soporta WAL (algunos sistemas de archivos de
+# red), usar SQLITE_JOURNAL_MODE=DELETE. Medir con manage.py benchmark_escrituras.
+SQLITE_OPCIONES = {
+    'transaction_mode': config('SQLITE_TRANSACCIONES', default='IMMEDIATE'),
+    'pragmas': {
+        'journal_mode': config('SQLITE_JOURNAL_MODE', default='WAL'),
+        'synchronous': config('SQLITE_SYNCHRONOUS', default='NORMAL'),
+        'busy_timeout': config('SQLITE_BUSY_TIMEOUT_MS', default=10000, cast=int),
+        'mmap_size': config('SQLITE_MMAP_BYTES', default=128 * 1024 * 1024, cast=int),
+        'cache_size': -config('SQLITE_CACHE_KIB', default=20000, cast=int),  # negativo = KiB
+        'temp_store': config('SQLITE_TEMP_STORE', default='MEMORY'),
+    },
+}
+
+# PostgreSQL (DB_MOTOR=postgresql) para varios workers escribiendo a la vez.
+# Django 4.2 no trae pool propio: cada worker guarda su conexión
+# DB_CONN_MAX_AGE segundos (comprobándola antes de reusarla) y, si hay
+# muchos workers, se pone PgBouncer delante (DB_PGBOUNCER=True en modo
+# "transaction": sin cursores del lado del servidor).
+# Las pruebas corren contra PostgreSQL con --settings=config.settings_pruebas_pg.
+DB_MOTOR = config('DB_MOTOR', default='sqlite')
+
+if DB_MOTOR == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': config('DB_NOMBRE', default='tickets_averias'),
+            'USER': config('DB_USUARIO', default='tickets_averias'),
+            'PASSWORD': config('DB_CLAVE', default=''),
+            'HOST': config('DB_HOST', default='localhost'),
+            'PORT': config('DB_PUERTO', default='5432'),
+            'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', default=60, cast=int),
+            'CONN_HEALTH_CHECKS': True,
+            'DISABLE_SERVER_SIDE_CURSORS': config('DB_PGBOUNCER', default=False, cast=bool),
+            'OPTIONS': {
+                'application_name': 'tickets_averias',
+                'connect_timeout': config('DB_CONNECT_TIMEOUT', default=5, cast=int),
+            },
+        }
+    }
+elif 'PYTHONANYWHERE_DOMAIN' in os.environ:
     # Producción en PythonAnywhere
     DATABASES = {
         'default': {
-            'ENGINE': 'django.db.backends.sqlite3',
+            'ENGINE': 'config.sqlite',
             'NAME': BASE_DIR / 'tickets_prod.sqlite3',
+            'OPTIONS': SQLITE_OPCIONES,
         }
     }
 else:
     # Desarrollo local (tu Mac)
     DATABASES = {
         'default': {
-            'ENGINE': 'django.db.backends.sqlite3',
+            'ENGINE': 'config.sqlite',
             'NAME': BASE_DIR / 'db.sqlite3',
+            'OPTIONS': SQLITE_OPCIONES,
         }
     }
 
@@ -162,3 +207,67 @@ SESSION_ENGINE = 'django.contrib.sessions.backends.signed_cookies'
 
 FCM_SERVER_KEY = config('FCM_SERVER_KEY', default='')
 
+
+# Tamaño de página del listado de tickets (paginación por cursor)
+TICKETS_POR_PAGINA = config('TICKETS_POR_PAGINA', default=50, cast=int)
+
+# Números de ticket que cada proceso reserva de una vez (1 = sin huecos)
+TICKETS_BLOQUE_NUMEROS = config('TICKETS_BLOQUE_NUMEROS', default=1, cast=int)
+
+# Bandeja de salida de notificaciones (manage.py procesar_notificaciones)
+NOTIFICACIONES_MAX_INTENTOS = config('NOTIFICACIONES_MAX_INTENTOS', default=5, cast=int)
+NOTIFICACIONES_REINTENTO_SEGUNDOS = config('NOTIFICACIONES_REINTENTO_SEGUNDOS', default=30, cast=int)
+NOTIFICACIONES_BLOQUEO_SEGUNDOS = config('NOTIFICACIONES_BLOQUEO_SEGUNDOS', default=300, cast=int)
+
+# Conexiones keep-alive del cliente FCM compartido (por proceso)
+FCM_HTTP_POOL = config('FCM_HTTP_POOL', default=10, cast=int)
+# Envíos FCM simultáneos (un hilo por dispositivo, con este tope)
+FCM_MAX_HILOS = config('FCM_MAX_HILOS', default=8, cast=int)
+
+# Autocompletado de locales: vigencia del índice en memoria y tope de resultados
+LOCALES_INDICE_SEGUNDOS = config('LOCALES_INDICE_SEGUNDOS', default=300, cast=int)
+LOCALES_AUTOCOMPLETAR_MAX = config('LOCALES_AUTOCOMPLETAR_MAX', default=20, cast=int)
+
+# Vigencia de las especialidades cacheadas de cada técnico (permisos de tickets)
+VISIBILIDAD_CACHE_SEGUNDOS = config('VISIBILIDAD_CACHE_SEGUNDOS', default=300, cast=int)
+
+# Programador de SLA: % del plazo en que se avisa "por vencer"
+SLA_AVISO_PORCENTAJE = config('SLA_AVISO_PORCENTAJE', default=75, cast=float)
+
+# Horario laboral en el que corre el SLA (lunes=0 ... domingo=6; día
+# ausente = cerrado). Los feriados se cargan en el admin (Feriado).
+SLA_HORARIO_LABORAL = {
+    0: ('08:00', '18:00'),
+    1: ('08:00', '18:00'),
+    2: ('08:00', '18:00'),
+    3: ('08:00', '18:00'),
+    4: ('08:00', '18:00'),
+    5: ('08:00', '18:00'),
+}
+# Vigencia de los calendarios laborales cacheados en cada proceso
+SLA_CALENDARIO_SEGUNDOS = config('SLA_CALENDARIO_SEGUNDOS', default=3600, cast=int)
+
+# Al cambiar tiempo_sla_horas de una categoría, encolar el recálculo de sus
+# tickets abiertos (por lotes de SLA_RECALCULO_LOTE). Lo hace el worker
+# `manage.py recalcular_sla --pendientes --continuo` (o por cron sin --continuo)
+SLA_RECALCULO_AUTOMATICO = config('SLA_RECALCULO_AUTOMATICO', default=True, cast=bool)
+SLA_RECALCULO_LOTE = config('SLA_RECALCULO_LOTE', default=500, cast=int)
+
+# Tickets creados sin técnico: asignar el de menor carga de la especialidad
+# (ver apps/tickets/asignacion.py; pesos en ASIGNACION_PESOS)
+ASIGNACION_AUTOMATICA = config('ASIGNACION_AUTOMATICA', default=True, cast=bool)
+ASIGNACION_INDICE_SEGUNDOS = config('ASIGNACION_INDICE_SEGUNDOS', default=300, cast=int)
+ASIGNACION_PESOS = {
+    'carga': 10,       # por ticket abierto del técnico
+    'urgencia': 5,     # por ticket suyo que vence antes que el nuevo
+    'provincia': 4,    # descuento si ya atiende esa provincia
+    'municipio': 8,    # descuento si ya atiende ese municipio
+}
+
+# Tickets CERRADO/CANCELADO sin cambios desde hace más de estos días pasan
+# al archivo (manage.py archivar_tickets, p. ej. una vez por noche)
+TICKETS_ARCHIVAR_DIAS = config('TICKETS_ARCHIVAR_DIAS', default=180, cast=int)
+
+# Días máximos de una exportación XLSX desde la web (el libro se arma
+# entero en un temporal antes de enviarlo; para más, CSV o el comando)
+REPORTES_XLSX_MAX_DIAS = config('REPORTES_XLSX_MAX_DIAS', default=366, cast=int)
@@ -0,0 +1,14 @@
+"""
+Configuración para correr las pruebas contra PostgreSQL en vez de SQLite:
+
+    DB_USUARIO=postgres python manage.py test apps --settings=config.settings_pruebas_pg
+
+El resto de la conexión sale de las mismas variables DB_* que settings.py
+(DB_HOST, DB_PUERTO, DB_CLAVE...). La base de pruebas la crea Django
+(`test_<DB_NOMBRE>`), así que el usuario necesita CREATEDB.
+"""
+import os
+
+os.environ['DB_MOTOR'] = 'postgresql'
+
+from .settings import *  # noqa: E402,F401,F403
@@ -0,0 +1,62 @@
+"""
+Backend SQLite del proyecto: el de Django más un perfil de conexión.
+
+`DATABASES['default']['OPTIONS']` acepta dos claves propias (el resto se
+pasa tal cual a `sqlite3.connect`):
+
+- `pragmas`: dict {nombre: valor} que se ejecuta como `PRAGMA nombre = valor`
+  en cada conexión nueva (WAL, synchronous, busy_timeout, mmap_size...).
+- `transaction_mode`: DEFERRED (lo de Django), IMMEDIATE o EXCLUSIVE. Con
+  IMMEDIATE, `transaction.atomic()` abre con `BEGIN IMMEDIATE` y toma el
+  lock de escritura al empezar: si otro proceso está escribiendo, espera
+  `busy_timeout` en vez de fallar con "database is locked" al pasar de
+  leer a escribir a mitad de la transacción (ahí SQLite no espera).
+
+El perfil se arma en settings (SQLITE_OPCIONES) y se mide con
+`manage.py benchmark_escrituras`.
+"""
+import re
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.sqlite3 import base
+
+
+MODOS_TRANSACCION = ('DEFERRED', 'IMMEDIATE', 'EXCLUSIVE')
+
+
+def aplicar_pragmas(conexion, pragmas):
+    """Ejecuta los PRAGMA de `pragmas` sobre una conexión sqlite3."""
+    for nombre, valor in (pragmas or {}).items():
+        if not re.fullmatch(r'\w+', str(nombre)) or not re.fullmatch(r'-?\w+', str(valor)):
+            raise ImproperlyConfigured(f'PRAGMA inválido: {nombre} = {valor!r}')
+        conexion.execute(f'PRAGMA {nombre} = {valor}')
+
+
+def modo_transaccion(opciones):
+    modo = str(opciones.get('transaction_mode') or 'DEFERRED').upper()
+    if modo not in MODOS_TRANSACCION:
+        raise ImproperlyConfigured(
+            f"transaction_mode debe ser uno de {', '.join(MODOS_TRANSACCION)} (es {modo!r})."
+        )
+    return modo
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        params.pop('pragmas', None)
+        params.pop('transaction_mode', None)
+        return params
+
+    def get_new_connection(self, conn_params):
+        conexion = super().get_new_connection(conn_params)
+        aplicar_pragmas(conexion, self.settings_dict['OPTIONS'].get('pragmas'))
+        return conexion
+
+    def _start_transaction_under_autocommit(self):
+        modo = modo_transaccion(self.settings_dict['OPTIONS'])
+        if modo == 'DEFERRED':
+            super()._start_transaction_under_autocommit()
+        else:
+            self.cursor().execute(f'BEGIN {modo}')